@@ -0,0 +1,107 @@
+# Benchmark: odczyt długości i parametrów audio z nagłówków plików vs. `ffprobe`.
+#
+# Skrypt przechodzi przez wszystkie obsługiwane pliki w podanym folderze i dla każdego z nich
+# odczytuje długość, kodek, liczbę kanałów, częstotliwość próbkowania i bitrate na dwa sposoby:
+#   1. "nagłówki" - parsery z `src.utils.audio.header_parsers` (bez uruchamiania procesów),
+#   2. "ffprobe"  - dawne zachowanie: osobny proces `ffprobe` dla każdego pliku.
+# Wynik pokazuje łączny i średni czas obu ścieżek, liczbę plików obsłużonych przez parsery
+# (pozostałe trafiają do `ffprobe`) oraz pliki, dla których wyniki się różnią.
+#
+# Uruchomienie (z głównego katalogu projektu, wymaga `ffprobe` w PATH):
+#   python benchmarks/bench_duration_lookup.py --input-dir /sciezka/do/nagran
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+# Dodajemy główny katalog projektu do ścieżki, aby móc importować pakiet `src`.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Dopuszczalna różnica długości między ścieżkami: 50 ms lub 0,5% długości nagrania.
+_DURATION_TOLERANCE_SEC = 0.05
+_DURATION_TOLERANCE_RATIO = 0.005
+
+
+def _collect_files(input_dir, extensions):
+    """Zwraca posortowaną listę plików o obsługiwanych rozszerzeniach (rekurencyjnie)."""
+    paths = []
+    for root, _, names in os.walk(input_dir):
+        paths.extend(os.path.join(root, name) for name in names if os.path.splitext(name)[1].lower() in extensions)
+    return sorted(paths)
+
+
+def _measure(lookup, paths):
+    """Wywołuje `lookup` dla każdego pliku i zwraca (wyniki, czasy pojedynczych wywołań)."""
+    results, timings = [], []
+    for path in paths:
+        start = time.perf_counter()
+        results.append(lookup(path))
+        timings.append(time.perf_counter() - start)
+    return results, timings
+
+
+def _report(label, timings):
+    """Drukuje podsumowanie czasów w milisekundach."""
+    if not timings:
+        print(f"{label:<10} brak plików")
+        return
+    print(f"{label:<10} razem: {sum(timings) * 1000:9.1f} ms | "
+          f"średnio: {statistics.mean(timings) * 1000:7.3f} ms | "
+          f"mediana: {statistics.median(timings) * 1000:7.3f} ms")
+
+
+def _differences(parsed, probed):
+    """Zwraca opis różnic między wynikiem parsera a wynikiem `ffprobe` (pusta lista, jeśli są zgodne)."""
+    if not probed:
+        return ["ffprobe nie odczytał pliku"]
+    differences = []
+    duration_diff = abs(parsed['duration_sec'] - (probed['duration_sec'] or 0))
+    if duration_diff > max(_DURATION_TOLERANCE_SEC, _DURATION_TOLERANCE_RATIO * parsed['duration_sec']):
+        differences.append(f"długość {parsed['duration_sec']:.3f}s vs {probed['duration_sec']}s")
+    for key in ('codec', 'channels', 'sample_rate'):
+        if parsed[key] != probed[key]:
+            differences.append(f"{key} {parsed[key]} vs {probed[key]}")
+    return differences
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Porównanie odczytu długości z nagłówków plików i przez ffprobe.")
+    parser.add_argument("--input-dir", required=True, help="Folder z nagraniami (przeszukiwany rekurencyjnie).")
+    args = parser.parse_args()
+
+    from src import config
+    from src.utils.audio.header_parsers import parse_media_header
+    from src.utils.audio.media_probe import probe_with_ffprobe
+
+    paths = _collect_files(args.input_dir, set(config.ALL_SUPPORTED_EXTENSIONS))
+    if not paths:
+        print(f"Brak obsługiwanych plików w folderze: {args.input_dir}")
+        return
+
+    parsed, parse_timings = _measure(parse_media_header, paths)
+    probed, probe_timings = _measure(probe_with_ffprobe, paths)
+
+    handled = [index for index, result in enumerate(parsed) if result]
+    print(f"Plików: {len(paths)} | obsłużonych przez parsery nagłówków: {len(handled)} "
+          f"| do ffprobe: {len(paths) - len(handled)}\n")
+    _report("nagłówki", [parse_timings[index] for index in handled])
+    _report("ffprobe", [probe_timings[index] for index in handled])
+
+    # Czas całej analizy po zmianie: parser, a dla nieobsłużonych plików dodatkowo `ffprobe`.
+    combined = sum(parse_timings) + sum(probe_timings[index] for index in range(len(paths)) if not parsed[index])
+    print(f"\nAnaliza wszystkich plików: {combined * 1000:.1f} ms (wcześniej: {sum(probe_timings) * 1000:.1f} ms)")
+
+    mismatches = [(paths[index], _differences(parsed[index], probed[index])) for index in handled]
+    mismatches = [(path, differences) for path, differences in mismatches if differences]
+    if mismatches:
+        print(f"\nRóżnice względem ffprobe ({len(mismatches)} plików):")
+        for path, differences in mismatches:
+            print(f"  - {os.path.basename(path)}: {', '.join(differences)}")
+    else:
+        print("\nWyniki parserów są zgodne z ffprobe dla wszystkich obsłużonych plików.")
+
+
+if __name__ == "__main__":
+    main()
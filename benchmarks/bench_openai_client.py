@@ -0,0 +1,131 @@
+# Benchmark: współdzielony klient OpenAI (keep-alive) vs. nowy klient dla każdego pliku.
+#
+# Skrypt uruchamia lokalny serwer-atrapę (stub) endpointu `/v1/audio/transcriptions`
+# i wysyła do niego N "plików" na dwa sposoby:
+#   1. "per plik"   - dawne zachowanie: nowy `OpenAI(...)` (nowa pula połączeń) dla każdego pliku,
+#   2. "współdzielony" - `WhisperService` z rejestru `src.services.openai_client`.
+# Wynik pokazuje średni i medianowy czas jednego zapytania oraz zaoszczędzony czas.
+#
+# Uruchomienie (z głównego katalogu projektu):
+#   python benchmarks/bench_openai_client.py --files 100
+#
+# Uwaga: serwer-atrapa działa po zwykłym HTTP na localhost, więc zmierzona oszczędność
+# obejmuje tworzenie klienta i nawiązywanie połączenia TCP. Przy prawdziwym API dochodzi
+# jeszcze handshake TLS i opóźnienie sieci, więc realny zysk jest większy.
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Dodajemy główny katalog projektu do ścieżki, aby móc importować pakiet `src`.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class _StubTranscriptionHandler(BaseHTTPRequestHandler):
+    """Odpowiada na każde zapytanie POST stałą transkrypcją w formacie JSON."""
+    # HTTP/1.1 jest wymagane, aby serwer utrzymywał połączenia keep-alive.
+    protocol_version = "HTTP/1.1"
+    # Wyłączamy algorytm Nagle'a, aby opóźnione potwierdzenia TCP nie zniekształcały pomiarów.
+    disable_nagle_algorithm = True
+    latency_seconds = 0.0
+
+    def do_POST(self):
+        # Odczytujemy całe ciało zapytania, aby połączenie mogło być użyte ponownie.
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+        body = json.dumps({"text": "transkrypcja testowa"}).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        # Wyciszamy domyślne logowanie każdego zapytania.
+        pass
+
+
+def _start_stub_server(latency_seconds):
+    """Uruchamia serwer-atrapę w wątku w tle i zwraca (serwer, bazowy URL)."""
+    _StubTranscriptionHandler.latency_seconds = latency_seconds
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubTranscriptionHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+
+def _measure(label, transcribe_one, audio_path, files):
+    """Wywołuje `transcribe_one` dla `files` plików i zwraca listę czasów pojedynczych zapytań."""
+    timings = []
+    for _ in range(files):
+        start = time.perf_counter()
+        result = transcribe_one(audio_path)
+        timings.append(time.perf_counter() - start)
+        if result is None:
+            raise RuntimeError(f"[{label}] Zapytanie do serwera-atrapy nie powiodło się.")
+    return timings
+
+
+def _report(label, timings):
+    """Drukuje podsumowanie czasów w milisekundach."""
+    print(f"{label:<14} razem: {sum(timings) * 1000:8.1f} ms | "
+          f"średnio: {statistics.mean(timings) * 1000:6.2f} ms | "
+          f"mediana: {statistics.median(timings) * 1000:6.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Porównanie klienta OpenAI per plik i współdzielonego klienta keep-alive.")
+    parser.add_argument("--files", type=int, default=100, help="Liczba plików (zapytań) w każdym przebiegu.")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Sztuczne opóźnienie odpowiedzi serwera-atrapy.")
+    args = parser.parse_args()
+
+    server, base_url = _start_stub_server(args.latency_ms / 1000)
+    # Klient OpenAI odczytuje adres API i klucz ze zmiennych środowiskowych.
+    os.environ["OPENAI_BASE_URL"] = base_url
+    os.environ.setdefault("API_KEY_WHISPER", "sk-benchmark")
+
+    from openai import OpenAI
+    from src import config
+    from src.services.whisper_service import WhisperService
+
+    # Mały plik udający przekonwertowane nagranie.
+    with tempfile.NamedTemporaryFile(suffix=".m4a", delete=False) as tmp:
+        tmp.write(os.urandom(32 * 1024))
+        audio_path = tmp.name
+
+    def transcribe_with_new_client(path):
+        # Dawne zachowanie: nowy klient i nowa pula połączeń dla każdego pliku.
+        client = OpenAI(api_key=os.environ["API_KEY_WHISPER"])
+        with open(path, "rb") as audio_file:
+            return client.audio.transcriptions.create(
+                model=config.WHISPER_API_MODEL,
+                file=audio_file,
+                language=config.WHISPER_API_LANGUAGE,
+                response_format=config.WHISPER_API_RESPONSE_FORMAT
+            )
+
+    shared_service = WhisperService()
+
+    try:
+        print(f"Serwer-atrapa: {base_url} | plików: {args.files} | opóźnienie: {args.latency_ms} ms\n")
+        per_file = _measure("per plik", transcribe_with_new_client, audio_path, args.files)
+        shared = _measure("współdzielony", shared_service.transcribe, audio_path, args.files)
+
+        _report("per plik", per_file)
+        _report("współdzielony", shared)
+        saved_ms = (statistics.mean(per_file) - statistics.mean(shared)) * 1000
+        print(f"\nOszczędność na zapytanie: {saved_ms:.2f} ms "
+              f"({saved_ms * args.files:.1f} ms na {args.files} plików)")
+    finally:
+        os.remove(audio_path)
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -6,7 +6,8 @@
 
 # Importujemy potrzebne moduły.
 import argparse  # Standardowa biblioteka Pythona do parsowania argumentów wiersza poleceń.
-from src import database  # Moduł do obsługi bazy danych.
+import atexit  # Wyświetlanie statystyk zapytań przy zakończeniu programu.
+from src import config, database  # Moduły konfiguracji i obsługi bazy danych.
 
 # Warunek `if __name__ == "__main__":` jest standardową i bardzo ważną konstrukcją w Pythonie.
 # Kod wewnątrz tego bloku wykona się tylko wtedy, gdy plik `main.py` jest uruchamiany
@@ -15,6 +16,9 @@ from src import database  # Moduł do obsługi bazy danych.
 if __name__ == "__main__":
     # Inicjalizujemy bazę danych na samym początku, niezależnie od trybu (CLI/GUI).
     database.initialize_database()
+    # Bazę utworzoną przez starszą wersję jednorazowo przebudowujemy teraz, zanim otworzy się okno GUI -
+    # w trakcie pracy przebudowa wstrzymałaby zapisy (np. zaznaczanie plików).
+    database.convert_to_incremental_vacuum()
 
     # Tworzymy parser argumentów. To on "uczy" nasz program, jakich flag oczekiwać.
     parser = argparse.ArgumentParser(description="Transkrypcja plików audio z użyciem API OpenAI Whisper.")
@@ -35,10 +39,71 @@ if __name__ == "__main__":
         type=str,  # Oczekujemy wartości tekstowej (ścieżki).
         help="Ścieżka do folderu zawierającego pliki audio do transkrypcji (tylko tryb CLI)."
     )
+    parser.add_argument(
+        "-w", "--workers",
+        type=int,  # Oczekujemy liczby całkowitej.
+        default=None,  # Brak wartości oznacza użycie `config.TRANSCRIPTION_MAX_WORKERS`.
+        help="Liczba plików wysyłanych jednocześnie do API Whisper (tylko tryb CLI)."
+    )
+    parser.add_argument(
+        "--conversion-workers",
+        type=int,
+        default=None,  # Brak wartości oznacza `config.CONVERSION_MAX_WORKERS` lub liczbę rdzeni procesora.
+        help="Liczba plików konwertowanych jednocześnie przez FFMPEG (tylko tryb CLI)."
+    )
+    parser.add_argument(
+        "--engine",
+        choices=["threads", "asyncio"],  # Dozwolone wartości - argparse sam zgłosi błąd dla innych.
+        default=None,  # Brak wartości oznacza użycie `config.TRANSCRIPTION_ENGINE`.
+        help="Silnik transkrypcji: pula wątków (threads) lub pętla asyncio (tylko tryb CLI)."
+    )
+
+    parser.add_argument(
+        "--pipeline",
+        action="store_true",
+        help="Tryb potokowy: każdy plik trafia do transkrypcji zaraz po konwersji (tylko tryb CLI, silnik threads)."
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        default=None,  # Brak flagi oznacza użycie `config.PIPELINE_STREAMING`.
+        help="W trybie potokowym konwertuj do pamięci i wysyłaj nagrania bez plików tymczasowych (tylko z --pipeline)."
+    )
+    parser.add_argument(
+        "--full-rescan",
+        action="store_true",
+        help="Sprawdź wszystkie pliki w --input-dir, także w folderach niezmienionych od poprzedniego skanu (tylko tryb CLI)."
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Obserwuj folder --input-dir i przetwarzaj nowe pliki na bieżąco, aż do Ctrl+C (tylko tryb CLI)."
+    )
+    parser.add_argument(
+        "--db-stats",
+        action="store_true",
+        help="Przy zakończeniu programu wyświetl statystyki zapytań do bazy danych (liczba, czasy p50/p99, wiersze)."
+    )
 
     # `parser.parse_args()` analizuje argumenty podane w wierszu poleceń i zwraca obiekt z wynikami.
     args = parser.parse_args()
 
+    # Wykluczamy kombinacje flag, które inaczej byłyby po cichu zignorowane.
+    # `parser.error` wypisuje komunikat razem ze składnią polecenia i kończy program (kod 2).
+    if args.pipeline and args.engine == "asyncio":
+        parser.error("--pipeline działa tylko z silnikiem threads (nie można go łączyć z --engine asyncio).")
+    if args.stream and not args.pipeline:
+        parser.error("--stream wymaga flagi --pipeline.")
+
+    # Statystyki zapytań do bazy danych wyświetlamy przy zakończeniu programu (również po Ctrl+C).
+    if args.db_stats or config.DATABASE_QUERY_STATS_ON_EXIT:
+        atexit.register(database.print_query_stats)
+
+    # Opcjonalnie nawiązujemy połączenie z API OpenAI w tle, zanim będzie potrzebne.
+    if config.OPENAI_WARMUP_ON_STARTUP:
+        from src.services.openai_client import warm_up_openai_client
+        warm_up_openai_client()
+
     # Sprawdzamy, czy użytkownik podał flagę `--gui`.
     if args.gui:
         # Jeśli tak, importujemy i uruchamiamy główną funkcję z modułu GUI.
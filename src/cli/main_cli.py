@@ -3,8 +3,8 @@
 import argparse  # Standardowa biblioteka Pythona do parsowania argumentów wiersza poleceń.
 import sys  # Moduł dający dostęp do funkcji systemowych, np. `sys.exit` do zamykania programu.
 import os  # Moduł do interakcji z systemem operacyjnym, np. sprawdzania ścieżek.
-from src.utils.audio import encode_audio_files  # Funkcje do obsługi plików audio.
-from src.services.transcription_service import TranscriptionService  # Główna klasa zarządzająca procesem transkrypcji.
+from src.utils.audio import encode_audio_files, chunk_long_audio_files  # Funkcje do obsługi plików audio.
+from src.services import create_transcription_service  # Tworzy serwis zarządzający procesem transkrypcji.
 from src import database  # Moduł do obsługi bazy danych.
 from src.metadata import process_and_update_all_metadata  # Moduł do obsługi metadanych.
 
@@ -37,10 +37,16 @@ def main_cli(args):
 
     print(f"Używam folderu źródłowego: {input_dir}")
 
+    if args.watch:
+        # Tryb ciągły: pliki z folderu (także te dodane później) są przetwarzane na bieżąco.
+        from src.cli.watch_cli import run_watch_mode
+        run_watch_mode(args, input_dir)
+        return
+
     # Używamy dedykowanej funkcji do wyszukania plików audio w podanym folderze i dodania ich do bazy.
     # Importujemy ją tutaj, wewnątrz funkcji, ponieważ jest używana tylko w trybie CLI.
     from src.utils.audio import get_audio_file_list_cli
-    get_audio_file_list_cli(input_dir)
+    get_audio_file_list_cli(input_dir, full_rescan=args.full_rescan)
 
     # === KROK 1.5: Przetwarzanie metadanych i walidacja ===
     # Wywołujemy funkcję, która oblicza metadane (start, stop, przerwy, etc.)
@@ -57,14 +63,39 @@ def main_cli(args):
     else:
         print("Wszystkie pliki gotowe do dalszego przetwarzania.")
 
+    run_processing_steps(args)
+    print("\n--- Proces transkrypcji zakończony pomyślnie! ---")
+
+def run_processing_steps(args):
+    """
+    Wykonuje kroki 2-3 (konwersję i transkrypcję) dla plików zaznaczonych w bazie danych.
+    Używana zarówno przy jednorazowym uruchomieniu, jak i w trybie obserwowania folderu (`--watch`).
+
+    Argumenty:
+        args: Obiekt zawierający sparsowane argumenty z wiersza poleceń.
+    """
+    if args.pipeline:
+        # === KROKI 2-3 w trybie potokowym ===
+        # Każdy plik trafia do transkrypcji zaraz po swojej konwersji, więc pierwsza
+        # transkrypcja jest gotowa po jednej konwersji, a nie po wszystkich.
+        from src.services.pipeline import TranscriptionPipeline
+        from src.services.transcription_service import TranscriptionService
+        TranscriptionPipeline(
+            TranscriptionService(max_workers=args.workers),
+            conversion_workers=args.conversion_workers,
+            stream=args.stream
+        ).run(allow_long=args.allow_long)
+        return
+
     # === KROK 2: Konwersja plików audio ===
     # Wywołujemy funkcję, która pobiera pliki z bazy i konwertuje je do formatu audio gotowego do transkrypcji.
-    encode_audio_files()
+    encode_audio_files(max_workers=args.conversion_workers)
+    # Długie nagrania dzielimy w miejscach ciszy na fragmenty transkrybowane równolegle.
+    chunk_long_audio_files()
 
     # === KROK 3: Transkrypcja plików ===
-    # Tworzymy instancję klasy `TranscriptionService`.
-    processor = TranscriptionService()
+    # Tworzymy serwis transkrypcji dla wybranego silnika (wątki lub asyncio)
+    # z liczbą równoległych zapytań podaną przez użytkownika.
+    processor = create_transcription_service(engine=args.engine, max_workers=args.workers)
     # Wywołujemy metodę, która pobiera przekonwertowane pliki i wysyła je do API Whisper.
     processor.process_transcriptions(allow_long=args.allow_long)
-
-    print("\n--- Proces transkrypcji zakończony pomyślnie! ---")
@@ -0,0 +1,79 @@
+# CLI watch mode - continuous processing of new files in the input directory
+
+from src import config, database  # Konfiguracja i moduł do obsługi bazy danych.
+from src.metadata import process_and_update_all_metadata  # Moduł do obsługi metadanych.
+from src.utils.folder_watcher import FolderWatcher  # Wykrywanie nowych plików w folderze.
+
+def _register_files(files):
+    """
+    Dodaje nowe pliki do bazy danych, a znanym plikom, które zmieniły się na dysku (np. nagranie
+    nadpisane pod tą samą nazwą), unieważnia wyniki przetwarzania, aby zostały przetworzone od nowa.
+    Pliki bez zapisanego czasu modyfikacji i rozmiaru (np. dodane przez starszą wersję) nie są unieważniane.
+
+    Argumenty:
+        files (list): Krotki (ścieżka, czas modyfikacji, rozmiar) z `FolderWatcher.wait_for_new_files`.
+
+    Zwraca:
+        tuple: (liczba nowych plików, liczba plików już obecnych w bazie, liczba unieważnionych plików).
+    """
+    signatures = database.get_source_signatures(path for path, _, _ in files)
+    modified = [
+        (path, mtime, size) for path, mtime, size in files
+        if path in signatures and None not in signatures[path] and signatures[path] != (mtime, size)
+    ]
+    with database.transaction():
+        added_count, known_count = database.add_files(files)
+        invalidated_count = database.invalidate_files(modified) if modified else 0
+    return added_count, known_count, invalidated_count
+
+def _has_unfinished_files():
+    """Sprawdza, czy w bazie są zaznaczone pliki bez transkrypcji (np. po nieudanej konwersji lub transkrypcji)."""
+    counts = database.get_file_status_counts(config.MAX_FILE_DURATION_SECONDS * 1000)
+    return counts['selected_unprocessed'] > 0
+
+def run_watch_mode(args, input_dir):
+    """
+    Tryb ciągły (`--watch`): obserwuje folder wejściowy i każdą partię nowych lub zmienionych plików
+    przeprowadza przez metadane, konwersję i transkrypcję, gdy tylko pliki zostaną w całości zapisane.
+    Pliki istniejące w chwili startu są przetwarzane jako pierwsza partia. Pliki, których przetwarzanie
+    się nie powiodło, są ponawiane z każdą partią, a bez nowych plików - co `WATCH_RETRY_INTERVAL_SECONDS`.
+    Działa do przerwania (Ctrl+C).
+
+    Argumenty:
+        args: Obiekt zawierający sparsowane argumenty z wiersza poleceń.
+        input_dir (str): Absolutna ścieżka do obserwowanego folderu.
+    """
+    # Import wewnątrz funkcji - `main_cli` importuje ten moduł dopiero po wybraniu trybu `--watch`.
+    from src.cli.main_cli import run_processing_steps
+
+    retry_interval = config.WATCH_RETRY_INTERVAL_SECONDS or None
+    with FolderWatcher(input_dir) as watcher:
+        print(f"Obserwuję folder (mechanizm: {watcher.backend_name}, stabilizacja pliku: {watcher.settle_seconds}s). "
+              "Naciśnij Ctrl+C, aby zakończyć.")
+        try:
+            while True:
+                # Gdy czekają pliki z nieudanym przetwarzaniem, budzimy się po `retry_interval`, aby je ponowić.
+                timeout = retry_interval if retry_interval and _has_unfinished_files() else None
+                new_files = watcher.wait_for_new_files(timeout=timeout)
+                if new_files:
+                    added_count, known_count, invalidated_count = _register_files(new_files)
+                    if not added_count and not invalidated_count:
+                        continue
+                    print(f"\n=== Nowe pliki: {added_count}, zmienione: {invalidated_count} "
+                          f"(już obecne w bazie: {known_count}) ===")
+
+                    # Pliki dłuższe niż limit nie przerywają pracy - zostają w bazie niezaznaczone.
+                    long_files = process_and_update_all_metadata(allow_long=args.allow_long)
+                    if long_files and not args.allow_long:
+                        print("OSTRZEŻENIE: Pominięto pliki przekraczające limit długości (użyj -l, aby je przetwarzać):")
+                        for f in long_files:
+                            print(f"  - {f}")
+                else:
+                    print("\n=== Ponawianie przetwarzania plików, które wcześniej się nie powiodło ===")
+
+                run_processing_steps(args)
+                # Konserwacja bazy w tle (tylko po przekroczeniu progów) - nie opóźnia obserwowania folderu.
+                database.schedule_database_maintenance()
+                print("\n--- Partia przetworzona. Czekam na kolejne pliki... ---")
+        except KeyboardInterrupt:
+            print("\nZakończono obserwowanie folderu.")
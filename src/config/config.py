@@ -32,10 +32,44 @@ DATABASE_FILE = os.path.join(TMP_DIR, DATABASE_FILENAME)
 # Flaga do włączania/wyłączania logowania (wyświetlania w konsoli) operacji na bazie danych.
 # Przydatne podczas debugowania.
 DATABASE_LOGGING = False
+# Jak długo (w milisekundach) połączenie czeka na zwolnienie blokady pliku bazy danych,
+# zanim zgłosi błąd "database is locked" (np. podczas punktu kontrolnego WAL).
+DATABASE_BUSY_TIMEOUT_MS = 5000
+
+
+# --- KONSERWACJA BAZY DANYCH ---
+# Po zakończeniu przetwarzania (i po resecie) konserwacja bazy jest zlecana w tle wątkowi zapisującemu.
+# Wolne strony (po usuniętych wierszach i transkrypcjach) są zwalniane, gdy stanowią co najmniej
+# `DATABASE_VACUUM_FREE_RATIO` pliku bazy i zajmują co najmniej `DATABASE_VACUUM_MIN_FREE_BYTES` bajtów.
+DATABASE_VACUUM_FREE_RATIO = 0.10
+DATABASE_VACUUM_MIN_FREE_BYTES = 4 * 1024 * 1024
+# Maksymalna liczba stron zwalnianych jednym krokiem `PRAGMA incremental_vacuum` - ogranicza czas,
+# przez który zapisy innych wątków czekają na wątek zapisujący. Reszta zostanie zwolniona przy kolejnej konserwacji.
+DATABASE_VACUUM_STEP_PAGES = 2048
+# Rozmiar pliku `-wal`, powyżej którego konserwacja przenosi jego zawartość do bazy i skraca go do zera.
+DATABASE_WAL_CHECKPOINT_BYTES = 32 * 1024 * 1024
+
+
+# --- STATYSTYKI ZAPYTAŃ DO BAZY DANYCH ---
+# Każde zapytanie SQL jest mierzone: dla każdego rodzaju zapytania zbierana jest liczba wykonań,
+# łączny czas, mediana (p50) i 99. percentyl (p99) czasu oraz liczba zwróconych wierszy.
+# Koszt to dwa odczyty zegara na zapytanie. Tabelę wyświetla flaga CLI `--db-stats`.
+DATABASE_QUERY_STATS = True
+# Wyświetlanie tabeli statystyk przy każdym zakończeniu programu (także bez flagi `--db-stats`).
+DATABASE_QUERY_STATS_ON_EXIT = False
+# Zapytania wolniejsze niż ten próg (w milisekundach) są "wolne" - dla pierwszego wolnego wykonania
+# każdego rodzaju zapytania zapisywany jest jego plan (`EXPLAIN QUERY PLAN`), jeśli poniższa flaga jest włączona.
+DATABASE_SLOW_QUERY_MS = 100
+DATABASE_EXPLAIN_SLOW_QUERIES = True
 
 
 # --- PARAMETRY TRANSKRYPCJI WHISPER ---
 # Ustawienia przekazywane bezpośrednio do API OpenAI Whisper.
+# `model`: "whisper-1" to główny i najdokładniejszy model transkrypcji.
+WHISPER_API_MODEL = "whisper-1"
+# `language`: Jawne określenie języka na "pl" (polski) znacząco poprawia dokładność transkrypcji
+# dla nagrań w tym języku, ponieważ model nie musi go sam wykrywać.
+WHISPER_API_LANGUAGE = "pl"
 # `response_format`: Określa format, w jakim chcemy otrzymać odpowiedź. "json" jest łatwy do przetwarzania.
 WHISPER_API_RESPONSE_FORMAT = "json"
 # `temperature`: Parametr kontrolujący "kreatywność" modelu. Wartość 0 oznacza najbardziej deterministyczne i powtarzalne wyniki.
@@ -44,6 +78,64 @@ WHISPER_API_TEMPERATURE = 0
 # np. podając specyficzne terminy lub imiona.
 WHISPER_API_PROMPT = ""
 
+# --- RÓWNOLEGŁA TRANSKRYPCJA ---
+# Maksymalna liczba plików wysyłanych jednocześnie do API Whisper.
+# Czas transkrypcji krótkich notatek to głównie oczekiwanie na odpowiedź serwera,
+# więc kilka równoległych zapytań wielokrotnie skraca czas przetwarzania całej paczki.
+# Wartość 1 oznacza przetwarzanie sekwencyjne (plik po pliku).
+TRANSCRIPTION_MAX_WORKERS = 4
+# Silnik transkrypcji:
+# - "threads": pula wątków, każdy wątek wysyła jedno zapytanie synchronicznym klientem OpenAI.
+# - "asyncio": jedna pętla zdarzeń i asynchroniczny klient `AsyncOpenAI`. Setki jednoczesnych
+#   zapytań kosztują wtedy tylko setki lekkich korutyn zamiast setek wątków systemowych.
+TRANSCRIPTION_ENGINE = "threads"
+
+# Tryb potokowy (flaga `--pipeline`): konwersja i transkrypcja nakładają się w czasie.
+# Liczba równoległych konwersji FFMPEG w potoku. None oznacza to samo co w zwykłej konwersji
+# (`CONVERSION_MAX_WORKERS`, domyślnie liczba rdzeni procesora).
+PIPELINE_CONVERSION_WORKERS = None
+# Maksymalna liczba plików w konwersji i czekających na transkrypcję. Gdy API nie nadąża,
+# konwersja czeka na wolne miejsce (backpressure), zamiast konwertować wszystko naraz.
+PIPELINE_QUEUE_SIZE = 8
+# Tryb strumieniowy potoku (flaga `--stream`): FFMPEG konwertuje do pamięci, a nagranie trafia
+# prosto do zapytania API bez zapisu i odczytu pliku tymczasowego. Przydatny na wolnych lub
+# sieciowych dyskach. Plik tymczasowy powstaje tylko po nieudanej transkrypcji lub pauzie.
+PIPELINE_STREAMING = False
+# Trwała pamięć podręczna transkrypcji. Kluczem jest skrót SHA-256 przekonwertowanego nagrania
+# oraz parametrów API (model, język, prompt, temperatura, format odpowiedzi), więc to samo
+# nagranie - również po resecie lub zaimportowaniu z innego folderu - nie jest wysyłane ponownie.
+TRANSCRIPTION_CACHE_ENABLED = True
+
+# --- POŁĄCZENIA Z API OPENAI ---
+# Wszystkie transkrypcje korzystają ze współdzielonego klienta OpenAI, którego połączenia HTTP
+# są utrzymywane przy życiu (keep-alive). Dzięki temu kolejne pliki nie płacą za nowy handshake TLS.
+# Maksymalna liczba jednoczesnych połączeń z API.
+OPENAI_MAX_CONNECTIONS = 100
+# Maksymalna liczba bezczynnych połączeń trzymanych w puli do ponownego użycia.
+OPENAI_MAX_KEEPALIVE_CONNECTIONS = 32
+# Po ilu sekundach bezczynności połączenie jest zamykane.
+OPENAI_KEEPALIVE_EXPIRY_SECONDS = 60
+# Czy przy starcie aplikacji nawiązać połączenie z API w tle ("rozgrzewka"),
+# aby pierwsza transkrypcja nie czekała na handshake TLS.
+OPENAI_WARMUP_ON_STARTUP = False
+
+# --- LIMITY ZAPYTAŃ DO API (RATE LIMITING) ---
+# Wszystkie wątki i korutyny transkrypcji dzielą jeden ogranicznik zapytań, dzięki czemu
+# równoległa transkrypcja może pracować tuż przy limitach konta bez masowych błędów 429.
+# Limit zapytań na minutę (0 oznacza brak limitu po stronie aplikacji).
+WHISPER_RATE_LIMIT_REQUESTS_PER_MINUTE = 500
+# Limit sekund nagrań wysyłanych na minutę (0 oznacza brak limitu po stronie aplikacji).
+WHISPER_RATE_LIMIT_AUDIO_SECONDS_PER_MINUTE = 0
+# Ile razy ponowić zapytanie po błędzie przejściowym (429, 5xx, problem z siecią).
+WHISPER_MAX_RETRIES = 5
+# Bazowe i maksymalne opóźnienie wykładniczego ponawiania (w sekundach).
+WHISPER_RETRY_BASE_DELAY_SECONDS = 1.0
+WHISPER_RETRY_MAX_DELAY_SECONDS = 60.0
+# Po odpowiedzi 429 dozwolona liczba zapytań w locie jest zmniejszana o połowę, ale nie poniżej
+# tego ułamka puli, a każde udane zapytanie odbudowuje ją o podany krok.
+WHISPER_MIN_CONCURRENCY_FACTOR = 0.1
+WHISPER_CONCURRENCY_RECOVERY_STEP = 0.05
+
 
 # --- USTAWIENIA KODOWANIA AUDIO ---
 # Lista rozszerzeń plików audio
@@ -63,6 +155,78 @@ ALL_SUPPORTED_EXTENSIONS = AUDIO_EXTENSIONS + VIDEO_EXTENSIONS
 # Te ustawienia są zoptymalizowane dla API OpenAI Whisper.
 FFMPEG_PARAMS = '-ac 1 -ar 16000 -af loudnorm=I=-12:TP=-1.0:LRA=7:dual_mono=true -c:a aac -b:a 32k'
 
+# Szybka ścieżka (passthrough): pliki, których ścieżka audio już spełnia profil transkrypcji,
+# są tylko przepakowywane (`-c:a copy`) zamiast dekodowane, normalizowane i kodowane od nowa.
+# Dotyczy to większości nagrań z telefonu (.m4a mono AAC) - konwersja trwa wtedy ułamek sekundy.
+# Uwaga: takie pliki nie przechodzą normalizacji głośności (`loudnorm`).
+PASSTHROUGH_ENABLED = True
+# Kodeki kopiowane bez zmian (kontener wyjściowy to .m4a).
+PASSTHROUGH_CODECS = ['aac']
+# Maksymalny bitrate kopiowanej ścieżki w bitach na sekundę - wyższy oznaczałby niepotrzebnie duże pliki do wysłania.
+PASSTHROUGH_MAX_BIT_RATE = 128000
+
+# --- DZIELENIE DŁUGICH NAGRAŃ NA FRAGMENTY ---
+# Długie nagrania (np. 90-minutowe spotkania) są po konwersji dzielone w miejscach ciszy
+# na fragmenty, które są transkrybowane równolegle, a tekst jest sklejany z powrotem w kolejności.
+# Dzięki temu czas transkrypcji zbliża się do czasu najdłuższego fragmentu,
+# a żaden wysyłany plik nie przekracza limitu rozmiaru API.
+CHUNKING_ENABLED = True
+# Maksymalna długość jednego fragmentu w sekundach. Dłuższe pliki są dzielone.
+CHUNK_MAX_DURATION_SECONDS = 300
+# Ile sekund przed maksymalną granicą fragmentu szukamy ciszy, w której można uciąć nagranie.
+# Jeśli w tym oknie nie ma ciszy, nagranie jest cięte dokładnie na granicy.
+CHUNK_SILENCE_SEARCH_WINDOW_SECONDS = 60
+# Parametry filtra FFMPEG `silencedetect`: próg głośności uznawanej za ciszę (w dB)
+# i minimalna długość ciszy w sekundach.
+SILENCE_THRESHOLD_DB = -35
+SILENCE_MIN_DURATION_SECONDS = 0.5
+# Folder na fragmenty długich nagrań.
+AUDIO_CHUNKS_TMP_DIR = os.path.join(AUDIO_TMP_DIR, 'chunks')
+
+# --- RÓWNOLEGŁA KONWERSJA ---
+# Liczba plików konwertowanych jednocześnie (każdy przez osobny proces FFMPEG).
+# None oznacza liczbę rdzeni procesora (`os.cpu_count()`).
+CONVERSION_MAX_WORKERS = None
+# Wyniki konwersji są zapisywane w bazie danych partiami: po tylu plikach
+# albo po tylu sekundach od poprzedniego zapisu - zależnie od tego, co nastąpi wcześniej.
+CONVERSION_DB_BATCH_SIZE = 10
+CONVERSION_FLUSH_INTERVAL_SECONDS = 1.0
+# Co ile sekund wyświetlać w terminalu postęp konwersji pojedynczego pliku (procent, prędkość, ETA).
+CONVERSION_PROGRESS_INTERVAL_SECONDS = 5.0
+
+# --- ANALIZA PLIKÓW (FFPROBE) ---
+# Liczba plików analizowanych jednocześnie przy wczytywaniu metadanych (każdy przez osobny proces `ffprobe`).
+# `ffprobe` czyta głównie nagłówki, więc proces częściej czeka na dysk niż na procesor.
+# None oznacza liczbę rdzeni procesora + 4 (maksymalnie 32).
+METADATA_PROBE_MAX_WORKERS = None
+# Odczyt długości i parametrów audio wprost z nagłówków plików WAV, MP3, MP4/M4A/MOV i WMA/WMV,
+# bez uruchamiania `ffprobe` (które jest używane tylko dla innych formatów i uszkodzonych nagłówków).
+MEDIA_HEADER_PARSING_ENABLED = True
+
+# --- MAGAZYN PRZEKONWERTOWANEGO AUDIO ---
+# Wyniki konwersji są przechowywane w osobnym folderze pod kluczem zbudowanym z odcisku pliku
+# źródłowego (rozmiar, czas modyfikacji, skrót treści) i parametrów konwersji (`FFMPEG_PARAMS`).
+# Folder nie jest czyszczony przy resecie aplikacji, więc ponowny import tych samych plików
+# nie uruchamia FFMPEG. Zmiana `FFMPEG_PARAMS` automatycznie unieważnia stare wpisy.
+AUDIO_CACHE_ENABLED = True
+AUDIO_CACHE_DIR = os.path.join(TMP_DIR, 'audio_cache')
+# Maksymalny rozmiar magazynu w bajtach - po przekroczeniu usuwane są najdawniej używane pliki.
+AUDIO_CACHE_MAX_BYTES = 2 * 1024 * 1024 * 1024
+
+# --- OBSERWOWANIE FOLDERU (TRYB --watch) ---
+# Mechanizm wykrywania nowych plików: "inotify" (powiadomienia jądra, tylko Linux),
+# "polling" (okresowe skanowanie folderu) lub "auto" (inotify, jeśli jest dostępne).
+# Na udziałach sieciowych (SMB/NFS) inotify nie widzi zmian z innych komputerów - użyj "polling".
+WATCH_BACKEND = "auto"
+# Plik trafia do przetwarzania dopiero wtedy, gdy jego rozmiar i czas modyfikacji nie zmieniły się
+# przez tyle sekund - chroni to przed wczytaniem nagrania, które jest jeszcze kopiowane.
+WATCH_SETTLE_SECONDS = 3.0
+# Co ile sekund skanować folder w trybie "polling".
+WATCH_POLL_INTERVAL_SECONDS = 5.0
+# Co ile sekund ponawiać przetwarzanie zaznaczonych plików bez transkrypcji (np. po przejściowym błędzie API),
+# gdy w folderze nie pojawiają się nowe pliki. None lub 0 wyłącza ponawianie.
+WATCH_RETRY_INTERVAL_SECONDS = 300.0
+
 # --- USTAWIENIA INTERFEJSU GRAFICZNEGO (GUI) ---
 # Maksymalna dopuszczalna długość pliku w sekundach.
 # Pliki dłuższe niż ta wartość zostaną specjalnie oznaczone w interfejsie.
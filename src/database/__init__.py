@@ -1,31 +1,64 @@
 # Database module - contains database operations and management
 
 # Import all functions to maintain backward compatibility
-from .connection import get_db_connection
+from .connection import get_db_connection, transaction, close_db_connections, get_data_revision, get_changes_since
 from .schema import initialize_database, ensure_files_table_exists, reset_files_table, clear_database_and_tmp_folder
-from .operations import add_file, update_file_transcription, set_file_selected, delete_file, cache_file_duration, optimize_database, validate_file_access
-from .queries import get_files_to_load, get_files_to_process, set_files_as_loaded, get_all_files, get_files_needing_metadata, update_all_metadata_bulk, get_file_metadata, get_cached_duration
+from .operations import add_file, add_files, update_file_transcription, set_file_selected, set_files_selected, delete_file, validate_file_access, add_file_chunks, update_chunk_transcription, delete_file_chunks, save_cached_transcription, save_media_info, save_media_info_bulk, save_scan_manifest, invalidate_files, remove_deleted_files
+from .maintenance import convert_to_incremental_vacuum, run_database_maintenance, schedule_database_maintenance
+from .query_stats import get_query_stats, reset_query_stats, format_query_stats, print_query_stats
+from .queries import get_files_to_load, get_files_to_process, set_files_as_loaded, set_files_as_unloaded, get_all_files, get_file_list_rows, get_file_status_counts, get_transcriptions, get_files_needing_metadata, update_all_metadata_bulk, get_file_metadata, get_files_to_chunk, get_file_chunks, get_cached_transcription, get_media_info, get_media_info_bulk, get_source_signatures, get_scan_manifest, get_manifest_files_missing_from_db
 
 # Re-export for backward compatibility
 __all__ = [
     'get_db_connection',
+    'transaction',
+    'close_db_connections',
+    'get_data_revision',
+    'get_changes_since',
     'initialize_database',
     'ensure_files_table_exists',
     'reset_files_table',
     'clear_database_and_tmp_folder',
     'add_file',
+    'add_files',
     'update_file_transcription',
     'set_file_selected',
+    'set_files_selected',
     'delete_file',
-    'cache_file_duration',
-    'optimize_database',
+    'convert_to_incremental_vacuum',
+    'run_database_maintenance',
+    'schedule_database_maintenance',
+    'get_query_stats',
+    'reset_query_stats',
+    'format_query_stats',
+    'print_query_stats',
     'validate_file_access',
     'get_files_to_load',
     'get_files_to_process',
     'set_files_as_loaded',
+    'set_files_as_unloaded',
     'get_all_files',
+    'get_file_list_rows',
+    'get_file_status_counts',
+    'get_transcriptions',
     'get_files_needing_metadata',
     'update_all_metadata_bulk',
     'get_file_metadata',
-    'get_cached_duration'
+    'add_file_chunks',
+    'update_chunk_transcription',
+    'delete_file_chunks',
+    'get_files_to_chunk',
+    'get_file_chunks',
+    'save_cached_transcription',
+    'get_cached_transcription',
+    'save_media_info',
+    'get_media_info',
+    'save_media_info_bulk',
+    'get_media_info_bulk',
+    'get_source_signatures',
+    'save_scan_manifest',
+    'invalidate_files',
+    'remove_deleted_files',
+    'get_scan_manifest',
+    'get_manifest_files_missing_from_db'
 ]
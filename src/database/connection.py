@@ -3,13 +3,36 @@
 import sqlite3  # Standardowa biblioteka Pythona do obsługi baz danych SQLite.
 import os  # Biblioteka do interakcji z systemem operacyjnym, np. operacje na plikach i folderach.
 import functools  # Używane do tworzenia dekoratorów, które "owijają" inne funkcje.
-import time  # Dodane dla optymalizacji wydajności
+import threading  # Wątek zapisujący i połączenia każdego wątku.
+import queue  # Kolejka zleceń dla wątku zapisującego.
+import contextlib  # Tworzenie menedżera kontekstu `transaction()`.
+import pathlib  # Budowanie adresu URI pliku bazy danych dla połączeń tylko do odczytu.
+import collections  # Dziennik ostatnich zmian danych.
+from concurrent.futures import Future  # Wynik zlecenia wykonanego przez wątek zapisujący.
 from datetime import datetime
 from src import config  # Importujemy nasz plik konfiguracyjny.
+from .query_stats import InstrumentedConnection  # Połączenie mierzące czas zapytań.
 
-# Singleton dla połączenia z bazą danych
-_db_connection = None
-_db_connection_lock = time.thread_time_ns()  # Prosty lock dla bezpieczeństwa wątkowego
+# Model współbieżności:
+# - wszystkie zapisy wykonuje jeden wątek zapisujący (`_DatabaseWriter`) na własnym połączeniu -
+#   funkcje oznaczone `@write_operation` są mu zlecane przez kolejkę, a wywołujący czeka na wynik,
+# - każdy inny wątek czyta przez własne połączenie tylko do odczytu; dzięki trybowi WAL odczyty
+#   nie czekają na zapisy i nie współdzielą kursorów z innymi wątkami.
+_writer = None
+_writer_lock = threading.Lock()
+# Połączenie do odczytu bieżącego wątku, połączenie do zapisu (wątek zapisujący albo wątek
+# z otwartą transakcją) oraz głębokość zagnieżdżenia `transaction()`.
+_thread_state = threading.local()
+# Zwiększane przez `close_db_connections()` - połączenia do odczytu z wcześniejszej "generacji" są otwierane na nowo.
+_connection_generation = 0
+
+# Rewizja danych: zwiększana po każdym zatwierdzonym zapisie. Dziennik zmian przechowuje dla ostatnich
+# rewizji zbiór ścieżek zmienionych wierszy tabeli `files` (None - zmiana, której nie da się tak opisać,
+# np. reset tabeli albo zapis innego procesu), dzięki czemu widoki mogą pobrać ponownie tylko te wiersze.
+_CHANGE_LOG_SIZE = 1000
+_changes_lock = threading.Lock()
+_data_revision = 0
+_change_log = collections.deque(maxlen=_CHANGE_LOG_SIZE)
 
 def _format_row(row):
     """Formatuje obiekt sqlite3.Row do czytelnego ciągu znaków, np. 'id: 1, name: test'."""
@@ -82,28 +105,354 @@ def _execute_query(cursor, query, params=None, fetch=None):
     if fetch == 'all':
         return cursor.fetchall()
 
+def _in_transaction():
+    """Sprawdza, czy bieżący wątek ma otwartą transakcję (`transaction()`)."""
+    return getattr(_thread_state, 'depth', 0) > 0
+
+def _write_connection():
+    """Zwraca połączenie do zapisu, jeśli bieżący wątek może z niego korzystać (w przeciwnym razie None)."""
+    return getattr(_thread_state, 'write_connection', None)
+
+class _ConnectionHandle:
+    """
+    Opakowanie połączenia zwracane przez `get_db_connection`. Zachowuje się jak `sqlite3.Connection`,
+    ale `commit()` i zatwierdzenie na końcu bloku `with` są pomijane, gdy wątek ma otwartą
+    transakcję - zapis dołącza wtedy do niej i zostanie zatwierdzony razem z nią.
+    """
+
+    def __init__(self, connection):
+        self._connection = connection
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        # Tak jak `with sqlite3.Connection`: zatwierdzenie po sukcesie, wycofanie po wyjątku.
+        if not _in_transaction():
+            if exc_type is None:
+                self._connection.commit()
+            else:
+                self._connection.rollback()
+        return False
+
+    def commit(self):
+        if not _in_transaction():
+            self._connection.commit()
+
+class _DatabaseWriter(threading.Thread):
+    """Wątek, który jako jedyny zapisuje do bazy danych. Wykonuje zlecenia z kolejki po kolei."""
+
+    def __init__(self):
+        super().__init__(name="database-writer", daemon=True)
+        self._requests = queue.Queue()
+        self._ready = Future()
+
+    def run(self):
+        try:
+            connection = _open_connection()
+        except BaseException as e:
+            self._ready.set_exception(e)
+            return
+        _thread_state.write_connection = connection
+        self._ready.set_result(connection)
+
+        while True:
+            request = self._requests.get()
+            if request is None:
+                break
+            future, function, args, kwargs = request
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(_run_write(function, args, kwargs))
+            except BaseException as e:
+                future.set_exception(e)
+        connection.close()
+
+    @property
+    def connection(self):
+        """Połączenie do zapisu (czeka, aż wątek je otworzy)."""
+        return self._ready.result()
+
+    def submit(self, function, *args, **kwargs):
+        """Zleca wykonanie funkcji w wątku zapisującym i zwraca `Future` z jej wynikiem."""
+        future = Future()
+        self._requests.put((future, function, args, kwargs))
+        return future
+
+    def stop(self):
+        """Wykonuje zlecenia oczekujące w kolejce, zamyka połączenie i kończy wątek."""
+        self._requests.put(None)
+        self.join()
+
+def _run_write(function, args, kwargs):
+    """
+    Wykonuje zapis w wątku zapisującym, publikuje zmiany, które zapis zgłosił (`_record_file_changes`),
+    i wykonuje akcje odłożone do zatwierdzenia (`_run_after_commit`).
+    """
+    _thread_state.pending_changes = set()
+    _thread_state.after_commit = []
+    try:
+        result = function(*args, **kwargs)
+    except BaseException:
+        # Część zapisów mogła zostać zatwierdzona przed błędem - na wszelki wypadek zgłaszamy zmianę wszystkiego.
+        if _thread_state.pending_changes != set():
+            _publish_changes(None)
+        _thread_state.after_commit = None
+        raise
+    _publish_changes(_thread_state.pending_changes)
+    _run_after_commit_actions()
+    return result
+
+def _get_writer():
+    """Zwraca działający wątek zapisujący, uruchamiając go przy pierwszym użyciu."""
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = _DatabaseWriter()
+            _writer.start()
+        writer = _writer
+    # Czekamy na otwarcie połączenia - to ono tworzy plik bazy, z którego korzystają połączenia do odczytu.
+    writer.connection
+    return writer
+
+def write_operation(func):
+    """
+    Dekorator funkcji zapisujących do bazy danych: wykonuje je w wątku zapisującym i czeka na wynik.
+    W wątku zapisującym i wewnątrz `transaction()` funkcja jest wywoływana bezpośrednio.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if _write_connection() is not None:
+            return func(*args, **kwargs)
+        return _get_writer().submit(func, *args, **kwargs).result()
+    return wrapper
+
+@contextlib.contextmanager
+def transaction():
+    """
+    Grupuje zapisy do bazy danych w jedną transakcję (jeden zapis na dysk zamiast jednego na funkcję).
+
+    Wątek zapisujący oddaje na czas bloku swoje połączenie bieżącemu wątkowi (zapisy innych wątków
+    czekają w kolejce), więc funkcje modułu `database` wywołane wewnątrz bloku działają bezpośrednio
+    na nim i widzą własne, jeszcze niezatwierdzone zmiany. Zagnieżdżone bloki dołączają do transakcji.
+    Transakcja jest zatwierdzana na końcu najbardziej zewnętrznego bloku, a wyjątek, który go opuści,
+    wycofuje wszystkie zapisy.
+
+    Przykład:
+        with database.transaction():
+            for path in paths:
+                database.set_file_selected(path, False)
+    """
+    depth = getattr(_thread_state, 'depth', 0)
+    if depth > 0:
+        _thread_state.depth = depth + 1
+        try:
+            yield get_db_connection()
+        finally:
+            _thread_state.depth = depth
+        return
+
+    with contextlib.ExitStack() as stack:
+        # W wątku zapisującym zmiany publikuje `_run_write` - transakcja zbiera je tylko we własnym wątku.
+        leased = _write_connection() is None
+        connection = stack.enter_context(_lease_write_connection()) if leased else _write_connection()
+        if leased:
+            _thread_state.pending_changes = set()
+            _thread_state.after_commit = []
+        if not connection.in_transaction:
+            connection.execute("BEGIN")
+        _thread_state.depth = 1
+        try:
+            yield _ConnectionHandle(connection)
+        except BaseException:
+            _thread_state.depth = 0
+            connection.rollback()
+            if leased:
+                _thread_state.after_commit = None
+            raise
+        _thread_state.depth = 0
+        connection.commit()
+        if leased:
+            _publish_changes(_thread_state.pending_changes)
+            _run_after_commit_actions()
+
+@contextlib.contextmanager
+def _lease_write_connection():
+    """Wstrzymuje wątek zapisujący i na czas bloku udostępnia jego połączenie bieżącemu wątkowi."""
+    writer = _get_writer()
+    granted = threading.Event()
+    released = threading.Event()
+
+    def lend():
+        granted.set()
+        released.wait()
+
+    lease = writer.submit(lend)
+    granted.wait()
+    _thread_state.write_connection = writer.connection
+    try:
+        yield writer.connection
+    finally:
+        _thread_state.write_connection = None
+        released.set()
+        lease.result()
+
+def _record_file_changes(file_paths):
+    """
+    Zgłasza ścieżki wierszy tabeli `files` zmienionych przez bieżący zapis. Zostaną opublikowane
+    w dzienniku zmian po jego zatwierdzeniu. None oznacza zmianę całej tabeli.
+    """
+    pending = getattr(_thread_state, 'pending_changes', None)
+    if file_paths is None:
+        _thread_state.pending_changes = None
+    elif pending is not None:
+        pending.update(file_paths)
+
+def _run_after_commit(action):
+    """
+    Odkłada akcję (np. usunięcie plików tymczasowych z dysku) do zatwierdzenia bieżącego zapisu -
+    wewnątrz `transaction()` do zatwierdzenia całej transakcji. Po wycofaniu zapisu akcja nie jest wykonywana,
+    więc wiersze w bazie nigdy nie wskazują na usunięte już pliki.
+    """
+    actions = getattr(_thread_state, 'after_commit', None)
+    if actions is None:
+        action()
+    else:
+        actions.append(action)
+
+def _run_after_commit_actions():
+    """Wykonuje akcje odłożone przez `_run_after_commit` po zatwierdzeniu zapisu."""
+    actions, _thread_state.after_commit = _thread_state.after_commit, None
+    for action in actions or ():
+        action()
+
+def _publish_changes(file_paths):
+    """Zwiększa rewizję danych i zapisuje w dzienniku zbiór zmienionych ścieżek (None - zmiana wszystkiego)."""
+    global _data_revision
+    with _changes_lock:
+        _data_revision += 1
+        _change_log.append((_data_revision, None if file_paths is None else frozenset(file_paths)))
+
+def _detect_external_changes():
+    """
+    Sprawdza `PRAGMA data_version` połączenia bieżącego wątku - wartość zmienia się, gdy bazę zmieni
+    inne połączenie. Jeśli zmiana nie pochodzi z zapisów tego procesu (rewizja stoi w miejscu),
+    bazę zmienił inny proces (np. CLI uruchomione równolegle z GUI) i zgłaszamy zmianę wszystkiego.
+    Zapis tego procesu zatwierdzony, ale jeszcze nieopublikowany, też zostanie tak uznany - to tylko
+    nadmiarowe pełne odświeżenie, a nie przeoczona zmiana.
+    """
+    connection = get_db_connection()._connection
+    data_version = connection.execute("PRAGMA data_version").fetchone()[0]
+    previous = getattr(_thread_state, 'data_version', None)
+    if previous is not None and previous[0] is connection and previous[1] != data_version and previous[2] == _data_revision:
+        _publish_changes(None)
+    _thread_state.data_version = (connection, data_version, _data_revision)
+
+def get_data_revision():
+    """Zwraca bieżącą rewizję danych (liczba zwiększana po każdym zatwierdzonym zapisie do bazy)."""
+    return _data_revision
+
+def get_changes_since(revision):
+    """
+    Zwraca zmiany danych od podanej rewizji.
+
+    Argumenty:
+        revision (int | None): Rewizja, którą odzwierciedlają dane wywołującego (None - brak danych).
+
+    Zwraca:
+        tuple: (bieżąca rewizja, zbiór ścieżek zmienionych wierszy tabeli `files`). Zamiast zbioru zwraca None,
+               jeśli trzeba pobrać wszystko od nowa (brak danych, zmiana całej tabeli albo rewizja starsza
+               niż dziennik zmian). Pusty zbiór oznacza, że tabela `files` się nie zmieniła.
+    """
+    _detect_external_changes()
+    with _changes_lock:
+        current = _data_revision
+        if revision is None or revision > current:
+            return current, None
+        if revision == current:
+            return current, frozenset()
+        if not _change_log or _change_log[0][0] > revision + 1:
+            return current, None
+        changed = set()
+        for entry_revision, file_paths in _change_log:
+            if entry_revision <= revision:
+                continue
+            if file_paths is None:
+                return current, None
+            changed.update(file_paths)
+        return current, frozenset(changed)
+
 @log_db_operation
 def get_db_connection():
-    """Nawiązuje połączenie z bazą danych i zwraca obiekt połączenia (singleton z optymalizacjami)."""
-    global _db_connection
+    """
+    Zwraca połączenie z bazą danych dla bieżącego wątku: połączenie do zapisu w wątku zapisującym
+    i wewnątrz `transaction()`, a w pozostałych przypadkach własne połączenie wątku tylko do odczytu.
+    """
+    connection = _write_connection()
+    if connection is None:
+        connection = _read_connection()
+    return _ConnectionHandle(connection)
 
-    if _db_connection is None:
-        # Upewniamy się, że folder, w którym ma być baza danych, istnieje.
-        os.makedirs(os.path.dirname(config.DATABASE_FILE), exist_ok=True)
+def _read_connection():
+    """Zwraca połączenie tylko do odczytu bieżącego wątku, otwierając je przy pierwszym użyciu."""
+    connection = getattr(_thread_state, 'read_connection', None)
+    if connection is not None and _thread_state.read_generation == _connection_generation:
+        return connection
+    if connection is not None:
+        connection.close()
+    _get_writer()
+    _thread_state.read_connection = _open_connection(read_only=True)
+    _thread_state.read_generation = _connection_generation
+    return _thread_state.read_connection
 
-        # Łączymy się z plikiem bazy danych zdefiniowanym w konfiguracji.
-        _db_connection = sqlite3.connect(config.DATABASE_FILE, check_same_thread=False)
+def close_db_connections():
+    """
+    Zamyka połączenie do zapisu i połączenie do odczytu bieżącego wątku (np. przed usunięciem pliku bazy).
+    Połączenia do odczytu innych wątków są zamykane i otwierane na nowo przy ich następnym użyciu.
+    """
+    global _writer, _connection_generation
+    with _writer_lock:
+        writer, _writer = _writer, None
+        _connection_generation += 1
+    if writer is not None:
+        writer.stop()
+    connection = getattr(_thread_state, 'read_connection', None)
+    if connection is not None:
+        connection.close()
+        _thread_state.read_connection = None
 
-        # `row_factory = sqlite3.Row` sprawia, że wyniki zapytań będą dostępne jak słowniki (po nazwach kolumn),
-        # co jest znacznie czytelniejsze niż dostęp po indeksach.
-        _db_connection.row_factory = sqlite3.Row
+def _open_connection(read_only=False):
+    """Otwiera połączenie z plikiem bazy danych i ustawia parametry SQLite."""
+    # Przy włączonych statystykach wszystkie zapytania połączenia są mierzone (`query_stats.py`).
+    factory = InstrumentedConnection if config.DATABASE_QUERY_STATS else sqlite3.Connection
+    if read_only:
+        # `mode=ro` - próba zapisu przez to połączenie kończy się błędem zamiast cichej rywalizacji o blokadę.
+        uri = f"{pathlib.Path(config.DATABASE_FILE).absolute().as_uri()}?mode=ro"
+        connection = sqlite3.connect(uri, uri=True, isolation_level=None, factory=factory)
+    else:
+        # Upewniamy się, że folder, w którym ma być baza danych, istnieje.
+        os.makedirs(os.path.dirname(config.DATABASE_FILE), exist_ok=True)
+        # `check_same_thread=False`, bo na czas `transaction()` połączenie przejmuje inny wątek.
+        connection = sqlite3.connect(config.DATABASE_FILE, check_same_thread=False, factory=factory)
 
-        # Optymalizacje SQLite dla lepszej wydajności
-        _db_connection.execute("PRAGMA synchronous = NORMAL")  # Zbalansowana synchronizacja
-        _db_connection.execute("PRAGMA cache_size = -1000000")  # 1GB cache (ujemna wartość = KB)
-        _db_connection.execute("PRAGMA temp_store = memory")   # Przechowuj temp tabele w pamięci
-        _db_connection.execute("PRAGMA mmap_size = 268435456") # 256MB memory-mapped I/O
-        _db_connection.execute("PRAGMA journal_mode = WAL")    # Write-Ahead Logging dla lepszej współbieżności
-        _db_connection.execute("PRAGMA wal_autocheckpoint = 1000")  # Auto-checkpoint co 1000 stron
+    # `row_factory = sqlite3.Row` sprawia, że wyniki zapytań będą dostępne jak słowniki (po nazwach kolumn),
+    # co jest znacznie czytelniejsze niż dostęp po indeksach.
+    connection.row_factory = sqlite3.Row
 
-    return _db_connection
+    # Optymalizacje SQLite dla lepszej wydajności
+    connection.execute(f"PRAGMA busy_timeout = {int(config.DATABASE_BUSY_TIMEOUT_MS)}")  # Czekaj na blokadę zamiast od razu zgłaszać błąd
+    connection.execute("PRAGMA cache_size = -1000000")  # 1GB cache (ujemna wartość = KB)
+    connection.execute("PRAGMA temp_store = memory")   # Przechowuj temp tabele w pamięci
+    connection.execute("PRAGMA mmap_size = 268435456") # 256MB memory-mapped I/O
+    if not read_only:
+        # Nowe bazy zwalniają wolne strony przyrostowo (`maintenance.py`); w istniejących ustawienie
+        # zacznie działać po pierwszym pełnym VACUUM.
+        connection.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        connection.execute("PRAGMA synchronous = NORMAL")  # Zbalansowana synchronizacja
+        connection.execute("PRAGMA journal_mode = WAL")    # Write-Ahead Logging dla lepszej współbieżności
+        connection.execute("PRAGMA wal_autocheckpoint = 1000")  # Auto-checkpoint co 1000 stron
+    return connection
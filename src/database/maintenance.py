@@ -0,0 +1,115 @@
+# Database maintenance module - background space reclamation, statistics and WAL checkpoints
+
+import os
+from src import config
+from .connection import get_db_connection, log_db_operation, write_operation, _get_writer
+
+# Wartość `PRAGMA auto_vacuum` dla trybu przyrostowego (0 - brak, 1 - pełny, 2 - przyrostowy).
+_AUTO_VACUUM_INCREMENTAL = 2
+
+def _wal_size():
+    """Zwraca rozmiar pliku `-wal` bazy danych w bajtach (0, jeśli go nie ma)."""
+    try:
+        return os.path.getsize(config.DATABASE_FILE + "-wal")
+    except OSError:
+        return 0
+
+def _free_space_exceeds_threshold(page_size, page_count, freelist_count):
+    """Sprawdza, czy wolne strony przekraczają progi `DATABASE_VACUUM_FREE_RATIO` i `DATABASE_VACUUM_MIN_FREE_BYTES`."""
+    return (
+        page_count > 0
+        and freelist_count / page_count >= config.DATABASE_VACUUM_FREE_RATIO
+        and freelist_count * page_size >= config.DATABASE_VACUUM_MIN_FREE_BYTES
+    )
+
+@log_db_operation
+@write_operation
+def convert_to_incremental_vacuum():
+    """
+    Jednorazowo przebudowuje pełnym VACUUM bazę utworzoną bez przyrostowego zwalniania miejsca
+    (tryb ustawiony w `_open_connection` zaczyna w niej działać dopiero po przebudowie).
+    Wywoływana przy starcie programu, zanim otworzy się okno GUI - przebudowa dużej bazy trwa
+    i blokuje wszystkie zapisy. W bazie już przyrostowej nic nie robi.
+
+    Zwraca:
+        bool: True, jeśli baza została przebudowana.
+    """
+    with get_db_connection() as conn:
+        if conn.execute("PRAGMA auto_vacuum").fetchone()[0] == _AUTO_VACUUM_INCREMENTAL:
+            return False
+        print("Konserwacja bazy danych: jednorazowa przebudowa bazy (włączenie przyrostowego zwalniania miejsca)...")
+        conn.execute("VACUUM")
+    return True
+
+@log_db_operation
+@write_operation
+def run_database_maintenance(force=False):
+    """
+    Wykonuje konserwację bazy danych w wątku zapisującym - tylko te kroki, których progi zostały przekroczone
+    (albo wszystkie, jeśli `force=True`):
+    - zwalnia wolne strony ograniczonym krokiem `PRAGMA incremental_vacuum` (`DATABASE_VACUUM_STEP_PAGES`);
+      w bazie jeszcze nieprzebudowanej (`convert_to_incremental_vacuum`) ten krok jest pomijany - pełny VACUUM
+      nie jest uruchamiany w trakcie pracy, bo na czas przebudowy wstrzymałby zapisy GUI,
+    - przenosi zawartość dużego pliku `-wal` do bazy i skraca go (`PRAGMA wal_checkpoint(TRUNCATE)`),
+    - odświeża statystyki planisty zapytań (`PRAGMA optimize` - ANALYZE tylko tam, gdzie jest potrzebny).
+
+    Zwraca:
+        dict: 'vacuum' ('incremental', 'skipped' - baza czeka na przebudowę przy starcie - lub None),
+              'reclaimed_bytes', 'free_bytes_left',
+              'wal_bytes_before', 'wal_bytes_after' oraz 'checkpoint_busy' (True, jeśli odczyty
+              innych wątków nie pozwoliły przenieść całego pliku `-wal`).
+    """
+    report = {'vacuum': None, 'reclaimed_bytes': 0, 'free_bytes_left': 0,
+              'wal_bytes_before': _wal_size(), 'wal_bytes_after': None, 'checkpoint_busy': False}
+    with get_db_connection() as conn:
+        page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+        page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+        freelist_count = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        auto_vacuum = conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+
+        report['free_bytes_left'] = freelist_count * page_size
+        if freelist_count and (force or _free_space_exceeds_threshold(page_size, page_count, freelist_count)):
+            if auto_vacuum != _AUTO_VACUUM_INCREMENTAL:
+                report['vacuum'] = 'skipped'
+            else:
+                # `executescript`, bo zwykłe `execute` wykonuje tylko pierwszy krok polecenia (jedną stronę).
+                conn.executescript(f"PRAGMA incremental_vacuum({int(config.DATABASE_VACUUM_STEP_PAGES)});")
+                report['vacuum'] = 'incremental'
+                report['reclaimed_bytes'] = max(0, page_count - conn.execute("PRAGMA page_count").fetchone()[0]) * page_size
+                report['free_bytes_left'] = conn.execute("PRAGMA freelist_count").fetchone()[0] * page_size
+
+        if force or report['wal_bytes_before'] >= config.DATABASE_WAL_CHECKPOINT_BYTES:
+            busy, _, _ = conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchone()
+            report['checkpoint_busy'] = bool(busy)
+            report['wal_bytes_after'] = _wal_size()
+
+        conn.execute("PRAGMA optimize")
+
+    if report['vacuum'] or report['wal_bytes_after'] is not None:
+        _print_report(report)
+    return report
+
+def _print_report(report):
+    """Wyświetla podsumowanie konserwacji bazy danych."""
+    megabyte = 1024 * 1024
+    parts = []
+    if report['vacuum'] == 'skipped':
+        parts.append(f"wolne {report['free_bytes_left'] / megabyte:.1f} MB zostanie odzyskane po przebudowie bazy "
+                     "przy następnym uruchomieniu programu")
+    elif report['vacuum']:
+        parts.append(f"odzyskano {report['reclaimed_bytes'] / megabyte:.1f} MB (przyrostowo), "
+                     f"wolne pozostało {report['free_bytes_left'] / megabyte:.1f} MB")
+    if report['wal_bytes_after'] is not None:
+        parts.append(f"plik WAL {report['wal_bytes_before'] / megabyte:.1f} MB -> {report['wal_bytes_after'] / megabyte:.1f} MB"
+                     + (" (część stron zajęta przez odczyty)" if report['checkpoint_busy'] else ""))
+    print(f"Konserwacja bazy danych: {'; '.join(parts)}.")
+
+def schedule_database_maintenance():
+    """
+    Zleca `run_database_maintenance` wątkowi zapisującemu i wraca od razu - konserwacja nie blokuje
+    wywołującego (np. głównego wątku GUI). Zapisy innych wątków poczekają na nią w kolejce.
+
+    Zwraca:
+        concurrent.futures.Future: Raport konserwacji (wynik `run_database_maintenance`).
+    """
+    return _get_writer().submit(run_database_maintenance)
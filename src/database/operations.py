@@ -2,9 +2,11 @@
 
 import sqlite3
 import os
-from .connection import get_db_connection, _execute_query, log_db_operation
+from .connection import get_db_connection, _execute_query, log_db_operation, write_operation, _record_file_changes, _run_after_commit
+from .queries import _MAX_QUERY_PARAMS
 
 @log_db_operation
+@write_operation
 def add_file(file_path):
     """
     Dodaje nowy plik do bazy danych, jeśli jeszcze nie istnieje.
@@ -20,6 +22,7 @@ def add_file(file_path):
                 "INSERT INTO files (source_file_path) VALUES (?)",
                 (file_path,)
             )
+            _record_file_changes([file_path])
             conn.commit()
     except sqlite3.IntegrityError:
         # Jeśli plik już istnieje (dzięki ograniczeniu UNIQUE na kolumnie `source_file_path`),
@@ -30,6 +33,35 @@ def add_file(file_path):
         print(f"Błąd podczas dodawania pliku {file_path} do bazy: {e}")
 
 @log_db_operation
+@write_operation
+def add_files(files, batch_size=1000):
+    """
+    Dodaje wiele plików do bazy danych w jednej transakcji. Pliki, które już są w bazie, są pomijane
+    (`INSERT OR IGNORE`), więc nie trzeba przechwytywać `IntegrityError` dla każdego z nich.
+
+    Argumenty:
+        files (iterable): Krotki (ścieżka, czas modyfikacji, rozmiar w bajtach); dwie ostatnie wartości mogą być None.
+        batch_size (int): Liczba wierszy wstawianych jednym wywołaniem `executemany`.
+
+    Zwraca:
+        tuple: (liczba nowych plików, liczba plików, które już były w bazie).
+    """
+    files = list(files)
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        changes_before = conn.total_changes
+        for start in range(0, len(files), batch_size):
+            cursor.executemany(
+                "INSERT OR IGNORE INTO files (source_file_path, source_mtime, source_size) VALUES (?, ?, ?)",
+                files[start:start + batch_size]
+            )
+        _record_file_changes([file_path for file_path, _, _ in files])
+        conn.commit()
+        added_count = conn.total_changes - changes_before
+    return added_count, len(files) - added_count
+
+@log_db_operation
+@write_operation
 def update_file_transcription(file_path, transcription_text):
     """Zapisuje transkrypcję dla pliku i oznacza go jako przetworzony."""
     with get_db_connection() as conn:
@@ -39,9 +71,11 @@ def update_file_transcription(file_path, transcription_text):
             "UPDATE files SET transcription = ?, is_processed = 1 WHERE source_file_path = ?",
             (transcription_text, file_path)
         )
+        _record_file_changes([file_path])
         conn.commit()
 
 @log_db_operation
+@write_operation
 def set_file_selected(file_path, is_selected):
     """Ustawia flagę zaznaczenia (checkbox w GUI) dla pojedynczego pliku."""
     with get_db_connection() as conn:
@@ -51,9 +85,25 @@ def set_file_selected(file_path, is_selected):
             "UPDATE files SET is_selected = ? WHERE source_file_path = ?",
             (is_selected, file_path)
         )
+        _record_file_changes([file_path])
+        conn.commit()
+
+@log_db_operation
+@write_operation
+def set_files_selected(file_paths, is_selected):
+    """Ustawia tę samą flagę zaznaczenia dla listy plików w jednej transakcji (np. "zaznacz wszystkie")."""
+    file_paths = list(file_paths)
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.executemany(
+            "UPDATE files SET is_selected = ? WHERE source_file_path = ?",
+            [(is_selected, file_path) for file_path in file_paths]
+        )
+        _record_file_changes(file_paths)
         conn.commit()
 
 @log_db_operation
+@write_operation
 def delete_file(file_path):
     """
     Usuwa plik z bazy danych oraz (jeśli istnieją) jego fizyczne odpowiedniki z dysku
@@ -64,9 +114,13 @@ def delete_file(file_path):
         # Najpierw pobieramy ścieżkę do pliku tymczasowego, zanim usuniemy wiersz z bazy.
         result = _execute_query(cursor, "SELECT tmp_file_path FROM files WHERE source_file_path = ?", (file_path,), fetch='one')
         tmp_file_path = result['tmp_file_path'] if result else None
+        # Pobieramy również ścieżki fragmentów, jeśli plik był dzielony.
+        chunk_rows = _execute_query(cursor, "SELECT tmp_chunk_path FROM file_chunks WHERE source_file_path = ?", (file_path,), fetch='all')
 
         # Usuwamy wiersz z bazy danych.
         _execute_query(cursor, "DELETE FROM files WHERE source_file_path = ?", (file_path,))
+        _execute_query(cursor, "DELETE FROM file_chunks WHERE source_file_path = ?", (file_path,))
+        _record_file_changes([file_path])
         conn.commit()
 
     # Próbujemy usunąć plik źródłowy.
@@ -86,29 +140,243 @@ def delete_file(file_path):
         except OSError as e:
             print(f"Błąd podczas usuwania pliku tymczasowego {tmp_file_path}: {e}")
 
+    _remove_chunk_files(chunk_rows)
+
+def _remove_chunk_files(chunk_rows):
+    """Usuwa z dysku pliki fragmentów wskazane przez wiersze tabeli `file_chunks`."""
+    for row in chunk_rows:
+        try:
+            if os.path.exists(row['tmp_chunk_path']):
+                os.remove(row['tmp_chunk_path'])
+        except OSError as e:
+            print(f"Błąd podczas usuwania fragmentu {row['tmp_chunk_path']}: {e}")
+
+@log_db_operation
+@write_operation
+def add_file_chunks(source_file_path, chunks):
+    """
+    Zapisuje fragmenty pliku w jednej transakcji.
+
+    Argumenty:
+        source_file_path (str): Ścieżka do pliku źródłowego.
+        chunks (list): Lista słowników z kluczami 'chunk_index', 'tmp_chunk_path', 'start_ms', 'end_ms'.
+    """
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.executemany(
+            "INSERT OR REPLACE INTO file_chunks (source_file_path, chunk_index, tmp_chunk_path, start_ms, end_ms) VALUES (?, ?, ?, ?, ?)",
+            [(source_file_path, c['chunk_index'], c['tmp_chunk_path'], c['start_ms'], c['end_ms']) for c in chunks]
+        )
+        conn.commit()
+
+@log_db_operation
+@write_operation
+def update_chunk_transcription(source_file_path, chunk_index, transcription_text):
+    """Zapisuje transkrypcję jednego fragmentu pliku."""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        _execute_query(
+            cursor,
+            "UPDATE file_chunks SET transcription = ? WHERE source_file_path = ? AND chunk_index = ?",
+            (transcription_text, source_file_path, chunk_index)
+        )
+        conn.commit()
+
+@log_db_operation
+@write_operation
+def delete_file_chunks(source_file_path):
+    """Usuwa fragmenty pliku z bazy danych i z dysku (np. gdy trzeba go podzielić ponownie)."""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        chunk_rows = _execute_query(cursor, "SELECT tmp_chunk_path FROM file_chunks WHERE source_file_path = ?", (source_file_path,), fetch='all')
+        _execute_query(cursor, "DELETE FROM file_chunks WHERE source_file_path = ?", (source_file_path,))
+        conn.commit()
+    _remove_chunk_files(chunk_rows)
+
+@log_db_operation
+@write_operation
+def save_cached_transcription(cache_key, transcription_text):
+    """Zapisuje transkrypcję w trwałej pamięci podręcznej pod podanym kluczem."""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        _execute_query(
+            cursor,
+            "INSERT OR REPLACE INTO transcription_cache (cache_key, transcription) VALUES (?, ?)",
+            (cache_key, transcription_text)
+        )
+        conn.commit()
+
 @log_db_operation
-def cache_file_duration(file_path, duration_seconds):
-    """Zapisuje obliczoną długość pliku w cache'u bazy danych."""
-    duration_ms = int(duration_seconds * 1000)
+@write_operation
+def save_media_info(file_path, media_info):
+    """Zapisuje wyniki analizy pliku (`analyze_media`): długość i parametry ścieżki audio."""
     with get_db_connection() as conn:
         cursor = conn.cursor()
         _execute_query(
             cursor,
-            "UPDATE files SET duration_ms = ? WHERE source_file_path = ?",
-            (duration_ms, file_path)
+            """
+            UPDATE files
+            SET duration_ms = ?, audio_codec = ?, audio_channels = ?, audio_sample_rate = ?, audio_bit_rate = ?
+            WHERE source_file_path = ?
+            """,
+            (int(media_info['duration_sec'] * 1000), media_info['codec'], media_info['channels'],
+             media_info['sample_rate'], media_info['bit_rate'], file_path)
+        )
+        _record_file_changes([file_path])
+        conn.commit()
+
+@log_db_operation
+@write_operation
+def save_media_info_bulk(media_infos):
+    """
+    Zapisuje wyniki analizy wielu plików w jednej transakcji (jeden zapis na dysk zamiast jednego na plik).
+
+    Argumenty:
+        media_infos (dict): Ścieżka pliku -> wynik `analyze_media`.
+    """
+    update_data = [
+        (int(media_info['duration_sec'] * 1000), media_info['codec'], media_info['channels'],
+         media_info['sample_rate'], media_info['bit_rate'], file_path)
+        for file_path, media_info in media_infos.items()
+    ]
+    if not update_data:
+        return
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.executemany(
+            """
+            UPDATE files
+            SET duration_ms = ?, audio_codec = ?, audio_channels = ?, audio_sample_rate = ?, audio_bit_rate = ?
+            WHERE source_file_path = ?
+            """,
+            update_data
         )
+        _record_file_changes(media_infos)
         conn.commit()
 
 @log_db_operation
-def optimize_database():
-    """Optymalizuje bazę danych - uruchamia VACUUM i ANALYZE."""
+@write_operation
+def save_scan_manifest(directories, files, deleted_directories, deleted_files):
+    """
+    Zapisuje wynik skanu folderów w manifeście (jedna transakcja).
+
+    Argumenty:
+        directories (list): Krotki (ścieżka, ścieżka folderu nadrzędnego, czas modyfikacji w ns) odwiedzonych folderów.
+        files (list): Krotki (ścieżka, folder, rozmiar, czas modyfikacji w ns, i-węzeł) plików nowych i zmienionych.
+        deleted_directories (list): Ścieżki folderów, których już nie ma.
+        deleted_files (list): Ścieżki plików, których już nie ma.
+    """
     with get_db_connection() as conn:
         cursor = conn.cursor()
-        print("Optymalizacja bazy danych...")
-        cursor.execute("VACUUM")
-        cursor.execute("ANALYZE")
+        cursor.executemany("INSERT OR REPLACE INTO scan_directories (path, parent_path, mtime_ns) VALUES (?, ?, ?)", directories)
+        cursor.executemany(
+            "INSERT OR REPLACE INTO scan_files (path, directory_path, size, mtime_ns, inode) VALUES (?, ?, ?, ?, ?)",
+            files
+        )
+        cursor.executemany("DELETE FROM scan_directories WHERE path = ?", [(path,) for path in deleted_directories])
+        cursor.executemany("DELETE FROM scan_files WHERE path = ?", [(path,) for path in deleted_files])
         conn.commit()
-    print("Optymalizacja bazy danych zakończona.")
+
+def _remove_tmp_files(tmp_rows, chunk_rows):
+    """Usuwa z dysku przekonwertowane pliki (`tmp_file_path`) i fragmenty należące do unieważnionych plików."""
+    for row in tmp_rows:
+        try:
+            if row['tmp_file_path'] and os.path.exists(row['tmp_file_path']):
+                os.remove(row['tmp_file_path'])
+        except OSError as e:
+            print(f"Błąd podczas usuwania pliku tymczasowego {row['tmp_file_path']}: {e}")
+    _remove_chunk_files(chunk_rows)
+
+def _select_for_paths(cursor, query, file_paths):
+    """
+    Wykonuje zapytanie dla listy ścieżek jednym zapytaniem na paczkę ścieżek (jak `get_media_info_bulk`)
+    i łączy wyniki. Zapytanie zawiera znacznik `{paths}`, który jest zastępowany listą parametrów `?`.
+    """
+    rows = []
+    file_paths = list(file_paths)
+    for start in range(0, len(file_paths), _MAX_QUERY_PARAMS):
+        batch = file_paths[start:start + _MAX_QUERY_PARAMS]
+        rows.extend(_execute_query(cursor, query.format(paths=", ".join("?" * len(batch))), batch, fetch='all'))
+    return rows
+
+@log_db_operation
+@write_operation
+def invalidate_files(files):
+    """
+    Unieważnia wszystkie wyniki przetwarzania plików źródłowych, które zmieniły się od poprzedniego skanu:
+    metadane i wyniki analizy, konwersję (plik tymczasowy i fragmenty) oraz transkrypcję.
+    Pliki zostaną przetworzone od nowa, tak jak nowe. Zaznaczenie pliku (`is_selected`) zostaje.
+
+    Argumenty:
+        files (list): Krotki (ścieżka, czas modyfikacji, rozmiar w bajtach) - aktualne dane plików.
+
+    Zwraca:
+        int: Liczba unieważnionych wierszy w tabeli `files`.
+    """
+    file_paths = [file_path for file_path, _, _ in files]
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        tmp_rows = _select_for_paths(cursor, "SELECT tmp_file_path FROM files WHERE source_file_path IN ({paths})", file_paths)
+        chunk_rows = _select_for_paths(cursor, "SELECT tmp_chunk_path FROM file_chunks WHERE source_file_path IN ({paths})", file_paths)
+        changes_before = conn.total_changes
+        cursor.executemany(
+            """
+            UPDATE files
+            SET tmp_file_path = NULL, is_loaded = 0, is_processed = 0, transcription = NULL, tag = NULL,
+                start_datetime = NULL, end_datetime = NULL, duration_ms = NULL, previous_ms = NULL,
+                audio_codec = NULL, audio_channels = NULL, audio_sample_rate = NULL, audio_bit_rate = NULL,
+                source_mtime = ?, source_size = ?
+            WHERE source_file_path = ?
+            """,
+            [(mtime, size, file_path) for file_path, mtime, size in files]
+        )
+        invalidated_count = conn.total_changes - changes_before
+        cursor.executemany("DELETE FROM file_chunks WHERE source_file_path = ?", [(path,) for path in file_paths])
+        _record_file_changes(file_paths)
+        conn.commit()
+
+    # Pliki usuwamy dopiero po zatwierdzeniu - po wycofaniu transakcji wiersze nadal na nie wskazują.
+    _run_after_commit(lambda: _remove_tmp_files(tmp_rows, chunk_rows))
+    return invalidated_count
+
+@log_db_operation
+@write_operation
+def remove_deleted_files(file_paths):
+    """
+    Usuwa z bazy pliki, których źródło zniknęło z dysku, razem z ich plikami tymczasowymi i fragmentami.
+    Pliki z gotową transkrypcją zostają - transkrypcja jest wynikiem pracy, a nie tylko stanem skanu.
+
+    Zwraca:
+        int: Liczba usuniętych wierszy w tabeli `files`.
+    """
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        tmp_rows = _select_for_paths(
+            cursor, "SELECT tmp_file_path FROM files WHERE source_file_path IN ({paths}) AND is_processed = 0", file_paths
+        )
+        chunk_rows = _select_for_paths(
+            cursor,
+            """
+            SELECT tmp_chunk_path FROM file_chunks WHERE source_file_path IN ({paths})
+              AND NOT EXISTS (SELECT 1 FROM files WHERE files.source_file_path = file_chunks.source_file_path AND is_processed = 1)
+            """,
+            file_paths
+        )
+        changes_before = conn.total_changes
+        cursor.executemany("DELETE FROM files WHERE source_file_path = ? AND is_processed = 0", [(path,) for path in file_paths])
+        removed_count = conn.total_changes - changes_before
+        cursor.executemany(
+            """
+            DELETE FROM file_chunks WHERE source_file_path = ?
+              AND NOT EXISTS (SELECT 1 FROM files WHERE files.source_file_path = file_chunks.source_file_path)
+            """,
+            [(path,) for path in file_paths]
+        )
+        _record_file_changes(file_paths)
+        conn.commit()
+
+    _run_after_commit(lambda: _remove_tmp_files(tmp_rows, chunk_rows))
+    return removed_count
 
 @log_db_operation
 def validate_file_access(file_path):
@@ -1,6 +1,10 @@
 # Database queries module - data retrieval and bulk operations
 
-from .connection import get_db_connection, _execute_query, log_db_operation
+import os
+from .connection import get_db_connection, _execute_query, log_db_operation, write_operation, _record_file_changes
+
+# Maksymalna liczba parametrów `?` w jednym zapytaniu (starsze wersje SQLite dopuszczają 999).
+_MAX_QUERY_PARAMS = 500
 
 @log_db_operation
 def get_files_to_load():
@@ -20,6 +24,7 @@ def get_files_to_process():
         return [row['source_file_path'] for row in rows]
 
 @log_db_operation
+@write_operation
 def set_files_as_loaded(file_paths, tmp_file_paths):
     """Oznacza listę plików jako wczytane (skonwertowane) i zapisuje ścieżki do ich przetworzonych wersji audio."""
     with get_db_connection() as conn:
@@ -30,6 +35,23 @@ def set_files_as_loaded(file_paths, tmp_file_paths):
             "UPDATE files SET is_loaded = ?, tmp_file_path = ? WHERE source_file_path = ?",
             update_data
         )
+        _record_file_changes(file_paths)
+        conn.commit()
+
+@log_db_operation
+@write_operation
+def set_files_as_unloaded(file_paths):
+    """
+    Cofa oznaczenie plików jako wczytanych, np. gdy ich plik tymczasowy zniknął z dysku
+    (przerwany przebieg w trybie strumieniowym). Pliki zostaną ponownie przekonwertowane.
+    """
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.executemany(
+            "UPDATE files SET is_loaded = 0, tmp_file_path = NULL WHERE source_file_path = ? AND is_processed = 0",
+            [(path,) for path in file_paths]
+        )
+        _record_file_changes(file_paths)
         conn.commit()
 
 @log_db_operation
@@ -39,14 +61,94 @@ def get_all_files():
         cursor = conn.cursor()
         return _execute_query(cursor, "SELECT * FROM files ORDER BY start_datetime", fetch='all')
 
+# Kolumny wierszy listy plików w interfejsie (bez treści transkrypcji).
+_FILE_LIST_COLUMNS = "id, source_file_path, tmp_file_path, is_selected, is_loaded, is_processed, tag, start_datetime, duration_ms"
+
+@log_db_operation
+def get_file_list_rows(file_paths=None):
+    """
+    Pobiera wiersze listy plików dla interfejsu (posortowane chronologicznie) - same flagi, ścieżki i czasy,
+    bez kolumny `transcription`, aby odświeżanie widoków nie wczytywało treści wszystkich transkrypcji.
+
+    Argumenty:
+        file_paths (iterable, opcjonalnie): Jeśli podane, pobiera tylko wiersze tych plików
+                                            (np. zmienionych od ostatniego odświeżenia - `get_changes_since`).
+    """
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        if file_paths is None:
+            return _execute_query(cursor, f"SELECT {_FILE_LIST_COLUMNS} FROM files ORDER BY start_datetime", fetch='all')
+
+        rows = []
+        file_paths = list(file_paths)
+        for start in range(0, len(file_paths), _MAX_QUERY_PARAMS):
+            batch = file_paths[start:start + _MAX_QUERY_PARAMS]
+            placeholders = ", ".join("?" * len(batch))
+            rows.extend(_execute_query(
+                cursor,
+                f"SELECT {_FILE_LIST_COLUMNS} FROM files WHERE source_file_path IN ({placeholders})",
+                batch,
+                fetch='all'
+            ))
+        return rows
+
+@log_db_operation
+def get_file_status_counts(max_duration_ms):
+    """
+    Zlicza pliki w poszczególnych stanach jednym zapytaniem (liczniki i stan przycisków interfejsu).
+
+    Argumenty:
+        max_duration_ms (int): Limit długości pliku - dłuższe pliki są liczone jako 'long'.
+
+    Zwraca:
+        dict: Klucze 'total', 'selected', 'long', 'loaded', 'queued' (wczytane, bez transkrypcji), 'processed',
+              'to_load' (zaznaczone, niewczytane) i 'selected_unprocessed' (zaznaczone, bez transkrypcji).
+    """
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        row = _execute_query(
+            cursor,
+            """
+            SELECT
+                COUNT(*) AS total,
+                COUNT(CASE WHEN is_selected THEN 1 END) AS selected,
+                COUNT(CASE WHEN duration_ms > ? THEN 1 END) AS long,
+                COUNT(CASE WHEN is_loaded THEN 1 END) AS loaded,
+                COUNT(CASE WHEN is_loaded AND NOT is_processed THEN 1 END) AS queued,
+                COUNT(CASE WHEN is_processed THEN 1 END) AS processed,
+                COUNT(CASE WHEN is_selected AND NOT is_loaded THEN 1 END) AS to_load,
+                COUNT(CASE WHEN is_selected AND NOT is_processed THEN 1 END) AS selected_unprocessed
+            FROM files
+            """,
+            (max_duration_ms,),
+            fetch='one'
+        )
+        return dict(row)
+
+@log_db_operation
+def get_transcriptions(selected_only=True):
+    """
+    Pobiera (posortowane chronologicznie) tag i treść transkrypcji przetworzonych plików, które ją mają.
+
+    Argumenty:
+        selected_only (bool): Jeśli True, pomija pliki odznaczone na liście.
+    """
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        query = "SELECT tag, transcription FROM files WHERE is_processed = 1 AND transcription IS NOT NULL AND transcription != ''"
+        if selected_only:
+            query += " AND is_selected = 1"
+        return _execute_query(cursor, query + " ORDER BY start_datetime", fetch='all')
+
 @log_db_operation
 def get_files_needing_metadata():
     """Pobiera pliki, które nie mają jeszcze przetworzonych metadanych (start_datetime jest NULL)."""
     with get_db_connection() as conn:
         cursor = conn.cursor()
-        return _execute_query(cursor, "SELECT id, source_file_path FROM files WHERE start_datetime IS NULL", fetch='all')
+        return _execute_query(cursor, "SELECT id, source_file_path, source_mtime FROM files WHERE start_datetime IS NULL", fetch='all')
 
 @log_db_operation
+@write_operation
 def update_all_metadata_bulk(metadata_list):
     """Masowo aktualizuje wszystkie obliczone metadane dla listy plików."""
     with get_db_connection() as conn:
@@ -60,17 +162,25 @@ def update_all_metadata_bulk(metadata_list):
                 item['previous_ms'],
                 item['is_selected'],
                 item['tag'],
+                item.get('audio_codec'),
+                item.get('audio_channels'),
+                item.get('audio_sample_rate'),
+                item.get('audio_bit_rate'),
                 item['id']
             ) for item in metadata_list
         ]
         cursor.executemany(
             """
             UPDATE files
-            SET start_datetime = ?, duration_ms = ?, end_datetime = ?, previous_ms = ?, is_selected = ?, tag = ?
+            SET start_datetime = ?, duration_ms = ?, end_datetime = ?, previous_ms = ?, is_selected = ?, tag = ?,
+                audio_codec = ?, audio_channels = ?, audio_sample_rate = ?, audio_bit_rate = ?
             WHERE id = ?
             """,
             update_data
         )
+        # Wiersze są aktualizowane po `id` - bez ścieżek w danych zgłaszamy zmianę całej tabeli.
+        changed_paths = [item.get('source_file_path') for item in metadata_list]
+        _record_file_changes(None if None in changed_paths else changed_paths)
         conn.commit()
 
 @log_db_operation
@@ -86,13 +196,151 @@ def get_file_metadata(source_file_path):
         )
 
 @log_db_operation
-def get_cached_duration(file_path):
-    """Pobiera zcache'owaną długość pliku z bazy danych."""
+def get_media_info(file_path):
+    """Pobiera zapisane wyniki analizy pliku (długość i parametry ścieżki audio) lub None, jeśli pliku nie ma w bazie."""
     with get_db_connection() as conn:
         cursor = conn.cursor()
         return _execute_query(
             cursor,
-            "SELECT duration_ms FROM files WHERE source_file_path = ? AND duration_ms IS NOT NULL",
+            "SELECT duration_ms, audio_codec, audio_channels, audio_sample_rate, audio_bit_rate FROM files WHERE source_file_path = ?",
             (file_path,),
             fetch='one'
         )
+
+@log_db_operation
+def get_media_info_bulk(file_paths):
+    """
+    Pobiera zapisane wyniki analizy dla całej listy plików jednym zapytaniem na paczkę ścieżek.
+
+    Zwraca:
+        dict: Ścieżka pliku -> wiersz (duration_ms, audio_codec, ...) dla plików obecnych w bazie.
+    """
+    rows = {}
+    file_paths = list(file_paths)
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        # SQLite ogranicza liczbę parametrów w jednym zapytaniu, więc długie listy dzielimy na paczki.
+        for start in range(0, len(file_paths), _MAX_QUERY_PARAMS):
+            batch = file_paths[start:start + _MAX_QUERY_PARAMS]
+            placeholders = ", ".join("?" * len(batch))
+            for row in _execute_query(
+                cursor,
+                f"""
+                SELECT source_file_path, duration_ms, audio_codec, audio_channels, audio_sample_rate, audio_bit_rate
+                FROM files WHERE source_file_path IN ({placeholders})
+                """,
+                batch,
+                fetch='all'
+            ):
+                rows[row['source_file_path']] = row
+    return rows
+
+@log_db_operation
+def get_source_signatures(file_paths):
+    """
+    Pobiera zapisane czasy modyfikacji i rozmiary plików źródłowych jednym zapytaniem na paczkę ścieżek.
+
+    Zwraca:
+        dict: Ścieżka pliku -> (czas modyfikacji, rozmiar) dla plików obecnych w bazie (wartości mogą być None).
+    """
+    signatures = {}
+    file_paths = list(file_paths)
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        for start in range(0, len(file_paths), _MAX_QUERY_PARAMS):
+            batch = file_paths[start:start + _MAX_QUERY_PARAMS]
+            placeholders = ", ".join("?" * len(batch))
+            for row in _execute_query(
+                cursor,
+                f"SELECT source_file_path, source_mtime, source_size FROM files WHERE source_file_path IN ({placeholders})",
+                batch,
+                fetch='all'
+            ):
+                signatures[row['source_file_path']] = (row['source_mtime'], row['source_size'])
+    return signatures
+
+@log_db_operation
+def get_files_to_chunk(min_duration_ms):
+    """
+    Pobiera pliki wczytane, ale jeszcze nieprzetworzone, które są dłuższe niż `min_duration_ms`
+    i nie zostały jeszcze podzielone na fragmenty.
+    """
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        return _execute_query(
+            cursor,
+            """
+            SELECT source_file_path, tmp_file_path, duration_ms FROM files
+            WHERE is_loaded = 1 AND is_processed = 0 AND duration_ms > ?
+              AND NOT EXISTS (SELECT 1 FROM file_chunks WHERE file_chunks.source_file_path = files.source_file_path)
+            ORDER BY start_datetime
+            """,
+            (min_duration_ms,),
+            fetch='all'
+        )
+
+@log_db_operation
+def get_file_chunks(source_file_path):
+    """Pobiera fragmenty pliku w kolejności ich występowania w nagraniu."""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        return _execute_query(
+            cursor,
+            "SELECT chunk_index, tmp_chunk_path, start_ms, end_ms, transcription FROM file_chunks WHERE source_file_path = ? ORDER BY chunk_index",
+            (source_file_path,),
+            fetch='all'
+        )
+
+@log_db_operation
+def get_cached_transcription(cache_key):
+    """Pobiera transkrypcję z trwałej pamięci podręcznej (None, jeśli jej tam nie ma)."""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        row = _execute_query(cursor, "SELECT transcription FROM transcription_cache WHERE cache_key = ?", (cache_key,), fetch='one')
+        return row['transcription'] if row else None
+
+@log_db_operation
+def get_scan_manifest(root_path):
+    """
+    Pobiera manifest skanera dla folderu `root_path` i wszystkich jego podfolderów.
+
+    Zwraca:
+        tuple: (wiersze `scan_directories`, wiersze `scan_files`).
+    """
+    # `substr` zamiast `LIKE` - znaki `%` i `_` w nazwach folderów nie mogą działać jak wzorzec.
+    prefix = os.path.join(root_path, '')
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        directories = _execute_query(
+            cursor,
+            "SELECT path, parent_path, mtime_ns FROM scan_directories WHERE path = ? OR substr(path, 1, ?) = ?",
+            (root_path, len(prefix), prefix),
+            fetch='all'
+        )
+        files = _execute_query(
+            cursor,
+            "SELECT path, directory_path, size, mtime_ns, inode FROM scan_files WHERE substr(path, 1, ?) = ?",
+            (len(prefix), prefix),
+            fetch='all'
+        )
+    return directories, files
+
+@log_db_operation
+def get_manifest_files_missing_from_db(root_path):
+    """
+    Pobiera pliki z manifestu skanera, których nie ma w tabeli `files` (np. po jej resecie
+    albo usunięciu pliku z listy) - skaner dodaje je ponownie, mimo że ich folder się nie zmienił.
+    """
+    prefix = os.path.join(root_path, '')
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        return _execute_query(
+            cursor,
+            """
+            SELECT scan_files.path, scan_files.size, scan_files.mtime_ns FROM scan_files
+            LEFT JOIN files ON files.source_file_path = scan_files.path
+            WHERE files.id IS NULL AND substr(scan_files.path, 1, ?) = ?
+            """,
+            (len(prefix), prefix),
+            fetch='all'
+        )
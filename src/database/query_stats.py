@@ -0,0 +1,229 @@
+# Database query statistics module - per-query-shape timing of every SQL statement
+
+import random
+import re
+import sqlite3
+import threading
+import time
+from src import config
+
+# Zapytania różniące się tylko liczbą parametrów na liście `IN (?, ?, ...)` albo liczbami w treści
+# (np. `PRAGMA incremental_vacuum(2048)`) są liczone jako ten sam "kształt" zapytania.
+_WHITESPACE = re.compile(r"\s+")
+_PLACEHOLDER_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_NUMBER = re.compile(r"\b\d+\b")
+# Liczba czasów wykonania przechowywanych dla jednego kształtu (próbka losowa) - z nich liczone są p50 i p99.
+_SAMPLE_SIZE = 1024
+# Limit zapamiętanych tekstów zapytań -> kształt (zapytania budowane dynamicznie nie zapełnią pamięci).
+_SHAPE_CACHE_SIZE = 4096
+# Polecenia, dla których `EXPLAIN QUERY PLAN` ma sens.
+_EXPLAINABLE = ("SELECT", "WITH", "UPDATE", "DELETE", "INSERT", "REPLACE")
+
+_stats_lock = threading.Lock()
+_stats = {}
+_shape_cache = {}
+
+class _ShapeStats:
+    """Statystyki jednego kształtu zapytania."""
+
+    __slots__ = ("count", "total", "maximum", "rows", "samples", "plan")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.maximum = 0.0
+        self.rows = 0
+        self.samples = []
+        self.plan = None
+
+def _shape_of(sql):
+    """Zwraca znormalizowany kształt zapytania (jedna linia, listy parametrów i liczby zastąpione `?`)."""
+    shape = _shape_cache.get(sql)
+    if shape is None:
+        shape = _WHITESPACE.sub(" ", sql).strip()
+        shape = _NUMBER.sub("?", _PLACEHOLDER_LIST.sub("(?, ...)", shape))
+        if len(_shape_cache) < _SHAPE_CACHE_SIZE:
+            _shape_cache[sql] = shape
+    return shape
+
+def _record(shape, elapsed, rows, sample):
+    """Dolicza czas i wiersze do statystyk kształtu; `sample=True` zapisuje `elapsed` jako czas jednego wykonania."""
+    with _stats_lock:
+        stats = _stats.get(shape)
+        if stats is None:
+            stats = _stats[shape] = _ShapeStats()
+        stats.total += elapsed
+        stats.rows += rows
+        if sample:
+            stats.count += 1
+            stats.maximum = max(stats.maximum, elapsed)
+            # Próbkowanie rezerwuarowe: każde wykonanie ma równą szansę znaleźć się w próbce.
+            if len(stats.samples) < _SAMPLE_SIZE:
+                stats.samples.append(elapsed)
+            else:
+                index = random.randrange(stats.count)
+                if index < _SAMPLE_SIZE:
+                    stats.samples[index] = elapsed
+        return stats
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """
+    Kursor mierzący czas każdego zapytania. Czas wykonania zapytania zwracającego wiersze obejmuje
+    `execute` i pierwsze pobranie wyników (`fetchone`/`fetchmany`/`fetchall`) - tyle zwykle trwa jego użycie.
+    Dalsze pobieranie jest doliczane do łącznego czasu i liczby wierszy kształtu.
+    """
+
+    _pending = None  # (czas do tej pory, zapytanie, parametry) - zapytanie czekające na pobranie wyników.
+    _shape = None  # Kształt ostatniego zapytania kursora.
+
+    def _timed(self, method, sql, *args, parameters=None):
+        """Wykonuje `method(sql, *args)` i mierzy czas; `parameters` - parametry do `EXPLAIN QUERY PLAN` (None - bez planu)."""
+        self._pending = None
+        self._shape = _shape_of(sql)
+        start = time.perf_counter()
+        try:
+            return method(sql, *args)
+        finally:
+            elapsed = time.perf_counter() - start
+            if self.description is None:
+                # Polecenie bez wyników (zapis, część poleceń PRAGMA) - kończy się razem z `execute`.
+                self._finish(elapsed, max(self.rowcount, 0), sql, parameters)
+            else:
+                self._pending = (elapsed, sql, parameters)
+
+    def _finish(self, elapsed, rows, sql, parameters):
+        stats = _record(self._shape, elapsed, rows, sample=True)
+        if (parameters is not None and stats.plan is None and config.DATABASE_EXPLAIN_SLOW_QUERIES
+                and elapsed * 1000 >= config.DATABASE_SLOW_QUERY_MS
+                and sql.lstrip().upper().startswith(_EXPLAINABLE)):
+            stats.plan = _explain(self.connection, sql, parameters)
+
+    def _fetched(self, elapsed, rows):
+        pending = self._pending
+        if pending is None:
+            _record(self._shape, elapsed, rows, sample=False)
+            return
+        self._pending = None
+        self._finish(pending[0] + elapsed, rows, pending[1], pending[2])
+
+    def execute(self, sql, parameters=()):
+        return self._timed(super().execute, sql, parameters, parameters=parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self._timed(super().executemany, sql, seq_of_parameters)
+
+    def executescript(self, sql_script):
+        return self._timed(super().executescript, sql_script)
+
+    def fetchone(self):
+        start = time.perf_counter()
+        row = super().fetchone()
+        self._fetched(time.perf_counter() - start, 0 if row is None else 1)
+        return row
+
+    def fetchmany(self, size=None):
+        start = time.perf_counter()
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        self._fetched(time.perf_counter() - start, len(rows))
+        return rows
+
+    def fetchall(self):
+        start = time.perf_counter()
+        rows = super().fetchall()
+        self._fetched(time.perf_counter() - start, len(rows))
+        return rows
+
+    def __next__(self):
+        start = time.perf_counter()
+        try:
+            row = super().__next__()
+        except StopIteration:
+            self._fetched(time.perf_counter() - start, 0)
+            raise
+        _record(self._shape, time.perf_counter() - start, 1, sample=False)
+        return row
+
+class InstrumentedConnection(sqlite3.Connection):
+    """Połączenie, którego wszystkie zapytania (także `conn.execute`) przechodzą przez `InstrumentedCursor`."""
+
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def executescript(self, sql_script):
+        return self.cursor().executescript(sql_script)
+
+def _explain(connection, sql, parameters):
+    """Zwraca plan zapytania (`EXPLAIN QUERY PLAN`) jako listę kroków albo komunikat o błędzie."""
+    try:
+        # Zwykły kursor - plan nie trafia do statystyk.
+        cursor = sqlite3.Cursor(connection)
+        return [row[3] for row in cursor.execute("EXPLAIN QUERY PLAN " + sql, parameters).fetchall()]
+    except sqlite3.Error as e:
+        return [f"(nie udało się pobrać planu: {e})"]
+
+def _percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+def get_query_stats():
+    """
+    Zwraca statystyki zapytań od startu programu (albo od `reset_query_stats`), od największego łącznego czasu.
+
+    Zwraca:
+        list: Słowniki z kluczami 'shape', 'count', 'total_ms', 'p50_ms', 'p99_ms', 'max_ms', 'rows'
+              oraz 'plan' (kroki `EXPLAIN QUERY PLAN` dla wolnych zapytań albo None).
+    """
+    with _stats_lock:
+        snapshot = [(shape, stats.count, stats.total, stats.maximum, stats.rows, sorted(stats.samples), stats.plan)
+                    for shape, stats in _stats.items()]
+    result = [
+        {
+            'shape': shape,
+            'count': count,
+            'total_ms': total * 1000,
+            'p50_ms': _percentile(samples, 0.50) * 1000,
+            'p99_ms': _percentile(samples, 0.99) * 1000,
+            'max_ms': maximum * 1000,
+            'rows': rows,
+            'plan': plan,
+        }
+        for shape, count, total, maximum, rows, samples, plan in snapshot
+    ]
+    return sorted(result, key=lambda entry: entry['total_ms'], reverse=True)
+
+def reset_query_stats():
+    """Zeruje zebrane statystyki zapytań."""
+    with _stats_lock:
+        _stats.clear()
+
+def format_query_stats(limit=20):
+    """Zwraca tabelę statystyk `limit` zapytań o największym łącznym czasie (None - wszystkich)."""
+    stats = get_query_stats()
+    if not stats:
+        return "Statystyki zapytań do bazy danych: brak zapytań."
+    total_count = sum(entry['count'] for entry in stats)
+    total_ms = sum(entry['total_ms'] for entry in stats)
+    lines = [
+        f"Statystyki zapytań do bazy danych: {total_count} zapytań, {len(stats)} rodzajów, łącznie {total_ms:.1f} ms",
+        f"{'liczba':>8} {'łącznie ms':>11} {'p50 ms':>8} {'p99 ms':>8} {'maks ms':>8} {'wiersze':>9}  zapytanie",
+    ]
+    for entry in stats[:limit]:
+        shape = entry['shape'] if len(entry['shape']) <= 120 else entry['shape'][:117] + "..."
+        lines.append(f"{entry['count']:>8} {entry['total_ms']:>11.1f} {entry['p50_ms']:>8.2f} {entry['p99_ms']:>8.2f} "
+                     f"{entry['max_ms']:>8.2f} {entry['rows']:>9}  {shape}")
+        for step in entry['plan'] or []:
+            lines.append(f"{'':>57}plan: {step}")
+    if limit is not None and len(stats) > limit:
+        lines.append(f"... oraz {len(stats) - limit} innych rodzajów zapytań.")
+    return "\n".join(lines)
+
+def print_query_stats(limit=20):
+    """Wyświetla tabelę statystyk zapytań (np. przy zakończeniu programu - flaga CLI `--db-stats`)."""
+    print(format_query_stats(limit))
@@ -3,10 +3,78 @@
 import sqlite3
 import os
 import shutil
-from .connection import get_db_connection, _execute_query, log_db_operation
+from .connection import get_db_connection, _execute_query, log_db_operation, write_operation, close_db_connections, _record_file_changes
 from src import config
 
+# Kolumny dodane do tabeli `files` po jej pierwszym wydaniu: (nazwa, typ).
+# Parametry ścieżki audio odczytane raz przy analizie metadanych (`analyze_media`).
+_ADDED_FILES_COLUMNS = [
+    ('audio_codec', 'TEXT'),
+    ('audio_channels', 'INTEGER'),
+    ('audio_sample_rate', 'INTEGER'),
+    ('audio_bit_rate', 'INTEGER'),
+    # Czas modyfikacji i rozmiar pliku źródłowego zapisane przez skaner folderów (`add_files`).
+    ('source_mtime', 'REAL'),
+    ('source_size', 'INTEGER')
+]
+
+def _migrate_files_table(cursor):
+    """Dodaje do istniejącej tabeli `files` kolumny, których brakuje w bazach utworzonych przez starsze wersje."""
+    existing = {row['name'] for row in _execute_query(cursor, "PRAGMA table_info(files)", fetch='all')}
+    for name, column_type in _ADDED_FILES_COLUMNS:
+        if name not in existing:
+            cursor.execute(f"ALTER TABLE files ADD COLUMN {name} {column_type}")
+
+def _create_auxiliary_tables(cursor):
+    """
+    Tworzy tabele pomocnicze, jeśli nie istnieją:
+    - `file_chunks` - fragmenty długich nagrań; każdy fragment przechowuje własną transkrypcję,
+      dzięki czemu przerwana transkrypcja długiego pliku jest wznawiana od brakujących fragmentów,
+    - `transcription_cache` - trwała pamięć podręczna transkrypcji, adresowana skrótem nagrania
+      i parametrów API. Nie jest usuwana przy resecie tabeli `files`,
+    - `scan_directories` i `scan_files` - manifest skanera folderów: czasy modyfikacji folderów
+      oraz (rozmiar, czas modyfikacji, i-węzeł) plików z poprzedniego skanu. Pozwala pominąć
+      przy ponownym skanie foldery, w których nic się nie zmieniło.
+    """
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS file_chunks (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        source_file_path TEXT NOT NULL,
+        chunk_index INTEGER NOT NULL,
+        tmp_chunk_path TEXT NOT NULL,
+        start_ms INTEGER NOT NULL,
+        end_ms INTEGER NOT NULL,
+        transcription TEXT,
+        UNIQUE (source_file_path, chunk_index)
+    );
+    """)
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS transcription_cache (
+        cache_key TEXT PRIMARY KEY,
+        transcription TEXT NOT NULL,
+        created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+    );
+    """)
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS scan_directories (
+        path TEXT PRIMARY KEY,
+        parent_path TEXT,
+        mtime_ns INTEGER NOT NULL
+    );
+    """)
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS scan_files (
+        path TEXT PRIMARY KEY,
+        directory_path TEXT NOT NULL,
+        size INTEGER NOT NULL,
+        mtime_ns INTEGER NOT NULL,
+        inode INTEGER NOT NULL
+    );
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_scan_files_directory ON scan_files(directory_path)")
+
 @log_db_operation
+@write_operation
 def initialize_database():
     """
     Inicjalizuje bazę danych. Tworzy nową, czystą strukturę, jeśli baza lub tabela 'files' nie istnieje.
@@ -15,11 +83,19 @@ def initialize_database():
     # `with` zapewnia, że połączenie z bazą danych zostanie automatycznie zamknięte po zakończeniu bloku.
     with get_db_connection() as conn:
         cursor = conn.cursor()
+        _record_file_changes(None)
+        # Tabele pomocnicze są tworzone zawsze - również w istniejących bazach z danymi.
+        _create_auxiliary_tables(cursor)
+        conn.commit()
+
         # Sprawdzamy w specjalnej tabeli `sqlite_master`, czy nasza tabela `files` już istnieje.
         table_exists = _execute_query(cursor, "SELECT name FROM sqlite_master WHERE type='table' AND name='files'", fetch='one')
 
         # Jeśli tabela istnieje, sprawdzamy, czy zawiera jakiekolwiek dane.
         if table_exists:
+            # Bazy utworzone przez starsze wersje aplikacji uzupełniamy o nowe kolumny.
+            _migrate_files_table(cursor)
+            conn.commit()
             has_data = _execute_query(cursor, "SELECT 1 FROM files LIMIT 1", fetch='one')
             if has_data:
                 print("Baza danych już istnieje i zawiera dane. Inicjalizacja pominięta.")
@@ -41,7 +117,13 @@ def initialize_database():
             start_datetime TEXT,
             end_datetime TEXT,
             duration_ms INTEGER,
-            previous_ms INTEGER
+            previous_ms INTEGER,
+            audio_codec TEXT,
+            audio_channels INTEGER,
+            audio_sample_rate INTEGER,
+            audio_bit_rate INTEGER,
+            source_mtime REAL,
+            source_size INTEGER
         );
         """)
         # Dodajemy indeksy dla lepszej wydajności zapytań
@@ -57,6 +139,7 @@ def initialize_database():
     print(f"Baza danych została zainicjalizowana w: {config.DATABASE_FILE}")
 
 @log_db_operation
+@write_operation
 def ensure_files_table_exists():
     """
     Sprawdza czy tabela files istnieje i jeśli nie - tworzy ją.
@@ -83,7 +166,13 @@ def ensure_files_table_exists():
                 start_datetime TEXT,
                 end_datetime TEXT,
                 duration_ms INTEGER,
-                previous_ms INTEGER
+                previous_ms INTEGER,
+                audio_codec TEXT,
+                audio_channels INTEGER,
+                audio_sample_rate INTEGER,
+                audio_bit_rate INTEGER,
+                source_mtime REAL,
+                source_size INTEGER
             );
             """)
 
@@ -95,10 +184,16 @@ def ensure_files_table_exists():
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_files_duration_ms ON files(duration_ms)")
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_files_tag ON files(tag)")
 
+            _create_auxiliary_tables(cursor)
+            _record_file_changes(None)
             conn.commit()
             print("Tabela 'files' została utworzona.")
+        else:
+            _migrate_files_table(cursor)
+            conn.commit()
 
 @log_db_operation
+@write_operation
 def reset_files_table():
     """
     Resetuje aplikację do stanu początkowego przez usunięcie tabeli files
@@ -108,8 +203,10 @@ def reset_files_table():
     with get_db_connection() as conn:
         cursor = conn.cursor()
 
-        # Usuwamy tabelę files jeśli istnieje
+        # Usuwamy tabelę files (i fragmenty jej plików) jeśli istnieje
         cursor.execute("DROP TABLE IF EXISTS files")
+        _record_file_changes(None)
+        cursor.execute("DROP TABLE IF EXISTS file_chunks")
         print("Tabela 'files' została usunięta.")
 
         # Tworzymy pustą tabelę files
@@ -126,7 +223,13 @@ def reset_files_table():
             start_datetime TEXT,
             end_datetime TEXT,
             duration_ms INTEGER,
-            previous_ms INTEGER
+            previous_ms INTEGER,
+            audio_codec TEXT,
+            audio_channels INTEGER,
+            audio_sample_rate INTEGER,
+            audio_bit_rate INTEGER,
+            source_mtime REAL,
+            source_size INTEGER
         );
         """)
 
@@ -138,6 +241,8 @@ def reset_files_table():
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_files_duration_ms ON files(duration_ms)")
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_files_tag ON files(tag)")
 
+        _create_auxiliary_tables(cursor)
+
         conn.commit()
         print("Tabela 'files' została utworzona ponownie.")
 
@@ -153,6 +258,11 @@ def reset_files_table():
             except OSError as e:
                 print(f"Błąd podczas usuwania pliku {file_path}: {e}")
 
+    # Usuwamy fragmenty długich nagrań
+    if os.path.exists(config.AUDIO_CHUNKS_TMP_DIR):
+        shutil.rmtree(config.AUDIO_CHUNKS_TMP_DIR, ignore_errors=True)
+        print(f"Usunięto fragmenty nagrań: {config.AUDIO_CHUNKS_TMP_DIR}")
+
     print("Reset tabeli files zakończony.")
 
 @log_db_operation
@@ -161,6 +271,8 @@ def clear_database_and_tmp_folder():
     "Czyści" stan aplikacji. Usuwa cały folder tymczasowy (włączając w to bazę danych i przetworzone pliki audio),
     a następnie tworzy na nowo pustą strukturę.
     """
+    # Zamykamy połączenia, aby nie zapisywały do usuwanego pliku bazy danych.
+    close_db_connections()
     # Sprawdzamy, czy folder tymczasowy istnieje.
     if os.path.exists(config.TMP_DIR):
         # `shutil.rmtree` usuwa folder wraz z całą jego zawartością.
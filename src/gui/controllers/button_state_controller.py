@@ -5,8 +5,6 @@
 # Dzięki temu użytkownik nie może kliknąć przycisku, który w danym momencie
 # nie powinien być używany.
 
-from src import database
-
 class ButtonStateController:
     """
     Zarządza stanem (włączony/wyłączony) przycisków w interfejsie,
@@ -23,10 +21,10 @@ class ButtonStateController:
         """
         self.app = app
     
-    def update_ui_state(self, all_files=None):
+    def update_ui_state(self, counts=None):
         """
-        Aktualizuje stan całego interfejsu na podstawie dostarczonych danych
-        lub pobiera świeże dane z bazy, jeśli nie zostały one podane.
+        Aktualizuje stan całego interfejsu na podstawie dostarczonych liczników plików
+        (`App.get_file_status_counts`) lub pobiera je z bazy, jeśli nie zostały podane.
         Jest to centralna metoda, która jest wywoływana po każdej znaczącej
         zmianie stanu aplikacji.
         """
@@ -34,22 +32,15 @@ class ButtonStateController:
         # bo w trakcie przetwarzania większość przycisków powinna być zablokowana.
         is_processing = self.app.processing_thread and self.app.processing_thread.is_alive()
 
-        # Optymalizacja: jeśli nie dostaliśmy danych, pobieramy je raz.
-        if all_files is None:
-            all_files = database.get_all_files()
+        # Optymalizacja: jeśli nie dostaliśmy liczników, pobieramy je jednym zapytaniem.
+        if counts is None:
+            counts = self.app.get_file_status_counts()
 
         # Obliczamy flagi logiczne, które reprezentują aktualny stan danych.
-        # Użycie `any()` jest wydajne, bo przestaje sprawdzać po znalezieniu pierwszego `True`.
         # Czy istnieją pliki, które są zaznaczone, ale jeszcze nie wczytane (nie przekonwertowane)?
-        has_files_to_load = any(f['is_selected'] and not f['is_loaded'] for f in all_files)
+        has_files_to_load = counts['to_load'] > 0
         # Czy istnieją pliki, które są wczytane, ale jeszcze nie przetworzone (bez transkrypcji)?
-        has_files_to_process = any(f['is_loaded'] and not f['is_processed'] for f in all_files)
-        # Czy istnieją jakiekolwiek pliki, które już mają transkrypcję?
-        has_processed_files = any(f['is_processed'] for f in all_files)
-        # Czy w bazie danych jest w ogóle jakikolwiek plik?
-        any_files_exist = len(all_files) > 0
-        # Czy istnieją pliki, które zostały już wczytane (przekonwertowane)?
-        has_loaded_files = any(f['is_loaded'] for f in all_files)
+        has_files_to_process = counts['queued'] > 0
 
         # --- Przycisk wyboru plików ---
         # Powinien być wyłączony, jeśli trwa przetwarzanie LUB transkrypcja została już rozpoczęta.
@@ -84,11 +75,7 @@ class ButtonStateController:
 
         # --- Przycisk kopiowania ---
         # Logika: przycisk kopiowania jest aktywny tylko wtedy, gdy wszystkie ZAZNACZONE pliki
-        # zostały już przetworzone.
-        selected_files = [f for f in all_files if f['is_selected']]
-        is_copy_enabled = False
-        if selected_files: # Sprawdzamy, czy cokolwiek jest zaznaczone.
-            # `all()` zwraca True, jeśli warunek jest spełniony dla każdego elementu na liście.
-            is_copy_enabled = all(f['is_processed'] for f in selected_files)
+        # zostały już przetworzone (i cokolwiek jest zaznaczone).
+        is_copy_enabled = counts['selected'] > 0 and counts['selected_unprocessed'] == 0
 
         self.app.copy_transcription_button.configure(state="normal" if is_copy_enabled else "disabled")
\ No newline at end of file
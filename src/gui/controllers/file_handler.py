@@ -5,7 +5,7 @@
 import threading  # Moduł do pracy z wątkami, niezbędny do uruchamiania operacji w tle.
 from tkinter import filedialog, messagebox  # Moduły Tkinter do okien dialogowych.
 from src import config, database  # Nasze własne moduły.
-from src.utils.audio import encode_audio_files  # Funkcja do konwersji plików.
+from src.utils.audio import encode_audio_files, chunk_long_audio_files  # Funkcje do konwersji i dzielenia plików.
 from src.metadata import process_and_update_all_metadata
 
 class FileHandler:
@@ -46,16 +46,15 @@ class FileHandler:
         # Sortujemy ścieżki alfabetycznie, aby zapewnić spójną i przewidywalną kolejność w całej aplikacji.
         sorted_paths = sorted(list(paths))
 
-        # Iterujemy przez posortowane ścieżki i dodajemy każdą z nich do bazy danych.
-        for p in sorted_paths:
-            database.add_file(p)
+        # Dodajemy wszystkie wybrane pliki do bazy danych w jednej transakcji.
+        # Czas modyfikacji i rozmiar zostaną odczytane podczas przetwarzania metadanych.
+        database.add_files((p, None, None) for p in sorted_paths)
 
         # Po dodaniu plików, uruchamiamy centralną funkcję do przetworzenia ich metadanych.
         process_and_update_all_metadata()
 
-        # Po dodaniu plików i przetworzeniu metadanych, unieważniamy cache i aktualizujemy stan przycisków i odświeżamy widoki,
+        # Po dodaniu plików i przetworzeniu metadanych aktualizujemy stan przycisków i odświeżamy widoki,
         # aby użytkownik od razu zobaczył efekt swojej akcji.
-        self.app.invalidate_cache()
         self.app.button_state_controller.update_ui_state()
         self.app.refresh_all_views()
 
@@ -91,6 +90,8 @@ class FileHandler:
             # Wywołujemy funkcję, która wykonuje całą logikę konwersji FFMPEG.
             # Przekazujemy referencję do aplikacji, aby móc aktualizować GUI w trakcie przetwarzania.
             encode_audio_files(app=self.app)
+            # Długie nagrania dzielimy w miejscach ciszy na fragmenty transkrybowane równolegle.
+            chunk_long_audio_files()
             
             # WAŻNE: Bezpośrednia modyfikacja widżetów Tkinter z innego wątku niż główny jest niebezpieczna.
             # `self.app.after(0, ...)` to bezpieczny sposób na zaplanowanie wykonania funkcji
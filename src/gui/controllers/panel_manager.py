@@ -5,7 +5,6 @@
 
 import os
 from tkinter import messagebox
-from src import database
 from src.utils.audio import get_file_duration
 
 class PanelManager:
@@ -23,6 +22,9 @@ class PanelManager:
                  do poszczególnych paneli (np. `self.app.file_selection_panel`).
         """
         self.app = app
+        # Wiersze, którymi ostatnio wypełniono listę plików - `App.get_cached_files_data` zwraca
+        # ten sam obiekt, dopóki dane się nie zmienią, więc listy nie trzeba wtedy budować od nowa.
+        self._populated_rows = None
 
     def refresh_all_views(self, data=None):
         """
@@ -31,8 +33,8 @@ class PanelManager:
         optymalizacją zapobiegającą wielokrotnym zapytaniom do bazy danych.
         """
         try:
-            # Jeśli nie otrzymaliśmy gotowych danych, pobieramy je z bazy.
-            all_files = data if data is not None else database.get_all_files()
+            # Jeśli nie otrzymaliśmy gotowych danych, pobieramy je z cache'a (wiersze bez treści transkrypcji).
+            all_files = data if data is not None else self.app.get_cached_files_data()
 
             # Odświeżamy poszczególne panele, przekazując im już przygotowane i aktualne dane.
             self._refresh_selected_files_view(all_files)
@@ -45,12 +47,15 @@ class PanelManager:
 
     def _refresh_selected_files_view(self, all_files):
         """Odświeża panel z listą plików do wyboru (z checkboxami), używając dostarczonych danych."""
+        if all_files is self._populated_rows:
+            return
         self.app.file_selection_panel.populate_files(all_files)
+        self._populated_rows = all_files
 
     def _refresh_status_views(self, all_files):
         """
-        Odświeża wszystkie panele statusu (Wczytane, Kolejka, Gotowe) oraz panel z transkrypcją,
-        używając tych samych, raz pobranych danych.
+        Odświeża wszystkie panele statusu (Wczytane, Kolejka, Gotowe), używając tych samych,
+        raz pobranych danych, oraz panel z transkrypcją.
         """
         # Filtrujemy pliki dla panelu "Wczytane". Są to pliki, które zostały już skonwertowane do formatu audio gotowego do transkrypcji.
         files_to_load = [
@@ -71,19 +76,12 @@ class PanelManager:
             if row['is_processed']
         ]
 
-        # Zbieramy gotowe transkrypcje, aby wyświetlić je w głównym panelu tekstowym.
-        transcriptions = [
-            row['transcription']
-            for row in all_files
-            if row['is_processed'] and row['transcription']
-        ]
-
         # Wywołujemy metody `update` na odpowiednich panelach, przekazując im przefiltrowane listy.
         self.app.conversion_status_panel.update_from_list(files_to_load)
         self.app.transcription_queue_panel.update_from_list(files_in_queue)
         self.app.completed_files_panel.update_from_list(processed_files)
-        # Łączymy wszystkie transkrypcje w jeden tekst i aktualizujemy panel wyjściowy.
-        self.app.transcription_output_panel.update_text("\n\n".join(transcriptions))
+        # Treść transkrypcji jest pobierana osobno - tylko tutaj, gdzie jest wyświetlana.
+        self.app.refresh_transcription_display()
 
     def refresh_transcription_progress_views(self, data=None):
         """
@@ -93,7 +91,7 @@ class PanelManager:
         który w tym czasie się nie zmienia.
         """
         try:
-            all_files = data if data is not None else database.get_all_files()
+            all_files = data if data is not None else self.app.get_cached_files_data()
             self._refresh_status_views(all_files)
         except Exception as e:
             print(f"Błąd podczas odświeżania postępu transkrypcji: {e}")
\ No newline at end of file
@@ -6,7 +6,7 @@
 import threading
 from tkinter import messagebox
 from src import database
-from src.services.transcription_service import TranscriptionService
+from src.services import create_transcription_service
 
 class TranscriptionController:
     """
@@ -84,9 +84,9 @@ class TranscriptionController:
             # wykonania metody `on_transcription_progress` w głównym wątku GUI.
             progress_callback = lambda: self.app.after(0, self.app.on_transcription_progress)
 
-            # Tworzymy instancję procesora, przekazując mu obiekt Event do obsługi pauzy
-            # oraz naszą funkcję zwrotną do raportowania postępu.
-            processor = TranscriptionService(
+            # Tworzymy instancję procesora dla silnika wybranego w `config.TRANSCRIPTION_ENGINE`,
+            # przekazując mu obiekt Event do obsługi pauzy oraz naszą funkcję zwrotną do raportowania postępu.
+            processor = create_transcription_service(
                 pause_requested_event=self.app.pause_request_event,
                 on_progress_callback=progress_callback
             )
@@ -110,11 +110,9 @@ class TranscriptionController:
         # Resetujemy referencję do wątku i flagę pauzy.
         self.app.processing_thread = None
         self.app.pause_request_event.clear()
-        # Unieważniamy cache ponieważ dane zostały przetworzone
-        self.app.invalidate_cache()
-        # Optymalizujemy bazę danych po zakończeniu przetwarzania
+        # Zlecamy konserwację bazy danych w tle - wykona się tylko, jeśli przekroczone są progi.
         from src import database
-        database.optimize_database()
+        database.schedule_database_maintenance()
         # Aktualizujemy finalny stan interfejsu.
         self.app.button_state_controller.update_ui_state()
         self.app.refresh_all_views()
\ No newline at end of file
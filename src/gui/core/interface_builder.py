@@ -191,12 +191,17 @@ class InterfaceBuilder:
 
         # Konfiguracja siatki dla nagłówka
         header_frame.grid_columnconfigure(0, weight=1)  # Etykieta rozciąga się
-        header_frame.grid_columnconfigure(1, weight=0)  # Przycisk ma stałą szerokość
+        header_frame.grid_columnconfigure(1, weight=0)  # Postęp konwersji
+        header_frame.grid_columnconfigure(2, weight=0)  # Przycisk ma stałą szerokość
 
         # Etykieta nagłówka
         terminal_label = ctk.CTkLabel(header_frame, text="Terminal", font=ctk.CTkFont(size=12, weight="bold"))
         terminal_label.grid(row=0, column=0, sticky="w")
 
+        # Etykieta z postępem bieżących konwersji (procent, prędkość, ETA)
+        self.app.conversion_progress_label = ctk.CTkLabel(header_frame, text="", font=ctk.CTkFont(size=11))
+        self.app.conversion_progress_label.grid(row=0, column=1, sticky="e", padx=(5, 5))
+
         # Mały przycisk do czyszczenia terminala
         self.app.clear_terminal_button = ctk.CTkButton(
             header_frame,
@@ -206,7 +211,7 @@ class InterfaceBuilder:
             height=20,
             font=ctk.CTkFont(size=10)
         )
-        self.app.clear_terminal_button.grid(row=0, column=1, sticky="e", padx=(5, 0))
+        self.app.clear_terminal_button.grid(row=0, column=2, sticky="e", padx=(5, 0))
 
         # Pole tekstowe z przewijaniem dla terminala
         self.app.terminal_text = ctk.CTkTextbox(
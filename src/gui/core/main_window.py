@@ -5,8 +5,8 @@
 import customtkinter as ctk  # Biblioteka do tworzenia nowoczesnego interfejsu graficznego.
 from tkinter import messagebox  # Standardowy moduł Tkinter do wyświetlania okien dialogowych (np. z potwierdzeniem).
 import threading  # Moduł do pracy z wątkami, kluczowy do wykonywania długich operacji (jak transkrypcja) w tle.
-import time  # Dodane dla cachowania danych
 from src import config, database  # Importujemy nasze własne moduły: konfigurację i bazę danych.
+from src.utils.audio.audio_file_encoding import format_progress_event  # Formatowanie postępu konwersji.
 
 # Importujemy wszystkie komponenty i kontrolery, które będą używane w głównym oknie.
 # Taka struktura (podobna do wzorca MVC - Model-View-Controller) porządkuje kod:
@@ -44,14 +44,20 @@ class App(ctk.CTk):
         # `threading.Event` to prosty mechanizm do komunikacji między wątkami. Używamy go do sygnalizowania pauzy.
         self.pause_request_event = threading.Event()
 
-        # Inicjalizujemy cache dla danych z bazy
+        # Inicjalizujemy cache dla danych z bazy: wiersze listy plików, liczniki i transkrypcje.
+        # Cache odpowiada rewizji danych `_data_revision` i jest uaktualniany tylko wtedy, gdy dane
+        # w bazie się zmieniły (`database.get_changes_since`) - a wiersze listy tylko dla zmienionych plików.
+        self._data_revision = None
         self._cached_files_data = None
-        self._cache_timestamp = 0
-        self._cache_timeout = 2.0  # sekundy
+        self._cached_counts = None
+        self._cached_transcriptions = None
 
         # Inicjalizujemy stan terminala (domyślnie rozwinięty)
         self.terminal_expanded = True
 
+        # Najnowsze zdarzenia postępu trwających konwersji (nazwa pliku -> zdarzenie)
+        self._conversion_progress = {}
+
         # Inicjalizujemy flagę wskazującą czy transkrypcja została już rozpoczęta
         self.transcription_started = False
 
@@ -92,67 +98,72 @@ class App(ctk.CTk):
         self.terminal_redirector.start_redirect()
 
         # Ustawiamy początkowy stan przycisków i odświeżamy widoki.
+        # Odświeżenie widoków wypełnia też panel transkrypcji zgodnie z domyślnym stanem checkboxów.
         self.button_state_controller.update_ui_state()
         self.refresh_all_views()
 
-        # Inicjalizujemy wyświetlanie transkrypcji zgodnie z domyślnym stanem checkboxa
-        self.refresh_transcription_display()
-
         # Uruchamiamy cykliczne sprawdzanie statusu odtwarzania audio.
         self._check_playback_status()
 
+    def _sync_cached_data(self):
+        """Uaktualnia cache danych z bazy według dziennika zmian - pobiera ponownie tylko zmienione wiersze."""
+        revision, changed_paths = database.get_changes_since(self._data_revision)
+        if changed_paths is None:
+            self._cached_files_data = None
+        elif changed_paths and self._cached_files_data is not None:
+            rows = {
+                row['source_file_path']: row for row in self._cached_files_data
+                if row['source_file_path'] not in changed_paths
+            }
+            # Usunięte pliki nie wracają z zapytania, więc znikają z listy.
+            for row in database.get_file_list_rows(changed_paths):
+                rows[row['source_file_path']] = row
+            # Ta sama kolejność co `ORDER BY start_datetime` w SQLite (wartości NULL na początku,
+            # równe wartości w kolejności indeksu, czyli według `id`).
+            self._cached_files_data = sorted(
+                rows.values(), key=lambda row: (row['start_datetime'] is not None, row['start_datetime'] or '', row['id'])
+            )
+        if changed_paths is None or changed_paths:
+            self._cached_counts = None
+            self._cached_transcriptions = None
+        self._data_revision = revision
+
     def get_cached_files_data(self):
-        """Zwraca dane z cache'a lub odświeża jeśli cache jest przestarzały."""
-        current_time = time.time()
-        if self._cached_files_data is None or (current_time - self._cache_timestamp) > self._cache_timeout:
-            self._cached_files_data = database.get_all_files()
-            self._cache_timestamp = current_time
+        """Zwraca wiersze listy plików (bez treści transkrypcji), pobierając z bazy tylko to, co się zmieniło."""
+        self._sync_cached_data()
+        if self._cached_files_data is None:
+            self._cached_files_data = database.get_file_list_rows()
         return self._cached_files_data
 
-    def invalidate_cache(self):
-        """Unieważnia cache gdy dane mogły się zmienić."""
-        self._cached_files_data = None
-
-    def update_all_counters(self, all_files=None):
+    def get_file_status_counts(self):
+        """Zwraca liczniki plików w poszczególnych stanach (`database.get_file_status_counts`)."""
+        self._sync_cached_data()
+        if self._cached_counts is None:
+            self._cached_counts = database.get_file_status_counts(config.MAX_FILE_DURATION_SECONDS * 1000)
+        return self._cached_counts
+
+    def get_cached_transcriptions(self):
+        """Zwraca tag i treść transkrypcji przetworzonych, zaznaczonych plików (`database.get_transcriptions`)."""
+        self._sync_cached_data()
+        if self._cached_transcriptions is None:
+            self._cached_transcriptions = database.get_transcriptions(selected_only=True)
+        return self._cached_transcriptions
+
+    def update_all_counters(self, counts=None):
         """
         Aktualizuje wszystkie etykiety z licznikami plików.
-        Jeśli dane nie są dostarczone (`all_files` jest None), pobiera je z cache'a.
-        W przeciwnym razie, używa istniejących danych, aby uniknąć zbędnych zapytań do bazy.
+        Jeśli liczniki nie są dostarczone (`counts` jest None), pobiera je jednym zapytaniem
+        agregującym (`database.get_file_status_counts`), bez wczytywania wierszy plików.
         """
         try:
-            # Używamy cache'a zamiast bezpośredniego zapytania do bazy
-            if all_files is None:
-                all_files = self.get_cached_files_data()
-
-            # Jedna pętla dla wszystkich obliczeń - optymalizacja wydajności
-            stats = {
-                'total': len(all_files),
-                'selected': 0,
-                'long': 0,
-                'loaded': 0,
-                'processing': 0,
-                'processed': 0
-            }
-
-            max_duration_ms = config.MAX_FILE_DURATION_SECONDS * 1000
-
-            for row in all_files:
-                if row['is_selected']:
-                    stats['selected'] += 1
-                if row['duration_ms'] and row['duration_ms'] > max_duration_ms:
-                    stats['long'] += 1
-                if row['is_loaded']:
-                    stats['loaded'] += 1
-                    if not row['is_processed']:
-                        stats['processing'] += 1
-                if row['is_processed']:
-                    stats['processed'] += 1
+            if counts is None:
+                counts = self.get_file_status_counts()
 
             # Aktualizuj etykiety
-            self.files_counter_label.configure(text=f"Razem: {stats['total']} | Zaznaczone: {stats['selected']} | Długie: {stats['long']}")
-            self.loaded_counter_label.configure(text=f"Wczytane: {stats['loaded']}")
-            self.processing_counter_label.configure(text=f"Kolejka: {stats['processing']}")
-            self.processed_counter_label.configure(text=f"Gotowe: {stats['processed']}")
+            self.files_counter_label.configure(text=f"Razem: {counts['total']} | Zaznaczone: {counts['selected']} | Długie: {counts['long']}")
+            self.loaded_counter_label.configure(text=f"Wczytane: {counts['loaded']}")
+            self.processing_counter_label.configure(text=f"Kolejka: {counts['queued']}")
+            self.processed_counter_label.configure(text=f"Gotowe: {counts['processed']}")
 
         except Exception as e:
             print(f"Błąd podczas aktualizacji liczników: {e}")
@@ -164,10 +175,11 @@ class App(ctk.CTk):
         """
         try:
             all_files = self.get_cached_files_data()
+            counts = self.get_file_status_counts()
             # Przekazujemy pobrane dane do menedżera paneli, liczników i kontrolera przycisków.
             self.panel_manager.refresh_all_views(data=all_files)
-            self.update_all_counters(all_files=all_files)
-            self.button_state_controller.update_ui_state(all_files=all_files)
+            self.update_all_counters(counts=counts)
+            self.button_state_controller.update_ui_state(counts=counts)
         except Exception as e:
             print(f"Błąd podczas pełnego odświeżania: {e}")
 
@@ -186,8 +198,8 @@ class App(ctk.CTk):
         self.transcription_controller.on_processing_finished()
 
         # Sprawdzamy, czy wszystkie zaznaczone pliki zostały przetworzone.
-        all_files = database.get_all_files()
-        is_fully_processed = all_files and all(f['is_processed'] for f in all_files if f['is_selected'])
+        counts = self.get_file_status_counts()
+        is_fully_processed = counts['total'] > 0 and counts['selected_unprocessed'] == 0
 
         if is_fully_processed:
             # Wyświetlamy transkrypcje z uwzględnieniem ustawień checkboxa
@@ -199,14 +211,8 @@ class App(ctk.CTk):
         (czy pokazywać numerację i/lub tagi).
         """
         try:
-            # Pobieramy wszystkie pliki z bazy danych
-            all_files = database.get_all_files()
-
-            # Filtrujemy tylko przetworzone pliki z zaznaczonymi plikami, które mają transkrypcję
-            processed_files = [
-                f for f in all_files
-                if f['is_processed'] and f['is_selected'] and f['transcription']
-            ]
+            # Pobieramy tylko tag i treść transkrypcji przetworzonych, zaznaczonych plików
+            processed_files = self.get_cached_transcriptions()
 
             if not processed_files:
                 self.transcription_output_panel.update_text("")
@@ -271,16 +277,12 @@ class App(ctk.CTk):
                 database.reset_files_table()
                 # Czyścimy wszystkie pliki tymczasowe
                 cleanup_all_temp_files()
-                # Optymalizujemy bazę danych po wyczyszczeniu
-                database.optimize_database()
-                # Unieważniamy cache ponieważ dane zostały wyczyszczone
-                self.invalidate_cache()
+                # Zlecamy w tle konserwację bazy danych (zwolnienie miejsca po usuniętych danych).
+                database.schedule_database_maintenance()
                 # Resetujemy flagę rozpoczęcia transkrypcji
                 self.transcription_started = False
-                # Odświeżamy wszystkie widoki, aby odzwierciedliły pusty stan.
+                # Odświeżamy wszystkie widoki (razem z panelem transkrypcji), aby odzwierciedliły pusty stan.
                 self.refresh_all_views()
-                # Czyścimy również główny panel z transkrypcją.
-                self.refresh_transcription_display()
 
                 messagebox.showinfo("Reset zakończony", "Aplikacja została zresetowana.")
             except Exception as e:
@@ -293,16 +295,35 @@ class App(ctk.CTk):
         """
         try:
             # Pobieramy świeże dane i aktualizujemy tylko te widoki, które pokazują postęp.
-            all_files = database.get_all_files()
+            # Panel transkrypcji jest odświeżany razem z panelami statusu.
+            all_files = self.get_cached_files_data()
+            counts = self.get_file_status_counts()
             self.panel_manager.refresh_transcription_progress_views(data=all_files)
-            self.update_all_counters(all_files=all_files)
-            self.button_state_controller.update_ui_state(all_files=all_files)
-
-            # Odświeżamy również panel transkrypcji z uwzględnieniem ustawień checkboxa
-            self.refresh_transcription_display()
+            self.update_all_counters(counts=counts)
+            self.button_state_controller.update_ui_state(counts=counts)
         except Exception as e:
             print(f"Błąd w trakcie aktualizacji postępu: {e}")
 
+    def on_conversion_progress(self, event):
+        """
+        Funkcja zwrotna wywoływana (w głównym wątku GUI) ze zdarzeniem postępu konwersji FFmpeg.
+        Pokazuje w nagłówku terminala liczbę trwających konwersji oraz postęp najwolniejszej z nich.
+        """
+        if event['done']:
+            self._conversion_progress.pop(event['file'], None)
+        else:
+            self._conversion_progress[event['file']] = event
+
+        if not self._conversion_progress:
+            self.conversion_progress_label.configure(text="")
+            return
+
+        # Najdłuższy pozostały czas wyznacza moment zakończenia bieżących konwersji.
+        slowest = max(self._conversion_progress.values(), key=lambda e: e['eta_seconds'] or 0)
+        self.conversion_progress_label.configure(
+            text=f"Konwersja ({len(self._conversion_progress)}): {format_progress_event(slowest)}"
+        )
+
     def copy_transcription_to_clipboard(self):
         """Kopiuje zawartość panelu wyjściowego do schowka systemowego."""
         text = self.transcription_output_panel.get_text()
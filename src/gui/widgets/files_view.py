@@ -38,7 +38,12 @@ class FilesView(ctk.CTkFrame):
         self.scrollable_frame.grid(row=1, column=0, sticky="nsew", padx=8, pady=8)
 
         # Tworzymy nagłówki kolumn, aby użytkownik wiedział, co oznaczają dane kolumny.
-        header_checkbox = ctk.CTkLabel(self.scrollable_frame, text="", width=config.COLUMN_CHECKBOX_WIDTH)
+        # Checkbox w nagłówku zaznacza lub odznacza wszystkie pliki naraz.
+        self.select_all_var = ctk.BooleanVar(value=False)
+        header_checkbox = ctk.CTkCheckBox(
+            self.scrollable_frame, text="", width=config.COLUMN_CHECKBOX_WIDTH, variable=self.select_all_var,
+            command=self.on_select_all_toggle
+        )
         header_checkbox.grid(row=0, column=0, padx=(5,0), pady=2)
         header_type = ctk.CTkLabel(self.scrollable_frame, text="", width=config.COLUMN_TYPE_WIDTH, anchor="center")
         header_type.grid(row=0, column=1, padx=5, pady=2)
@@ -79,6 +84,8 @@ class FilesView(ctk.CTkFrame):
         # Najpierw czyścimy stary widok
         self.clear_view()
 
+        # Checkbox w nagłówku jest zaznaczony, gdy zaznaczone są wszystkie pliki.
+        self.select_all_var.set(bool(files_data) and all(file_row['is_selected'] for file_row in files_data))
         if not files_data:
             return
 
@@ -141,14 +148,28 @@ class FilesView(ctk.CTkFrame):
         Aktualizuje stan zaznaczenia w bazie danych.
         """
         database.set_file_selected(file_path, var.get())
-        # Unieważniamy cache ponieważ dane zostały zmienione
-        self.master.invalidate_cache()
+        self.select_all_var.set(all(checkbox.get() for checkbox, _, _, _, _, _ in self.file_widgets))
         # `self.master` odnosi się do rodzica tego widżetu, czyli głównego okna aplikacji `App`.
         # Wywołujemy metodę z głównego okna, aby zaktualizować liczniki.
         self.master.update_all_counters()
         # Aktualizujemy również stan przycisków, ponieważ zależy on od zaznaczonych plików
         self.master.button_state_controller.update_ui_state()
 
+    def on_select_all_toggle(self):
+        """
+        Funkcja zwrotna checkboxa w nagłówku. Zaznacza lub odznacza wszystkie wyświetlane pliki
+        jednym zapisem do bazy danych (`set_files_selected`) zamiast osobnego zapisu dla każdego pliku.
+        """
+        is_selected = self.select_all_var.get()
+        database.set_files_selected([file_path for _, file_path, _, _, _, _ in self.file_widgets], is_selected)
+        for checkbox, _, _, _, _, _ in self.file_widgets:
+            if is_selected:
+                checkbox.select()
+            else:
+                checkbox.deselect()
+        self.master.update_all_counters()
+        self.master.button_state_controller.update_ui_state()
+
     def on_delete_button_click(self, file_path):
         """Obsługuje kliknięcie przycisku usuwania."""
         filename = os.path.basename(file_path)
@@ -157,8 +178,6 @@ class FilesView(ctk.CTkFrame):
         if answer:
             # Jeśli użytkownik się zgodził, usuwamy plik z bazy (i z dysku).
             database.delete_file(file_path)
-            # Unieważniamy cache ponieważ dane zostały zmienione
-            self.master.invalidate_cache()
             # Odświeżamy wszystkie widoki, aby usunięty plik zniknął z interfejsu.
             self.master.refresh_all_views()
 
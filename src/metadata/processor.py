@@ -4,7 +4,9 @@ import os
 from datetime import datetime, timedelta
 from .formatter import _create_file_tag
 from src import database, config
-from src.utils.audio.duration_checker import get_file_duration
+from src.utils.audio.audio_chunker import needs_chunking
+from src.utils.audio.duration_checker import get_media_infos
+from src.utils.audio.media_probe import codec_for_storage
 from src.utils.error_handlers import with_error_handling, measure_performance
 
 @with_error_handling("Przetwarzanie metadanych")
@@ -15,6 +17,12 @@ def process_and_update_all_metadata(allow_long=False):
     Wczytuje pliki bez metadanych, sortuje je w pamięci wg daty modyfikacji,
     oblicza wszystkie metadane (w tym flagę `is_selected`), zapisuje je masowo do bazy
     i zwraca listę plików, które przekraczają limit długości.
+    Nagrania, które zostaną podzielone na fragmenty (`needs_chunking`), nie są traktowane jako za długie.
+    Wyniki analizy plików (`get_media_infos`) są pobierane zbiorczo: zapisane wcześniej odczytujemy
+    jednym zapytaniem, a pozostałe pliki analizujemy równolegle i zapisujemy jedną transakcją.
+    Oprócz długości zapisujemy parametry ścieżki audio, z których korzysta później konwersja.
+    Analizy są zbierane przed przebiegiem, który układa pliki w kolejności i wylicza przerwy
+    (`previous_ms`), więc wynik jest taki sam jak przy analizie plik po pliku.
     """
     print("\n--- Rozpoczynam centralne przetwarzanie metadanych ---")
 
@@ -26,7 +34,10 @@ def process_and_update_all_metadata(allow_long=False):
     try:
         files_with_mtime = []
         for file_row in files_to_process:
-            mtime = os.path.getmtime(file_row['source_file_path'])
+            # Skaner folderów zapisuje czas modyfikacji przy dodawaniu pliku - nie trzeba ponownie odpytywać dysku.
+            mtime = file_row['source_mtime']
+            if mtime is None:
+                mtime = os.path.getmtime(file_row['source_file_path'])
             files_with_mtime.append({**file_row, 'mtime': mtime})
 
         sorted_files = sorted(files_with_mtime, key=lambda x: x['mtime'])
@@ -38,9 +49,12 @@ def process_and_update_all_metadata(allow_long=False):
     long_files = []
     previous_end_datetime = None
 
+    all_media_info = get_media_infos([file_info['source_file_path'] for file_info in sorted_files])
+
     for file_info in sorted_files:
+        media_info = all_media_info[file_info['source_file_path']]
         start_dt = datetime.fromtimestamp(file_info['mtime'])
-        duration_sec = get_file_duration(file_info['source_file_path'])
+        duration_sec = media_info.get('duration_sec') or 0.0
         duration_ms = int(duration_sec * 1000)
         end_dt = start_dt + timedelta(milliseconds=duration_ms)
 
@@ -51,7 +65,8 @@ def process_and_update_all_metadata(allow_long=False):
 
         previous_end_datetime = end_dt
 
-        is_long = duration_sec > config.MAX_FILE_DURATION_SECONDS
+        # Nagrania dzielone na fragmenty mieszczą się w limicie długości - nie wymagają flagi `-l`.
+        is_long = duration_sec > config.MAX_FILE_DURATION_SECONDS and not needs_chunking(duration_ms)
         if is_long:
             long_files.append(os.path.basename(file_info['source_file_path']))
 
@@ -62,12 +77,17 @@ def process_and_update_all_metadata(allow_long=False):
 
         all_metadata_to_update.append({
             'id': file_info['id'],
+            'source_file_path': file_info['source_file_path'],
             'start_datetime': start_dt.strftime('%Y-%m-%d %H:%M:%S'),
             'duration_ms': duration_ms,
             'end_datetime': end_dt.strftime('%Y-%m-%d %H:%M:%S.%f')[:-3],
             'previous_ms': previous_ms,
             'is_selected': is_selected,
-            'tag': tag
+            'tag': tag,
+            'audio_codec': codec_for_storage(media_info),
+            'audio_channels': media_info.get('channels'),
+            'audio_sample_rate': media_info.get('sample_rate'),
+            'audio_bit_rate': media_info.get('bit_rate')
         })
 
     if all_metadata_to_update:
@@ -1 +1,27 @@
 # Services module - contains business logic services
+
+from src import config
+
+# Dostępne silniki transkrypcji (wartości `config.TRANSCRIPTION_ENGINE` i flagi `--engine`).
+TRANSCRIPTION_ENGINES = ("threads", "asyncio")
+
+def create_transcription_service(engine=None, **kwargs):
+    """
+    Tworzy serwis transkrypcji dla wybranego silnika.
+
+    Argumenty:
+        engine (str, opcjonalnie): "threads" lub "asyncio". Domyślnie `config.TRANSCRIPTION_ENGINE`.
+        **kwargs: Argumenty przekazywane do konstruktora serwisu
+                  (`pause_requested_event`, `on_progress_callback`, `max_workers`).
+    """
+    engine = engine or config.TRANSCRIPTION_ENGINE
+    if engine not in TRANSCRIPTION_ENGINES:
+        raise ValueError(f"Nieznany silnik transkrypcji: {engine}")
+
+    # Importy wewnątrz funkcji, aby nie ładować niepotrzebnie obu silników.
+    if engine == "asyncio":
+        from .async_transcription_service import AsyncTranscriptionService
+        return AsyncTranscriptionService(**kwargs)
+
+    from .transcription_service import TranscriptionService
+    return TranscriptionService(**kwargs)
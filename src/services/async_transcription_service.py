@@ -0,0 +1,157 @@
+# Ten moduł definiuje klasę `AsyncTranscriptionService` - alternatywny silnik transkrypcji
+# oparty na `asyncio` i asynchronicznym kliencie `AsyncOpenAI`.
+# Wszystkie zapytania do API są obsługiwane przez jedną pętlę zdarzeń w jednym wątku,
+# więc nawet setki jednoczesnych wysyłek kosztują tylko setki lekkich korutyn,
+# a nie setki wątków systemowych. Wyniki trafiają do bazy danych przez jedną
+# korutynę zapisującą (single writer), dzięki czemu zapisy nigdy się nie przeplatają.
+# Cała blokująca praca (odczyty bazy, skróty nagrań, ponowne dzielenie plików i zapisy wyników)
+# odbywa się w jednym wątku pomocniczym, aby nie wstrzymywać wysyłek obsługiwanych przez pętlę.
+
+import asyncio  # Standardowa biblioteka do programowania asynchronicznego.
+from concurrent.futures import ThreadPoolExecutor  # Wątek pomocniczy na blokującą pracę.
+from src import database  # Transakcja grupująca zapisy wyników.
+from src.services.openai_client import create_async_openai_client  # Klient AsyncOpenAI z pulą keep-alive.
+from src.services.transcription_service import TranscriptionService  # Bazowy serwis transkrypcji.
+
+
+class AsyncTranscriptionService(TranscriptionService):
+    """
+    Silnik transkrypcji działający w jednej pętli zdarzeń `asyncio`.
+    Dziedziczy po `TranscriptionService` całą logikę wyboru i walidacji plików
+    oraz zapisu wyników, a podmienia jedynie sposób wysyłania zapytań do API.
+    """
+
+    def _run_transcriptions(self, files_to_process):
+        """
+        Uruchamia pętlę zdarzeń i czeka na przetworzenie wszystkich plików.
+        `asyncio.run` tworzy nową pętlę, więc metoda działa poprawnie zarówno w głównym
+        wątku CLI, jak i w wątku roboczym GUI.
+        """
+        print(f"Transkrypcja {len(files_to_process)} plików (asyncio, równolegle: {self.max_workers})...")
+        asyncio.run(self._run_transcriptions_async(files_to_process))
+
+    async def _run_transcriptions_async(self, files_to_process):
+        """
+        Wysyła pliki do API jako korutyny, ograniczając liczbę zapytań w locie.
+        Limit jest adaptacyjny - po odpowiedzi 429 ogranicznik zapytań go obniża,
+        a udane zapytania stopniowo odbudowują go do `max_workers`.
+        Ukończone wyniki są przekazywane przez kolejkę do jednej korutyny zapisującej.
+        """
+        # Warunek (Condition) z licznikiem zapytań w locie zastępuje stały semafor,
+        # ponieważ dozwolona liczba miejsc zmienia się w trakcie działania.
+        slots = asyncio.Condition()
+        self._in_flight = 0
+        # Kolejka wyników - jedynym jej konsumentem jest `_result_writer`.
+        results = asyncio.Queue()
+        tasks = []
+
+        # Zadania (całe pliki lub fragmenty długich nagrań) są tworzone leniwie.
+        pending_jobs = self._iter_jobs(files_to_process)
+
+        # Jeden wątek pomocniczy przygotowuje zadania i zapisuje wyniki - tak jak wątek koordynujący
+        # silnika wątkowego, więc ta praca nigdy nie biegnie równolegle sama ze sobą.
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="transcription-io") as blocking:
+            writer = asyncio.create_task(self._result_writer(results, blocking))
+
+            try:
+                # Jeden klient (i jedna pula połączeń) na całą paczkę plików.
+                async with create_async_openai_client(max_connections=self.max_workers) as client:
+                    try:
+                        await self._dispatch_jobs(client, slots, results, pending_jobs, blocking, tasks)
+                    finally:
+                        # Czekamy, aż wszystkie rozpoczęte zapytania się zakończą - także po błędzie, aby ich
+                        # wyniki trafiły do kolejki. Błąd jednego zadania nie przerywa pozostałych.
+                        await asyncio.gather(*tasks, return_exceptions=True)
+            finally:
+                # `None` sygnalizuje korutynie zapisującej, że nie będzie więcej wyników. Wysyłamy go
+                # także po błędzie, aby opłacone już transkrypcje zostały zapisane przed jego zgłoszeniem.
+                await results.put(None)
+                await writer
+
+    async def _dispatch_jobs(self, client, slots, results, pending_jobs, blocking, tasks):
+        """
+        Przygotowuje kolejne zadania (w wątku pomocniczym `blocking`) i uruchamia dla nich korutyny wysyłające,
+        dopóki nie skończą się pliki albo nie pojawi się żądanie pauzy. Uruchomione korutyny dopisuje do `tasks`.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            # Rezerwujemy wolne miejsce, zanim przygotujemy kolejne zadanie. Dzięki temu
+            # pauza zatrzymuje wysyłanie najpóźniej po zwolnieniu jednego miejsca.
+            async with slots:
+                await slots.wait_for(self._has_free_slot)
+                if self._is_pause_requested():
+                    break
+                self._in_flight += 1
+
+            job = await loop.run_in_executor(blocking, next, pending_jobs, None)
+            if job is None or job['from_cache']:
+                await self._release_slot(slots)
+                if job is None:
+                    break
+                # Wynik z pamięci podręcznej nie wymaga zapytania - trafia prosto do korutyny zapisującej.
+                await results.put((job, job['cached_text']))
+                continue
+
+            tasks.append(asyncio.create_task(
+                self._transcribe_file_async(client, slots, results, job)
+            ))
+
+    def _has_free_slot(self):
+        """Sprawdza, czy liczba zapytań w locie mieści się w bieżącym (adaptacyjnym) limicie."""
+        return self._in_flight < self.whisper_service.rate_limiter.concurrency.limit(self.max_workers)
+
+    async def _release_slot(self, slots):
+        """Zwalnia miejsce i budzi korutynę czekającą na wysłanie kolejnego pliku."""
+        async with slots:
+            self._in_flight -= 1
+            slots.notify_all()
+
+    async def _transcribe_file_async(self, client, slots, results, job):
+        """
+        Wysyła jedno zadanie (plik lub fragment) do API i wkłada wynik (lub None przy błędzie)
+        do kolejki wyników. Zawsze zwalnia miejsce, nawet jeśli zapytanie się nie powiodło.
+        """
+        transcription_text = None
+        try:
+            print(f"  Przetwarzanie pliku: {self._job_label(job)}")
+            transcript = await self.whisper_service.transcribe_async(
+                client, job['audio_path'], audio_seconds=job['audio_seconds'], audio_bytes=job['audio_bytes']
+            )
+            if transcript and hasattr(transcript, 'text'):
+                transcription_text = transcript.text
+        except Exception as e:
+            # Tak jak w silniku wątkowym: błąd jednego pliku daje wynik None, a nie przerywa całego przebiegu.
+            print(f"    BŁĄD: Nieoczekiwany błąd podczas transkrypcji {self._job_label(job)}: {e}")
+        finally:
+            await self._release_slot(slots)
+
+        await results.put((job, transcription_text))
+
+    async def _result_writer(self, results, blocking):
+        """
+        Jedyna korutyna zapisująca do bazy danych. Odbiera wyniki z kolejki
+        i zapisuje je w kolejności ukończenia, aż otrzyma znacznik końca (`None`).
+        Wszystkie wyniki, które czekają już w kolejce, są zapisywane w jednej transakcji
+        w wątku pomocniczym `blocking` - pętla zdarzeń w tym czasie obsługuje dalej wysyłki.
+        """
+        loop = asyncio.get_running_loop()
+        finished = False
+        while not finished:
+            items = [await results.get()]
+            while not results.empty():
+                items.append(results.get_nowait())
+            if items[-1] is None:
+                items.pop()
+                finished = True
+            if items:
+                await loop.run_in_executor(blocking, self._write_results, items)
+
+    def _write_results(self, items):
+        """Zapisuje paczkę wyników (pary (zadanie, tekst)) w jednej transakcji i po jej zatwierdzeniu powiadamia GUI."""
+        with database.transaction():
+            for job, transcription_text in items:
+                try:
+                    self._complete_job(job, transcription_text)
+                except Exception as e:
+                    print(f"    BŁĄD: Nie udało się zapisać transkrypcji {self._job_label(job)}: {e}")
+        self._notify_progress()
@@ -0,0 +1,100 @@
+# Ten moduł jest rejestrem klientów OpenAI współdzielonych w całym procesie.
+# Zamiast tworzyć nowego klienta (a wraz z nim nową pulę połączeń HTTP i nowy
+# handshake TLS) dla każdego pliku, wszystkie transkrypcje korzystają z jednego
+# klienta, którego połączenia są utrzymywane przy życiu (keep-alive) i używane ponownie.
+
+import os  # Moduł do odczytu zmiennych środowiskowych (klucz API).
+import threading  # Blokada chroniąca tworzenie współdzielonego klienta.
+import httpx  # Biblioteka HTTP używana wewnętrznie przez klienta OpenAI.
+from dotenv import load_dotenv  # Funkcja do wczytywania zmiennych z pliku .env.
+from openai import OpenAI, AsyncOpenAI, DefaultHttpxClient, DefaultAsyncHttpxClient
+from src import config  # Importujemy nasz plik konfiguracyjny.
+
+# `load_dotenv()` szuka w głównym folderze projektu pliku `.env` i udostępnia
+# zdefiniowane w nim zmienne (np. API_KEY_WHISPER="sk-...") jako zmienne środowiskowe.
+load_dotenv()
+
+# Singleton współdzielonego klienta synchronicznego.
+_client = None
+_client_lock = threading.Lock()
+
+
+def _build_limits(max_connections=None):
+    """Zwraca limity puli połączeń HTTP zgodne z ustawieniami w `config`."""
+    max_connections = max_connections or config.OPENAI_MAX_CONNECTIONS
+    return httpx.Limits(
+        max_connections=max_connections,
+        max_keepalive_connections=min(max_connections, config.OPENAI_MAX_KEEPALIVE_CONNECTIONS),
+        keepalive_expiry=config.OPENAI_KEEPALIVE_EXPIRY_SECONDS
+    )
+
+
+def get_openai_client():
+    """
+    Zwraca współdzielonego, synchronicznego klienta OpenAI (tworzy go przy pierwszym wywołaniu).
+    Klient jest bezpieczny wątkowo, więc może być używany jednocześnie przez wszystkie wątki puli transkrypcji.
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            # Podwójne sprawdzenie (double-checked locking) na wypadek, gdyby wiele wątków czekało na blokadę.
+            if _client is None:
+                _client = OpenAI(
+                    api_key=os.getenv("API_KEY_WHISPER"),
+                    # Ponawianiem zapytań zajmuje się `WhisperService` razem ze współdzielonym
+                    # ogranicznikiem zapytań, dlatego wyłączamy wbudowane ponowienia klienta.
+                    max_retries=0,
+                    http_client=DefaultHttpxClient(limits=_build_limits())
+                )
+    return _client
+
+
+def create_async_openai_client(max_connections=None):
+    """
+    Tworzy asynchronicznego klienta OpenAI z pulą połączeń keep-alive.
+
+    Klient asynchroniczny jest związany z pętlą zdarzeń, w której działa, dlatego nie jest
+    przechowywany globalnie - silnik asyncio tworzy jednego klienta na całą paczkę plików
+    i zamyka go po jej zakończeniu.
+
+    Argumenty:
+        max_connections (int, opcjonalnie): Maksymalna liczba jednoczesnych połączeń.
+                                            Domyślnie `config.OPENAI_MAX_CONNECTIONS`.
+    """
+    return AsyncOpenAI(
+        api_key=os.getenv("API_KEY_WHISPER"),
+        max_retries=0,
+        http_client=DefaultAsyncHttpxClient(limits=_build_limits(max_connections))
+    )
+
+
+def warm_up_openai_client(background=True):
+    """
+    "Rozgrzewa" współdzielonego klienta: tworzy go i wykonuje lekkie zapytanie
+    (pobranie informacji o modelu), aby nawiązać połączenie i handshake TLS
+    jeszcze przed pierwszą transkrypcją.
+
+    Argumenty:
+        background (bool): Jeśli True, rozgrzewanie odbywa się w wątku w tle i nie blokuje startu aplikacji.
+    """
+    def _warm_up():
+        try:
+            get_openai_client().models.retrieve(config.WHISPER_API_MODEL)
+            print("Połączenie z API OpenAI zostało nawiązane.")
+        except Exception as e:
+            # Rozgrzewanie jest tylko optymalizacją - błąd nie może przerwać działania aplikacji.
+            print(f"OSTRZEŻENIE: Nie udało się rozgrzać połączenia z API OpenAI: {e}")
+
+    if background:
+        threading.Thread(target=_warm_up, daemon=True).start()
+    else:
+        _warm_up()
+
+
+def close_openai_client():
+    """Zamyka współdzielonego klienta i jego pulę połączeń (np. przy zamykaniu aplikacji)."""
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+            _client = None
@@ -0,0 +1,200 @@
+# Ten moduł definiuje klasę `TranscriptionPipeline` - tryb potokowy (producent/konsument),
+# w którym konwersja i transkrypcja nakładają się w czasie. Zamiast czekać, aż FFMPEG
+# przekonwertuje wszystkie pliki, każdy plik trafia do transkrypcji zaraz po swojej konwersji.
+# Dzięki temu sieć nie stoi bezczynnie podczas konwersji, a procesor - podczas wysyłania,
+# a pierwsza transkrypcja jest gotowa już po jednej konwersji, a nie po wszystkich.
+
+import os  # Moduł do operacji na ścieżkach plików.
+from collections import deque  # Kolejka przekonwertowanych plików oczekujących na transkrypcję.
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED  # Pule wątków obu etapów.
+from src import config, database  # Importujemy konfigurację i moduł do operacji na bazie danych.
+from src.services.transcription_service import TranscriptionService  # Etap transkrypcji.
+from src.utils.audio.audio_file_encoding import _convert_single_file, get_conversion_workers, ConversionProgressReporter, encode_to_memory, get_tmp_file_path  # Konwersja plików.
+from src.utils.audio.media_probe import media_info_from_row  # Zapisane wyniki analizy plików.
+from src.utils.audio import split_audio_file, needs_chunking  # Dzielenie długich nagrań.
+from src.utils.audio.audio_cache import ConvertedAudioCache  # Magazyn przekonwertowanych plików.
+from src.utils.error_handlers import with_error_handling, measure_performance  # Dekoratory
+
+
+class TranscriptionPipeline:
+    """
+    Łączy konwersję i transkrypcję w jeden potok z dwiema pulami wątków.
+
+    Kolejka między etapami jest ograniczona (`PIPELINE_QUEUE_SIZE`): nowe konwersje są
+    zlecane tylko wtedy, gdy liczba plików w konwersji i oczekujących na transkrypcję
+    mieści się w limicie. Gdy API jest wolniejsze niż FFMPEG, konwersja zwalnia
+    (backpressure), zamiast zapełniać dysk plikami, na które jeszcze nie ma miejsca w puli.
+
+    Wszystkie zapisy do bazy danych wykonuje wątek koordynujący - tak samo jak w `TranscriptionService`.
+
+    W trybie strumieniowym (`stream=True`) FFMPEG zapisuje wynik konwersji do potoku, a nagranie
+    trafia z pamięci prosto do zapytania API - bez zapisu i ponownego odczytu pliku tymczasowego.
+    Plik powstaje tylko wtedy, gdy jest potrzebny później: po nieudanej transkrypcji albo pauzie.
+    Długie nagrania, które trzeba podzielić na fragmenty, są nadal konwertowane na dysk.
+    """
+
+    def __init__(self, transcription_service=None, conversion_workers=None, queue_size=None, stream=None):
+        """
+        Argumenty:
+            transcription_service (TranscriptionService, opcjonalnie): Serwis wykonujący etap transkrypcji.
+            conversion_workers (int, opcjonalnie): Liczba równoległych konwersji FFMPEG.
+                                                   Domyślnie `config.PIPELINE_CONVERSION_WORKERS`
+                                                   lub liczba rdzeni procesora.
+            queue_size (int, opcjonalnie): Maksymalna liczba plików w konwersji i oczekujących na transkrypcję.
+                                           Domyślnie `config.PIPELINE_QUEUE_SIZE`.
+            stream (bool, opcjonalnie): Konwersja do pamięci zamiast do plików tymczasowych.
+                                        Domyślnie `config.PIPELINE_STREAMING`.
+        """
+        self.service = transcription_service or TranscriptionService()
+        self.conversion_workers = get_conversion_workers(conversion_workers or config.PIPELINE_CONVERSION_WORKERS)
+        self.queue_size = max(1, queue_size or config.PIPELINE_QUEUE_SIZE)
+        self.progress_reporter = ConversionProgressReporter()
+        self.audio_cache = ConvertedAudioCache()
+        self.stream = config.PIPELINE_STREAMING if stream is None else stream
+
+    def _convert(self, source_path, duration_ms, media_info):
+        """
+        Etap konwersji wykonywany w wątku roboczym: konwertuje plik, a długie nagrania
+        od razu dzieli na fragmenty. Nie dotyka bazy danych.
+
+        Zwraca:
+            tuple lub None: (ścieżka tymczasowa, lista fragmentów, nagranie w pamięci lub None)
+                            albo None przy błędzie konwersji.
+        """
+        if self.stream and not needs_chunking(duration_ms):
+            audio_bytes = encode_to_memory(source_path, media_info)
+            return (get_tmp_file_path(source_path), [], audio_bytes) if audio_bytes is not None else None
+
+        result = _convert_single_file(source_path, media_info, self.progress_reporter, self.audio_cache)
+        if not result:
+            return None
+        _, tmp_path = result
+        chunks = split_audio_file(source_path, tmp_path, duration_ms) if needs_chunking(duration_ms) else []
+        return tmp_path, chunks, None
+
+    def _on_converted(self, source_path, future, ready_files, allow_long):
+        """Zapisuje wynik konwersji w bazie danych i przekazuje plik do kolejki transkrypcji."""
+        try:
+            result = future.result()
+        except Exception as e:
+            print(f"    BŁĄD: Nieoczekiwany błąd podczas konwersji {os.path.basename(source_path)}: {e}")
+            result = None
+        if result is None:
+            print(f"    ✗ Nie udało się przetworzyć: {os.path.basename(source_path)}")
+            return
+
+        tmp_path, chunks, audio_bytes = result
+        database.set_files_as_loaded([source_path], [tmp_path])
+        if chunks:
+            database.add_file_chunks(source_path, chunks)
+        if audio_bytes is not None:
+            # Serwis transkrypcji wyśle nagranie z pamięci zamiast czytać plik tymczasowy.
+            self.service._audio_buffers[source_path] = audio_bytes
+        print(f"    ✓ Przetworzono i dodano do bazy: {os.path.basename(source_path)}")
+
+        if self.service._accepts_file(source_path, allow_long):
+            ready_files.append(source_path)
+
+    def _run_stages(self, files_to_encode, ready_files, allow_long):
+        """
+        Pętla potoku: zleca konwersje i transkrypcje w obu pulach i zapisuje ich wyniki w bazie danych,
+        dopóki wszystko nie zostanie przetworzone albo nie pojawi się żądanie pauzy.
+        """
+        pending_conversions = iter(files_to_encode)
+        # Zadania transkrypcji bieżącego pliku (całość albo jego fragmenty).
+        pending_jobs = iter(())
+        conversions_in_flight = {}
+        transcriptions_in_flight = {}
+
+        with ThreadPoolExecutor(max_workers=self.conversion_workers, thread_name_prefix="ffmpeg") as conversion_pool, \
+                ThreadPoolExecutor(max_workers=self.service.max_workers, thread_name_prefix="whisper") as transcription_pool:
+            while True:
+                paused = self.service._is_pause_requested()
+
+                # Etap 1: zlecamy konwersje, dopóki kolejka między etapami ma wolne miejsce.
+                while not paused and len(conversions_in_flight) + len(ready_files) < self.queue_size:
+                    source_path = next(pending_conversions, None)
+                    if source_path is None:
+                        break
+                    media_row = database.get_media_info(source_path)
+                    duration_ms = media_row['duration_ms'] if media_row else None
+                    future = conversion_pool.submit(self._convert, source_path, duration_ms, media_info_from_row(media_row))
+                    conversions_in_flight[future] = source_path
+
+                # Etap 2: dopełniamy pulę transkrypcji zadaniami z przekonwertowanych plików.
+                # Zadania są przygotowywane poza transakcją, a trafienia w pamięci podręcznej zapisujemy paczkami.
+                limit = self.service.whisper_service.rate_limiter.concurrency.limit(self.service.max_workers)
+                cached_results = []
+                while not paused and len(transcriptions_in_flight) < limit:
+                    job = next(pending_jobs, None)
+                    if job is None:
+                        if not ready_files:
+                            break
+                        pending_jobs = self.service._iter_jobs([ready_files.popleft()])
+                        continue
+                    if job['from_cache']:
+                        cached_results.append((job, job['cached_text']))
+                        if len(cached_results) >= limit:
+                            self.service._complete_jobs(cached_results)
+                            cached_results = []
+                        continue
+                    future = transcription_pool.submit(self.service._transcribe_file, job)
+                    transcriptions_in_flight[future] = job
+                self.service._complete_jobs(cached_results)
+                self.service._notify_progress()
+
+                # Nic nie jest w toku - albo wszystko zostało przetworzone, albo zażądano pauzy.
+                if not conversions_in_flight and not transcriptions_in_flight:
+                    break
+
+                done, _ = wait([*conversions_in_flight, *transcriptions_in_flight], return_when=FIRST_COMPLETED)
+                # Wyniki wszystkich ukończonych zadań trafiają do bazy w jednej transakcji,
+                # a GUI jest powiadamiane dopiero po jej zatwierdzeniu.
+                with database.transaction():
+                    for future in done:
+                        if future in conversions_in_flight:
+                            self._on_converted(conversions_in_flight.pop(future), future, ready_files, allow_long)
+                            continue
+                        job = transcriptions_in_flight.pop(future)
+                        self.service._complete_job(job, self.service._job_result(job, future))
+                self.service._notify_progress()
+
+    @with_error_handling("Potok konwersji i transkrypcji")
+    @measure_performance
+    def run(self, allow_long=False):
+        """
+        Uruchamia potok: konwertuje zaznaczone pliki i transkrybuje każdy z nich zaraz po konwersji.
+        Pliki przekonwertowane wcześniej (np. przed przerwaniem) trafiają od razu do transkrypcji.
+
+        Argumenty:
+            allow_long (bool): Jeśli True, przetwarza również długie pliki.
+        """
+        print("\nKrok 2-3: Konwersja i transkrypcja w trybie potokowym...")
+
+        files_to_encode = database.get_files_to_load()
+        # Pliki już przekonwertowane, ale bez transkrypcji, nie czekają na żadną konwersję.
+        ready_files = deque(
+            source_path for source_path in database.get_files_to_process()
+            if self.service._accepts_file(source_path, allow_long)
+        )
+        if not files_to_encode and not ready_files:
+            print("Brak plików do konwersji i transkrypcji.")
+            return
+
+        os.makedirs(config.AUDIO_TMP_DIR, exist_ok=True)
+        print(f"Do konwersji: {len(files_to_encode)} | gotowe do transkrypcji: {len(ready_files)} | "
+              f"konwersje równolegle: {self.conversion_workers} | transkrypcje równolegle: {self.service.max_workers}")
+
+        try:
+            self._run_stages(files_to_encode, ready_files, allow_long)
+        finally:
+            # Nagrania z pamięci, które nie trafiły do transkrypcji (np. przez pauzę albo błąd przerywający potok),
+            # zapisujemy na dysk - są już oznaczone jako wczytane, więc bez pliku nie zostałyby przetworzone.
+            self.service._spill_audio_buffers()
+        if self.service._is_pause_requested():
+            print("Żądanie pauzy wykryte. Zatrzymano przetwarzanie...")
+        if self.audio_cache.enabled:
+            print(self.audio_cache.summary())
+        if self.service.cache.enabled:
+            print(self.service.cache.summary())
+        print("\nZakończono potok konwersji i transkrypcji.")
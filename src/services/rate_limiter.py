@@ -0,0 +1,212 @@
+# Ten moduł zawiera ogranicznik zapytań (rate limiter) dla API Whisper, współdzielony
+# przez wszystkie wątki i korutyny wysyłające pliki. Składa się z trzech elementów:
+# - dwóch "wiaderek z żetonami" (token bucket): zapytania na minutę i sekundy audio na minutę,
+# - adaptacyjnego limitu współbieżności, który zmniejsza się po odpowiedzi 429 i powoli odbudowuje,
+# - funkcji pomocniczych do ponawiania zapytań z wykładniczym opóźnieniem (backoff) i losowym
+#   rozrzutem (jitter), które respektują nagłówek `Retry-After` zwracany przez API.
+
+import random  # Losowy rozrzut opóźnień, aby wątki nie ponawiały zapytań w tej samej chwili.
+import threading  # Blokady chroniące współdzielony stan.
+import time  # Pomiar upływu czasu i usypianie wątków.
+from email.utils import parsedate_to_datetime  # Parsowanie `Retry-After` w formacie daty HTTP.
+import openai  # Typy wyjątków zgłaszanych przez klienta OpenAI.
+from src import config  # Importujemy nasz plik konfiguracyjny.
+
+
+class TokenBucket:
+    """
+    Klasyczne "wiaderko z żetonami". Żetony dolewają się ze stałą prędkością
+    aż do pojemności wiaderka; każde zapytanie zużywa określoną ich liczbę.
+    Jeśli żetonów brakuje, wiaderko "zadłuża się" i zwraca czas, który trzeba odczekać -
+    dzięki temu oczekujący są obsługiwani w kolejności rezerwacji.
+    """
+
+    def __init__(self, per_minute):
+        """
+        Argumenty:
+            per_minute (float): Liczba żetonów dostępnych na minutę (jednocześnie pojemność wiaderka).
+        """
+        self.capacity = float(per_minute)
+        self.refill_per_second = per_minute / 60.0
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, amount=1.0):
+        """Rezerwuje `amount` żetonów i zwraca liczbę sekund, którą trzeba odczekać przed zapytaniem."""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.refill_per_second)
+            self.updated_at = now
+            self.tokens -= amount
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.refill_per_second
+
+
+class AdaptiveConcurrency:
+    """
+    Adaptacyjny limit liczby zapytań w locie (AIMD - additive increase, multiplicative decrease).
+    Po odpowiedzi 429 limit jest zmniejszany o połowę, a każde udane zapytanie
+    odbudowuje go o niewielki krok, aż do pełnej liczby wątków/korutyn.
+    """
+
+    def __init__(self):
+        # Ułamek maksymalnej współbieżności, który jest obecnie dozwolony (od MIN do 1.0).
+        self.factor = 1.0
+        self._lock = threading.Lock()
+
+    def limit(self, max_workers):
+        """Zwraca dozwoloną liczbę zapytań w locie dla puli o rozmiarze `max_workers`."""
+        return max(1, min(max_workers, int(max_workers * self.factor)))
+
+    def on_throttled(self):
+        """Zmniejsza dozwoloną współbieżność o połowę."""
+        with self._lock:
+            self.factor = max(config.WHISPER_MIN_CONCURRENCY_FACTOR, self.factor / 2)
+
+    def on_success(self):
+        """Odbudowuje dozwoloną współbieżność o jeden krok."""
+        with self._lock:
+            self.factor = min(1.0, self.factor + config.WHISPER_CONCURRENCY_RECOVERY_STEP)
+
+
+class RateLimiter:
+    """
+    Ogranicznik zapytań do API Whisper. Łączy limit zapytań na minutę, limit sekund audio
+    na minutę, wspólną przerwę po odpowiedzi 429 (wszyscy czekają `Retry-After`)
+    oraz adaptacyjny limit współbieżności.
+    """
+
+    def __init__(self, requests_per_minute=0, audio_seconds_per_minute=0):
+        """
+        Argumenty:
+            requests_per_minute (float): Limit zapytań na minutę (0 oznacza brak limitu).
+            audio_seconds_per_minute (float): Limit sekund audio na minutę (0 oznacza brak limitu).
+        """
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.audio_seconds = TokenBucket(audio_seconds_per_minute) if audio_seconds_per_minute else None
+        self.concurrency = AdaptiveConcurrency()
+        # Moment (time.monotonic), do którego wszystkie zapytania muszą się wstrzymać po odpowiedzi 429.
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self, audio_seconds=None):
+        """
+        Rezerwuje miejsce na jedno zapytanie i zwraca liczbę sekund, którą trzeba odczekać.
+        Metoda nie usypia wątku, więc może być używana zarówno przez wątki, jak i korutyny.
+        """
+        delays = [0.0]
+        if self.requests:
+            delays.append(self.requests.reserve(1))
+        if self.audio_seconds and audio_seconds:
+            delays.append(self.audio_seconds.reserve(audio_seconds))
+        with self._lock:
+            delays.append(self._paused_until - time.monotonic())
+        return max(delays)
+
+    def acquire(self, audio_seconds=None):
+        """Czeka (usypiając bieżący wątek), aż zapytanie zmieści się w limitach."""
+        delay = self.reserve(audio_seconds)
+        if delay > 0:
+            time.sleep(delay)
+
+    def on_success(self):
+        """Informuje ogranicznik o udanym zapytaniu."""
+        self.concurrency.on_success()
+
+    def on_throttled(self, retry_after=None):
+        """
+        Informuje ogranicznik o odpowiedzi 429. Zmniejsza współbieżność, a jeśli serwer
+        podał `Retry-After`, wstrzymuje wszystkie zapytania na wskazany czas.
+        """
+        self.concurrency.on_throttled()
+        if retry_after:
+            with self._lock:
+                self._paused_until = max(self._paused_until, time.monotonic() + retry_after)
+
+
+# Singleton ogranicznika współdzielonego przez wszystkie wątki i silniki transkrypcji.
+_rate_limiter = None
+_rate_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter():
+    """Zwraca współdzielony ogranicznik zapytań do API Whisper (tworzy go przy pierwszym wywołaniu)."""
+    global _rate_limiter
+    if _rate_limiter is None:
+        with _rate_limiter_lock:
+            if _rate_limiter is None:
+                _rate_limiter = RateLimiter(
+                    requests_per_minute=config.WHISPER_RATE_LIMIT_REQUESTS_PER_MINUTE,
+                    audio_seconds_per_minute=config.WHISPER_RATE_LIMIT_AUDIO_SECONDS_PER_MINUTE
+                )
+    return _rate_limiter
+
+
+def _parse_retry_after(error):
+    """Odczytuje z odpowiedzi API czas (w sekundach), po którym można ponowić zapytanie."""
+    response = getattr(error, 'response', None)
+    if response is None:
+        return None
+    headers = response.headers
+
+    # OpenAI zwraca czasem dokładniejszy nagłówek w milisekundach.
+    retry_after_ms = headers.get('retry-after-ms')
+    if retry_after_ms:
+        try:
+            return float(retry_after_ms) / 1000
+        except ValueError:
+            pass
+
+    retry_after = headers.get('retry-after')
+    if not retry_after:
+        return None
+    try:
+        return float(retry_after)
+    except ValueError:
+        pass
+    # `Retry-After` może być też datą HTTP, np. "Wed, 21 Oct 2015 07:28:00 GMT".
+    try:
+        return max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def classify_api_error(error):
+    """
+    Klasyfikuje wyjątek zgłoszony przez klienta OpenAI.
+
+    Zwraca:
+        tuple: (czy_ponowić, czy_429, retry_after_w_sekundach_lub_None)
+    """
+    if isinstance(error, openai.RateLimitError):
+        # Wyczerpany limit kosztów konta nie minie po odczekaniu - nie ma sensu ponawiać.
+        if getattr(error, 'code', None) == 'insufficient_quota':
+            return False, False, None
+        return True, True, _parse_retry_after(error)
+    if isinstance(error, openai.APIStatusError):
+        # 408 (timeout), 409 (konflikt) i błędy serwera 5xx są przejściowe.
+        retryable = error.status_code in (408, 409) or error.status_code >= 500
+        return retryable, False, _parse_retry_after(error)
+    if isinstance(error, openai.APIConnectionError):
+        # Obejmuje również `APITimeoutError` - problem z siecią, warto ponowić.
+        return True, False, None
+    return False, False, None
+
+
+def compute_backoff_delay(attempt, retry_after=None):
+    """
+    Zwraca opóźnienie przed ponowieniem zapytania (wykładniczy backoff z pełnym losowym rozrzutem).
+    Jeśli serwer podał `Retry-After`, czekamy co najmniej tyle, ile zażądał.
+
+    Argumenty:
+        attempt (int): Numer nieudanej próby, licząc od 0.
+        retry_after (float, opcjonalnie): Czas z nagłówka `Retry-After` w sekundach.
+    """
+    ceiling = min(config.WHISPER_RETRY_MAX_DELAY_SECONDS, config.WHISPER_RETRY_BASE_DELAY_SECONDS * (2 ** attempt))
+    delay = random.uniform(0, ceiling)
+    if retry_after is not None:
+        # Niewielki rozrzut ponad `Retry-After`, aby wszystkie wątki nie wróciły w tej samej milisekundzie.
+        delay = retry_after + random.uniform(0, config.WHISPER_RETRY_BASE_DELAY_SECONDS)
+    return delay
@@ -0,0 +1,81 @@
+# Ten moduł zawiera trwałą pamięć podręczną (cache) transkrypcji adresowaną treścią nagrania.
+# Kluczem jest skrót SHA-256 przekonwertowanego pliku audio połączony z parametrami API,
+# które wpływają na wynik. Dzięki temu to samo nagranie - po resecie tabeli `files`
+# albo zaimportowane ponownie z innego folderu - nie jest drugi raz wysyłane do API Whisper.
+
+import hashlib  # Obliczanie skrótu SHA-256 nagrania.
+import json  # Stabilna reprezentacja parametrów API w kluczu.
+import os  # Operacje na ścieżkach plików.
+from src import config, database  # Importujemy konfigurację i moduł do operacji na bazie danych.
+
+# Rozmiar bloku czytanego przy liczeniu skrótu - duże pliki nie są wczytywane do pamięci w całości.
+_HASH_BLOCK_SIZE = 1024 * 1024
+
+
+def compute_cache_key(audio_path, audio_bytes=None):
+    """
+    Zwraca klucz pamięci podręcznej dla pliku audio: skrót jego treści oraz parametrów
+    API (model, język, prompt, temperatura, format odpowiedzi).
+    Jeśli podano `audio_bytes` (tryb strumieniowy), skrót jest liczony z pamięci, a plik nie jest czytany.
+    """
+    digest = hashlib.sha256()
+    if audio_bytes is not None:
+        digest.update(audio_bytes)
+    else:
+        with open(audio_path, "rb") as audio_file:
+            for block in iter(lambda: audio_file.read(_HASH_BLOCK_SIZE), b""):
+                digest.update(block)
+
+    api_params = json.dumps({
+        'model': config.WHISPER_API_MODEL,
+        'language': config.WHISPER_API_LANGUAGE,
+        'prompt': config.WHISPER_API_PROMPT,
+        'temperature': config.WHISPER_API_TEMPERATURE,
+        'response_format': config.WHISPER_API_RESPONSE_FORMAT
+    }, sort_keys=True)
+    return hashlib.sha256(f"{digest.hexdigest()}|{api_params}".encode("utf-8")).hexdigest()
+
+
+class TranscriptionCache:
+    """
+    Pamięć podręczna transkrypcji z licznikami trafień i chybień dla bieżącego przebiegu.
+    Korzysta z tabeli `transcription_cache`, która przetrwa reset tabeli `files`.
+    """
+
+    def __init__(self, enabled=None):
+        self.enabled = config.TRANSCRIPTION_CACHE_ENABLED if enabled is None else enabled
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, audio_path, audio_bytes=None):
+        """
+        Sprawdza, czy nagranie było już transkrybowane z tymi samymi parametrami.
+        Nagranie przekonwertowane do pamięci przekazujemy w `audio_bytes`.
+
+        Zwraca:
+            tuple: (klucz, transkrypcja) - transkrypcja jest None przy chybieniu,
+                   a klucz jest None, jeśli pamięć podręczna jest wyłączona lub pliku nie da się odczytać.
+        """
+        if not self.enabled:
+            return None, None
+        try:
+            cache_key = compute_cache_key(audio_path, audio_bytes)
+        except OSError as e:
+            print(f"    OSTRZEŻENIE: Nie udało się obliczyć skrótu pliku {os.path.basename(audio_path)}: {e}")
+            return None, None
+
+        transcription_text = database.get_cached_transcription(cache_key)
+        if transcription_text is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return cache_key, transcription_text
+
+    def store(self, cache_key, transcription_text):
+        """Zapisuje transkrypcję w pamięci podręcznej (jeśli klucz został obliczony)."""
+        if cache_key and transcription_text is not None:
+            database.save_cached_transcription(cache_key, transcription_text)
+
+    def summary(self):
+        """Zwraca jednowierszowe podsumowanie liczników do wyświetlenia po zakończeniu przebiegu."""
+        return f"Pamięć podręczna transkrypcji: trafienia {self.hits}, chybienia {self.misses}"
@@ -5,8 +5,11 @@
 
 import os  # Moduł do operacji na ścieżkach plików, np. do wyciągania nazwy pliku.
 import threading  # Moduł do pracy z wątkami, używany tutaj do obsługi pauzy w trybie GUI.
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED  # Pula wątków roboczych.
 from src.services.whisper_service import WhisperService  # Importujemy nasz serwis Whisper.
-from src import database  # Importujemy moduł do operacji na bazie danych.
+from src.services.transcription_cache import TranscriptionCache  # Pamięć podręczna transkrypcji.
+from src import config, database  # Importujemy konfigurację i moduł do operacji na bazie danych.
+from src.utils.audio import chunk_audio_file, needs_chunking  # Ponowne dzielenie długich nagrań na fragmenty.
 # format_transcription_header usunięty - tag jest teraz tworzony wcześniej w metadanych
 from src.utils.error_handlers import with_error_handling, measure_performance  # Dekoratory
 
@@ -15,8 +18,13 @@ class TranscriptionService:
     Zarządza całym procesem transkrypcji. Pobiera pliki, które zostały
     wcześniej skonwertowane do formatu audio gotowego do transkrypcji,
     wysyła je do transkrypcji i zapisuje wyniki z powrotem w bazie danych.
+
+    Pliki są wysyłane do API równolegle przez ograniczoną pulę wątków,
+    dzięki czemu w locie jest jednocześnie co najwyżej `max_workers` zapytań.
+    Długie nagrania podzielone wcześniej na fragmenty są transkrybowane fragment po fragmencie
+    (równolegle), a tekst jest sklejany w kolejności do jednej kolumny `transcription`.
     """
-    def __init__(self, pause_requested_event: threading.Event = None, on_progress_callback=None):
+    def __init__(self, pause_requested_event: threading.Event = None, on_progress_callback=None, max_workers=None):
         """
         Inicjalizuje obiekt serwisu transkrypcji.
 
@@ -28,9 +36,385 @@ class TranscriptionService:
             on_progress_callback (function, opcjonalnie):
                 Funkcja zwrotna (callback), która jest wywoływana po przetworzeniu każdego pliku.
                 Używane w GUI do aktualizowania paska postępu.
+            max_workers (int, opcjonalnie):
+                Maksymalna liczba jednoczesnych zapytań do API Whisper.
+                Domyślnie wartość `config.TRANSCRIPTION_MAX_WORKERS`.
         """
         self.pause_requested_event = pause_requested_event
         self.on_progress_callback = on_progress_callback
+        self.max_workers = max(1, max_workers or config.TRANSCRIPTION_MAX_WORKERS)
+        # Jeden bezstanowy serwis Whisper dla wszystkich plików - korzysta ze współdzielonego
+        # klienta OpenAI, więc połączenia HTTP są używane ponownie między kolejnymi plikami.
+        self.whisper_service = WhisperService()
+        # Trwała pamięć podręczna transkrypcji (z licznikami trafień i chybień bieżącego przebiegu).
+        self.cache = TranscriptionCache()
+        # Stan plików podzielonych na fragmenty: ścieżka -> liczba fragmentów w toku i flaga błędu.
+        self._chunked_files = {}
+        # Nagrania przekonwertowane do pamięci (tryb strumieniowy potoku): ścieżka źródłowa -> zawartość .m4a.
+        # Plik tymczasowy takiego nagrania powstaje na dysku tylko wtedy, gdy transkrypcja się nie powiedzie.
+        self._audio_buffers = {}
+        # Czy od ostatniego powiadomienia GUI zapisano nowe wyniki (`_save_result` -> `_notify_progress`).
+        self._progress_pending = False
+
+    def _is_pause_requested(self):
+        """Sprawdza, czy z głównego wątku GUI przyszło żądanie pauzy."""
+        # `is_set()` zwraca True, jeśli inny wątek wywołał `event.set()`.
+        return bool(self.pause_requested_event and self.pause_requested_event.is_set())
+
+    def _get_files_to_transcribe(self, allow_long):
+        """
+        Zwraca listę plików źródłowych gotowych do transkrypcji.
+        Jeśli `allow_long` jest False, pomija pliki dłuższe niż `config.MAX_FILE_DURATION_SECONDS`.
+        """
+        # Pobieramy z bazy listę ścieżek do plików źródłowych, które są gotowe do transkrypcji.
+        files_to_process = database.get_files_to_process()
+
+        # Jeśli nie ma takich plików, informujemy o tym i kończymy działanie metody.
+        if not files_to_process:
+            print("Brak plików oczekujących na transkrypcję.")
+            return []
+
+        # Jeśli allow_long=True, nie filtrujemy niczego.
+        if allow_long:
+            return files_to_process
+
+        filtered_files = [source_path for source_path in files_to_process if self._accepts_file(source_path, allow_long)]
+
+        if not filtered_files:
+            print("Brak krótkich plików do transkrypcji (wszystkie są za długie).")
+        return filtered_files
+
+    def _accepts_file(self, source_path, allow_long):
+        """
+        Sprawdza, czy plik może zostać przetranskrybowany.
+        Jeśli `allow_long` jest False, odrzuca pliki dłuższe niż `config.MAX_FILE_DURATION_SECONDS`,
+        chyba że zostały podzielone na fragmenty (`needs_chunking`).
+        """
+        if allow_long:
+            return True
+
+        file_metadata = database.get_file_metadata(source_path)
+        if file_metadata and file_metadata['duration_ms']:
+            duration_sec = file_metadata['duration_ms'] / 1000
+            if duration_sec > config.MAX_FILE_DURATION_SECONDS and not needs_chunking(file_metadata['duration_ms']):
+                print(f"    Pominięto długi plik: {os.path.basename(source_path)} ({duration_sec:.1f}s)")
+                return False
+        # Jeśli nie ma metadanych, przyjmujemy plik (może być problem z bazą danych)
+        return True
+
+    def _prepare_file(self, source_path, require_tmp_file=True):
+        """
+        Sprawdza, czy plik można wysłać do transkrypcji, i zwraca jego metadane z bazy danych.
+        Zwraca None, jeśli plik źródłowy lub tymczasowy jest niedostępny.
+        Dla nagrań przekonwertowanych do pamięci (`require_tmp_file=False`) plik tymczasowy nie musi istnieć.
+        """
+        # Najpierw sprawdź dostępność pliku źródłowego
+        is_valid, error_msg = database.validate_file_access(source_path)
+        if not is_valid:
+            print(f"    BŁĄD: Plik źródłowy niedostępny - {error_msg}. Pomijanie.")
+            return None
+
+        # Pobieramy wszystkie potrzebne metadane pliku z bazy danych jednym zapytaniem.
+        file_metadata = database.get_file_metadata(source_path)
+
+        if not file_metadata or not file_metadata['tmp_file_path']:
+            print(f"    BŁĄD: Brak metadanych lub ścieżki tymczasowej dla pliku: {source_path}. Pomijanie.")
+            return None
+
+        # Dodatkowe zabezpieczenie: sprawdzamy, czy plik tymczasowy fizycznie istnieje na dysku.
+        if require_tmp_file and not os.path.exists(file_metadata['tmp_file_path']):
+            # Np. nagranie z przerwanego przebiegu w trybie strumieniowym, które nie zdążyło trafić na dysk.
+            # Cofamy oznaczenie "wczytany", aby plik został ponownie przekonwertowany, zamiast utknąć na zawsze.
+            print(f"    BŁĄD: Oczekiwany plik tymczasowy nie istnieje: {file_metadata['tmp_file_path']}. "
+                  f"Plik zostanie ponownie przekonwertowany.")
+            database.set_files_as_unloaded([source_path])
+            return None
+
+        return file_metadata
+
+    @staticmethod
+    def _audio_seconds(file_metadata):
+        """Zwraca długość nagrania w sekundach (dla limitu sekund audio na minutę) lub None, jeśli jest nieznana."""
+        try:
+            duration_ms = file_metadata['duration_ms']
+        except (KeyError, IndexError):
+            return None
+        return duration_ms / 1000 if duration_ms else None
+
+    def _get_chunks(self, source_path, file_metadata):
+        """
+        Zwraca fragmenty pliku z bazy danych (pustą listę, jeśli plik nie był dzielony).
+        Jeśli pliki fragmentów zniknęły z dysku (np. po wyczyszczeniu folderu tymczasowego),
+        plik jest dzielony ponownie.
+        """
+        chunks = database.get_file_chunks(source_path)
+        missing = [c for c in chunks if c['transcription'] is None and not os.path.exists(c['tmp_chunk_path'])]
+        if missing:
+            print(f"    OSTRZEŻENIE: Brak {len(missing)} plików fragmentów dla {os.path.basename(source_path)}. Ponowne dzielenie.")
+            database.delete_file_chunks(source_path)
+            chunk_audio_file(source_path, file_metadata['tmp_file_path'], file_metadata['duration_ms'])
+            chunks = database.get_file_chunks(source_path)
+        return chunks
+
+    def _iter_jobs(self, files_to_process):
+        """
+        Zwraca zadania transkrypcji. Zadania, których nagranie zostało już kiedyś przetranskrybowane
+        z tymi samymi parametrami, mają ustawione `from_cache` i gotowy tekst w `cached_text` -
+        nie trafiają do puli, a wywołujący zapisuje je razem z innymi wynikami (`_complete_jobs`).
+        Generator czyta bazę danych i pliki (skrót nagrania, ponowne dzielenie), więc nie powinien
+        działać wewnątrz `database.transaction()`, która wstrzymuje zapisy pozostałych wątków.
+        """
+        for job in self._iter_file_jobs(files_to_process):
+            job['cache_key'], cached_text = self.cache.lookup(job['audio_path'], job['audio_bytes'])
+            if cached_text is not None:
+                print(f"  Z pamięci podręcznej: {self._job_label(job)}")
+                job['from_cache'] = True
+                job['cached_text'] = cached_text
+            yield job
+
+    def _iter_file_jobs(self, files_to_process):
+        """
+        Zamienia listę plików na zadania transkrypcji. Zwykły plik to jedno zadanie, a plik
+        podzielony na fragmenty - po jednym zadaniu na każdy fragment, który nie ma jeszcze transkrypcji.
+        Generator jest leniwy, więc pliki są walidowane dopiero wtedy, gdy w puli zwalnia się miejsce.
+        """
+        for source_path in files_to_process:
+            audio_bytes = self._audio_buffers.pop(source_path, None)
+            file_metadata = self._prepare_file(source_path, require_tmp_file=audio_bytes is None)
+            if file_metadata is None:
+                continue
+
+            # Nagrania z pamięci nigdy nie są dzielone - długie pliki potok konwertuje na dysk.
+            chunks = [] if audio_bytes is not None else self._get_chunks(source_path, file_metadata)
+            if not chunks:
+                yield {
+                    'source_path': source_path,
+                    'file_metadata': file_metadata,
+                    'audio_path': file_metadata['tmp_file_path'],
+                    'audio_bytes': audio_bytes,
+                    'audio_seconds': self._audio_seconds(file_metadata),
+                    'chunk_index': None,
+                    'chunk_count': None,
+                    'from_cache': False
+                }
+                continue
+
+            pending_chunks = [c for c in chunks if c['transcription'] is None]
+            if not pending_chunks:
+                # Wszystkie fragmenty zostały przetworzone wcześniej (np. przed pauzą) - wystarczy je skleić.
+                self._save_result(source_path, file_metadata, self._stitch_chunks(chunks))
+                continue
+
+            print(f"  Plik {os.path.basename(source_path)} podzielony na {len(chunks)} fragmentów "
+                  f"(do transkrypcji: {len(pending_chunks)})")
+            self._chunked_files[source_path] = {'remaining': len(pending_chunks), 'failed': False}
+            for chunk in pending_chunks:
+                yield {
+                    'source_path': source_path,
+                    'file_metadata': file_metadata,
+                    'audio_path': chunk['tmp_chunk_path'],
+                    'audio_bytes': None,
+                    'audio_seconds': (chunk['end_ms'] - chunk['start_ms']) / 1000,
+                    'chunk_index': chunk['chunk_index'],
+                    'chunk_count': len(chunks),
+                    'from_cache': False
+                }
+
+    @staticmethod
+    def _job_label(job):
+        """Zwraca czytelną nazwę zadania do komunikatów, np. 'spotkanie.mp3 [fragment 3/18]'."""
+        label = os.path.basename(job['source_path'])
+        if job['chunk_index'] is not None:
+            label += f" [fragment {job['chunk_index'] + 1}/{job['chunk_count']}]"
+        return label
+
+    @staticmethod
+    def _stitch_chunks(chunks):
+        """Skleja transkrypcje fragmentów w kolejności ich występowania w nagraniu."""
+        return " ".join(c['transcription'].strip() for c in chunks if c['transcription'])
+
+    def _transcribe_file(self, job):
+        """
+        Wykonuje transkrypcję jednego zadania (pliku lub fragmentu). Metoda jest uruchamiana
+        w wątku roboczym puli, dlatego nie dotyka bazy danych ani GUI - zwraca jedynie tekst transkrypcji lub None.
+        """
+        print(f"  Przetwarzanie pliku: {self._job_label(job)}")
+
+        # Wywołujemy metodę, która wysyła plik do API OpenAI i zwraca wynik.
+        # Ograniczanie tempa zapytań i ponawianie po błędach przejściowych odbywa się w `WhisperService`.
+        transcription = self.whisper_service.transcribe(
+            job['audio_path'], audio_seconds=job['audio_seconds'], audio_bytes=job['audio_bytes']
+        )
+
+        # Sprawdzamy, czy transkrypcja się powiodła i czy wynik zawiera tekst.
+        # `hasattr` sprawdza, czy obiekt `transcription` ma atrybut o nazwie 'text'.
+        if transcription and hasattr(transcription, 'text'):
+            return transcription.text
+        return None
+
+    def _job_result(self, job, future):
+        """Zwraca tekst transkrypcji z ukończonego zadania puli (None przy błędzie)."""
+        try:
+            return future.result()
+        except Exception as e:
+            print(f"    BŁĄD: Nieoczekiwany błąd podczas transkrypcji {self._job_label(job)}: {e}")
+            return None
+
+    def _complete_jobs(self, results):
+        """
+        Zapisuje wyniki wielu zadań (pary (zadanie, tekst)) w jednej transakcji i dopiero po jej
+        zatwierdzeniu powiadamia GUI - odświeżenie widoków widzi już wszystkie zapisane wyniki.
+        """
+        if not results:
+            return
+        with database.transaction():
+            for job, transcription_text in results:
+                self._complete_job(job, transcription_text)
+        self._notify_progress()
+
+    def _complete_job(self, job, transcription_text):
+        """
+        Zapisuje wynik jednego zadania. Wynik zwykłego pliku trafia od razu do bazy, a wynik
+        fragmentu - do tabeli fragmentów; po ostatnim fragmencie tekst jest sklejany i zapisywany
+        jako transkrypcja całego pliku. Wywoływana wyłącznie z wątku koordynującego.
+        """
+        source_path = job['source_path']
+        if not job['from_cache']:
+            # Nowy wynik z API trafia do trwałej pamięci podręcznej.
+            self.cache.store(job.get('cache_key'), transcription_text)
+
+        if job['chunk_index'] is None:
+            if transcription_text is None and job['audio_bytes'] is not None:
+                self._spill_audio(job['audio_path'], job['audio_bytes'])
+            self._save_result(source_path, job['file_metadata'], transcription_text)
+            return
+
+        state = self._chunked_files[source_path]
+        if transcription_text is None:
+            state['failed'] = True
+        else:
+            # Transkrypcja fragmentu jest zapisywana od razu, więc po przerwaniu nie trzeba jej powtarzać.
+            database.update_chunk_transcription(source_path, job['chunk_index'], transcription_text)
+
+        state['remaining'] -= 1
+        if state['remaining']:
+            return
+
+        del self._chunked_files[source_path]
+        if state['failed']:
+            print(f"    Pominięto plik {os.path.basename(source_path)} z powodu błędu transkrypcji fragmentu. "
+                  f"Gotowe fragmenty zostaną użyte przy ponownym uruchomieniu.")
+            return
+        self._save_result(source_path, job['file_metadata'], self._stitch_chunks(database.get_file_chunks(source_path)))
+
+    @staticmethod
+    def _spill_audio(audio_path, audio_bytes):
+        """
+        Zapisuje nagranie z pamięci do pliku tymczasowego (po nieudanej transkrypcji lub pauzie),
+        aby ponowne uruchomienie mogło wysłać plik bez ponownej konwersji.
+        """
+        try:
+            os.makedirs(os.path.dirname(audio_path), exist_ok=True)
+            with open(audio_path, "wb") as audio_file:
+                audio_file.write(audio_bytes)
+        except OSError as e:
+            print(f"    OSTRZEŻENIE: Nie udało się zapisać pliku tymczasowego {os.path.basename(audio_path)}: {e}")
+
+    def _spill_audio_buffers(self):
+        """Zapisuje na dysk wszystkie nagrania z pamięci, które nie trafiły jeszcze do transkrypcji."""
+        for source_path, audio_bytes in self._audio_buffers.items():
+            file_metadata = database.get_file_metadata(source_path)
+            if file_metadata and file_metadata['tmp_file_path']:
+                self._spill_audio(file_metadata['tmp_file_path'], audio_bytes)
+        self._audio_buffers.clear()
+
+    def _save_result(self, source_path, file_metadata, transcription_text):
+        """
+        Zapisuje wynik transkrypcji w bazie danych i powiadamia GUI.
+        Wywoływana wyłącznie z wątku koordynującego, więc zapisy do bazy nie przeplatają się.
+        """
+        if transcription_text is None:
+            # Jeśli transkrypcja się nie powiodła, drukujemy komunikat.
+            print(f"    Pominięto plik {os.path.basename(source_path)} z powodu błędu transkrypcji.")
+            return
+
+        # Tag został utworzony wcześniej podczas przetwarzania metadanych.
+        try:
+            tag = file_metadata['tag'] or ''
+        except (KeyError, IndexError):
+            tag = ''
+            print(f"    OSTRZEŻENIE: Brak kolumny 'tag' dla pliku {os.path.basename(source_path)}")
+
+        if not tag:
+            print(f"    OSTRZEŻENIE: Brak tagu dla pliku {os.path.basename(source_path)}")
+
+        # Zapisujemy tylko czystą transkrypcję w bazie danych (tag jest już w osobnej kolumnie)
+        database.update_file_transcription(source_path, transcription_text)
+        print(f"    Sukces: Transkrypcja pliku {os.path.basename(source_path)} zapisana w bazie danych.")
+
+        # GUI jest powiadamiane dopiero po zatwierdzeniu zapisu (`_notify_progress`) - wynik może być
+        # częścią otwartej transakcji, której inne wątki jeszcze nie widzą.
+        self._progress_pending = True
+
+    def _notify_progress(self):
+        """Wywołuje funkcję zwrotną postępu (w trybie GUI), jeśli od ostatniego wywołania zapisano nowe wyniki."""
+        if not self._progress_pending:
+            return
+        self._progress_pending = False
+        # Jeśli do serwisu została przekazana funkcja zwrotna (w trybie GUI)...
+        if self.on_progress_callback:
+            # ...wywołujemy ją. To pozwala na aktualizację interfejsu użytkownika w czasie rzeczywistym.
+            self.on_progress_callback()
+
+    def _run_transcriptions(self, files_to_process):
+        """
+        Wysyła pliki do API przez pulę wątków, utrzymując w locie co najwyżej `max_workers` zapytań.
+        Fragmenty długich nagrań są osobnymi zadaniami, więc wszystkie fragmenty jednego pliku
+        mogą być transkrybowane równolegle.
+        Po odpowiedziach 429 ogranicznik zapytań tymczasowo obniża ten limit, więc pula
+        nie dokłada nowych plików, dopóki API nie przestanie nas dławić.
+        Wyniki są zapisywane w bazie danych z wątku koordynującego w kolejności ukończenia.
+        """
+        print(f"Transkrypcja {len(files_to_process)} plików (równolegle: {self.max_workers})...")
+
+        pending_jobs = self._iter_jobs(files_to_process)
+        # Słownik "zadanie w toku" -> opis zadania. Jego rozmiar to liczba zapytań w locie.
+        in_flight = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="whisper") as executor:
+            while True:
+                # Dopełniamy pulę nowymi zadaniami (do bieżącego, adaptacyjnego limitu), dopóki nie ma żądania pauzy.
+                # Zadania są przygotowywane poza transakcją, a trafienia w pamięci podręcznej zapisujemy
+                # paczkami (po co najwyżej `limit` wyników na transakcję).
+                limit = self.whisper_service.rate_limiter.concurrency.limit(self.max_workers)
+                cached_results = []
+                while len(in_flight) < limit and not self._is_pause_requested():
+                    job = next(pending_jobs, None)
+                    if job is None:
+                        break
+                    if job['from_cache']:
+                        cached_results.append((job, job['cached_text']))
+                        if len(cached_results) >= limit:
+                            self._complete_jobs(cached_results)
+                            cached_results = []
+                        continue
+                    in_flight[executor.submit(self._transcribe_file, job)] = job
+                self._complete_jobs(cached_results)
+                # Pliki, których fragmenty były gotowe wcześniej, są zapisywane bezpośrednio przez generator.
+                self._notify_progress()
+
+                # Nic nie jest w toku - albo skończyły się pliki, albo zażądano pauzy.
+                if not in_flight:
+                    break
+
+                # Czekamy na zakończenie przynajmniej jednego zapytania i zapisujemy wyniki
+                # wszystkich ukończonych zapytań w jednej transakcji.
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                results = []
+                for future in done:
+                    job = in_flight.pop(future)
+                    results.append((job, self._job_result(job, future)))
+                self._complete_jobs(results)
 
     @with_error_handling("Transkrypcja plików")
     @measure_performance
@@ -38,8 +422,8 @@ class TranscriptionService:
         """
         Główna metoda orkiestrująca procesem transkrypcji.
         Pobiera pliki, które są już załadowane (skonwertowane do formatu audio gotowego do transkrypcji),
-        ale jeszcze nieprzetworzone (nie mają transkrypcji), wykonuje transkrypcję
-        dla każdego z nich i aktualizuje odpowiednie wpisy w bazie danych.
+        ale jeszcze nieprzetworzone (nie mają transkrypcji), i przekazuje je do silnika transkrypcji
+        (`_run_transcriptions`), który wysyła je równolegle do API i zapisuje wyniki w bazie danych.
 
         Argumenty:
             allow_long (bool): Jeśli True, przetwarza również długie pliki.
@@ -47,93 +431,17 @@ class TranscriptionService:
         """
         print("\nKrok 3: Rozpoczynanie transkrypcji plików...")
 
-        # Pobieramy z bazy listę ścieżek do plików źródłowych, które są gotowe do transkrypcji.
-        files_to_process = database.get_files_to_process()
-
-        # Jeśli nie ma takich plików, informujemy o tym i kończymy działanie metody.
+        files_to_process = self._get_files_to_transcribe(allow_long)
         if not files_to_process:
-            print("Brak plików oczekujących na transkrypcję.")
             return
 
-        # Jeśli allow_long=False, filtrujemy długie pliki
-        if not allow_long:
-            from src import config
-            filtered_files = []
-            for source_path in files_to_process:
-                file_metadata = database.get_file_metadata(source_path)
-                if file_metadata and file_metadata.get('duration_ms'):
-                    duration_sec = file_metadata['duration_ms'] / 1000
-                    if duration_sec <= config.MAX_FILE_DURATION_SECONDS:
-                        filtered_files.append(source_path)
-                    else:
-                        print(f"    Pominięto długi plik: {os.path.basename(source_path)} ({duration_sec:.1f}s)")
-                else:
-                    # Jeśli nie ma metadanych, dodaj plik (może być problem z bazą danych)
-                    filtered_files.append(source_path)
-            files_to_process = filtered_files
-
-            if not files_to_process:
-                print("Brak krótkich plików do transkrypcji (wszystkie są za długie).")
-                return
-
-        # Iterujemy przez każdy plik, który wymaga transkrypcji.
-        for source_path in files_to_process:
-            # Najpierw sprawdź dostępność pliku źródłowego
-            is_valid, error_msg = database.validate_file_access(source_path)
-            if not is_valid:
-                print(f"    BŁĄD: Plik źródłowy niedostępny - {error_msg}. Pomijanie.")
-                continue
-
-            # Pobieramy wszystkie potrzebne metadane pliku z bazy danych jednym zapytaniem.
-            file_metadata = database.get_file_metadata(source_path)
-
-            if not file_metadata or not file_metadata['tmp_file_path']:
-                print(f"    BŁĄD: Brak metadanych lub ścieżki tymczasowej dla pliku: {source_path}. Pomijanie.")
-                continue
-
-            tmp_path = file_metadata['tmp_file_path']
+        self._run_transcriptions(files_to_process)
 
-            # Dodatkowe zabezpieczenie: sprawdzamy, czy plik tymczasowy fizycznie istnieje na dysku.
-            if not os.path.exists(tmp_path):
-                print(f"    BŁĄD: Oczekiwany plik tymczasowy nie istnieje: {tmp_path}. Pomijanie.")
-                continue
+        if self._is_pause_requested():
+            # Zapytania, które były już w locie, zostały dokończone i zapisane.
+            print("Żądanie pauzy wykryte. Zatrzymano przetwarzanie...")
 
-            print(f"  Przetwarzanie pliku: {os.path.basename(source_path)}")
-
-            # Tworzymy instancję naszego serwisu Whisper, przekazując jej ścieżkę do przetworzonego pliku audio.
-            whisper_service = WhisperService(tmp_path)
-            # Wywołujemy metodę, która wysyła plik do API OpenAI i zwraca wynik.
-            transcription = whisper_service.transcribe()
-
-            # Sprawdzamy, czy transkrypcja się powiodła i czy wynik zawiera tekst.
-            # `hasattr` sprawdza, czy obiekt `transcription` ma atrybut o nazwie 'text'.
-            if transcription and hasattr(transcription, 'text'):
-                # Pobieramy tag z bazy danych (został utworzony wcześniej podczas przetwarzania metadanych)
-                try:
-                    tag = file_metadata['tag'] or ''
-                except (KeyError, IndexError):
-                    tag = ''
-                    print(f"    OSTRZEŻENIE: Brak kolumny 'tag' dla pliku {os.path.basename(source_path)}")
-
-                if not tag:
-                    print(f"    OSTRZEŻENIE: Brak tagu dla pliku {os.path.basename(source_path)}")
-
-                # Zapisujemy tylko czystą transkrypcję w bazie danych (tag jest już w osobnej kolumnie)
-                database.update_file_transcription(source_path, transcription.text)
-                print(f"    Sukces: Transkrypcja z tagiem zapisana w bazie danych.")
-
-                # Jeśli do serwisu została przekazana funkcja zwrotna (w trybie GUI)...
-                if self.on_progress_callback:
-                    # ...wywołujemy ją. To pozwala na aktualizację interfejsu użytkownika w czasie rzeczywistym.
-                    self.on_progress_callback()
-            else:
-                # Jeśli transkrypcja się nie powiodła, drukujemy komunikat.
-                print(f"    Pominięto plik {os.path.basename(source_path)} z powodu błędu transkrypcji.")
-
-            # Sprawdzamy, czy z głównego wątku GUI przyszło żądanie pauzy.
-            # `is_set()` zwraca True, jeśli inny wątek wywołał `event.set()`.
-            if self.pause_requested_event and self.pause_requested_event.is_set():
-                print("Żądanie pauzy wykryte. Zatrzymywanie przetwarzania...")
-                break  # `break` przerywa całą pętlę `for`.
+        if self.cache.enabled:
+            print(self.cache.summary())
 
         print("\nZakończono pętlę przetwarzania transkrypcji.")
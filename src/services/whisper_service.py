@@ -3,83 +3,178 @@
 # procesu wysyłania pliku audio i otrzymywania transkrypcji, ukrywając
 # szczegóły implementacyjne komunikacji z API.
 
-import os  # Moduł do interakcji z systemem operacyjnym, używany tutaj do odczytu zmiennych środowiskowych.
-from dotenv import load_dotenv  # Funkcja do wczytywania zmiennych z pliku .env.
-from openai import OpenAI  # Główna klasa z biblioteki OpenAI do komunikacji z API.
+import os  # Moduł do interakcji z systemem operacyjnym, np. do pobierania nazwy pliku.
+import time  # Usypianie wątku przed ponowieniem zapytania.
+import asyncio  # Oczekiwanie bez blokowania pętli zdarzeń w silniku asyncio.
+from contextlib import nullcontext  # Jednolita obsługa pliku z dysku i nagrania z pamięci.
 from src import config  # Importujemy nasz plik konfiguracyjny.
+# Rejestr współdzielonego klienta OpenAI (wczytuje również klucz API z pliku .env).
+from src.services.openai_client import get_openai_client
+# Współdzielony ogranicznik zapytań oraz polityka ponawiania.
+from src.services.rate_limiter import get_rate_limiter, classify_api_error, compute_backoff_delay
 
-# `load_dotenv()` to kluczowa funkcja, która szuka w głównym folderze projektu
-# pliku o nazwie `.env`. Jeśli go znajdzie, wczytuje zdefiniowane w nim zmienne
-# (np. API_KEY_WHISPER="sk-...") i udostępnia je jako zmienne środowiskowe dla aplikacji.
-# Dzięki temu klucz API jest bezpiecznie oddzielony od kodu źródłowego.
-load_dotenv()
+
+def _read_audio_file(audio_path):
+    """Wczytuje całe nagranie do pamięci (silnik asyncio wysyła je jako krotkę (nazwa, zawartość))."""
+    with open(audio_path, "rb") as audio_file:
+        return audio_file.read()
 
 
 class WhisperService:
     """
     Serwis dedykowany do interakcji z API OpenAI Whisper.
-    Każdy obiekt tej klasy jest odpowiedzialny za transkrypcję jednego pliku audio.
+    Obiekt jest bezstanowy - ścieżka do pliku jest przekazywana przy każdym wywołaniu
+    `transcribe`, a połączenia HTTP pochodzą ze współdzielonego klienta, więc jedna
+    instancja może obsługiwać dowolną liczbę plików, również z wielu wątków jednocześnie.
     """
-    def __init__(self, audio_path):
+    def __init__(self, client=None, rate_limiter=None):
         """
-        Inicjalizuje klienta Whisper, przygotowując go do transkrypcji konkretnego pliku.
+        Inicjalizuje serwis Whisper.
 
         Argumenty:
-            audio_path (str): Ścieżka do pliku audio, który ma zostać przetworzony.
+            client (OpenAI, opcjonalnie): Klient OpenAI do użycia. Domyślnie współdzielony
+                                          klient z `get_openai_client()`, tworzony przy pierwszej transkrypcji.
+            rate_limiter (RateLimiter, opcjonalnie): Ogranicznik zapytań. Domyślnie współdzielony
+                                                     ogranicznik z `get_rate_limiter()`.
+        """
+        self._client = client
+        self.rate_limiter = rate_limiter or get_rate_limiter()
+        # Model i język nagrania pobieramy z pliku konfiguracyjnego (`WHISPER_API_MODEL`, `WHISPER_API_LANGUAGE`).
+        self.model = config.WHISPER_API_MODEL
+        self.language = config.WHISPER_API_LANGUAGE
+
+    @property
+    def client(self):
+        """Zwraca klienta OpenAI - przekazanego w konstruktorze lub współdzielonego."""
+        return self._client or get_openai_client()
+
+    def _handle_api_error(self, error, audio_path, attempt):
+        """
+        Obsługuje błąd zapytania do API: informuje ogranicznik o odpowiedzi 429
+        i decyduje, czy zapytanie ponowić.
+
+        Zwraca:
+            float lub None: Opóźnienie w sekundach przed ponowieniem albo None, jeśli nie ponawiamy.
         """
-        # Przechowujemy ścieżkę do pliku audio wewnątrz obiektu, aby była dostępna w innych metodach.
-        self.audio_path = audio_path
-        # Definiujemy, jakiego modelu AI chcemy użyć. "whisper-1" to główny i najdokładniejszy model transkrypcji.
-        self.model = "whisper-1"
-        # Jawne określenie języka na "pl" (polski) znacząco poprawia dokładność transkrypcji
-        # dla nagrań w tym języku, ponieważ model nie musi go sam wykrywać.
-        self.language = "pl"
-        # `os.getenv` odczytuje zmienną środowiskową. W tym przypadku szuka klucza API,
-        # który został wczytany z pliku .env przez `load_dotenv()`.
-        self.api_key = os.getenv("API_KEY_WHISPER")
-        # Tworzymy instancję klienta OpenAI, przekazując mu nasz klucz API.
-        # Ten obiekt `client` będzie naszym głównym narzędziem do wysyłania zapytań do serwerów OpenAI.
-        self.client = OpenAI(api_key=self.api_key)
-
-    def transcribe(self):
+        retryable, throttled, retry_after = classify_api_error(error)
+        if throttled:
+            # Odpowiedź 429 - zmniejszamy współbieżność i wstrzymujemy wszystkich na `Retry-After`.
+            self.rate_limiter.on_throttled(retry_after)
+
+        if not retryable or attempt >= config.WHISPER_MAX_RETRIES:
+            # Ten blok obsługuje błędy, których ponawianie nie ma sensu (np. nieprawidłowy klucz API),
+            # oraz sytuację, w której wyczerpaliśmy limit prób.
+            print(f"    BŁĄD: Wystąpił nieoczekiwany błąd podczas transkrypcji pliku {os.path.basename(audio_path)}: {error}")
+            return None
+
+        delay = compute_backoff_delay(attempt, retry_after)
+        reason = "limit zapytań (429)" if throttled else "błąd przejściowy"
+        print(f"    Ponawianie {os.path.basename(audio_path)} za {delay:.1f}s "
+              f"({reason}, próba {attempt + 1}/{config.WHISPER_MAX_RETRIES})")
+        return delay
+
+    def transcribe(self, audio_path, audio_seconds=None, audio_bytes=None):
         """
         Wysyła plik audio do API OpenAI Whisper w celu wykonania transkrypcji.
-        Metoda ta zarządza całym procesem: otwiera plik, wysyła zapytanie,
-        obsługuje potencjalne błędy i zwraca wynik.
+        Metoda ta zarządza całym procesem: czeka na miejsce we współdzielonym ograniczniku zapytań,
+        otwiera plik, wysyła zapytanie, ponawia je po błędach przejściowych (429, 5xx, sieć)
+        z wykładniczym opóźnieniem i zwraca wynik.
+
+        Argumenty:
+            audio_path (str): Ścieżka do pliku audio, który ma zostać przetworzony.
+            audio_seconds (float, opcjonalnie): Długość nagrania - wliczana do limitu sekund audio na minutę.
+            audio_bytes (bytes, opcjonalnie): Nagranie przekonwertowane do pamięci (tryb strumieniowy).
+                                              Wysyłane zamiast pliku, także przy ponowieniach;
+                                              `audio_path` służy wtedy tylko jako nazwa pliku dla API.
+
+        Zwraca:
+            Obiekt transkrypcji lub None, jeśli transkrypcja się nie powiodła.
+        """
+        for attempt in range(config.WHISPER_MAX_RETRIES + 1):
+            # Czekamy, aż zapytanie zmieści się w limitach konta.
+            self.rate_limiter.acquire(audio_seconds)
+            try:
+                # Używamy konstrukcji `with open(...)`, która jest zalecanym sposobem pracy z plikami w Pythonie.
+                # 'rb' oznacza tryb odczytu binarnego (read binary), który jest konieczny dla plików multimedialnych.
+                # Plik zostanie automatycznie i bezpiecznie zamknięty po zakończeniu bloku, nawet jeśli w środku wystąpi błąd.
+                # Nagranie z pamięci (tryb strumieniowy) przekazujemy jako krotkę (nazwa, zawartość) -
+                # API rozpoznaje format po rozszerzeniu.
+                if audio_bytes is not None:
+                    audio_source = nullcontext((os.path.basename(audio_path), audio_bytes))
+                else:
+                    audio_source = open(audio_path, "rb")
+                with audio_source as audio_file:
+                    # Wywołujemy metodę `transcriptions.create` na współdzielonym kliencie OpenAI.
+                    # Jest to właściwe zapytanie do API o wykonanie transkrypcji.
+                    transcript = self.client.audio.transcriptions.create(
+                        model=self.model,  # Wskazujemy, którego modelu użyć.
+                        file=audio_file,  # Przekazujemy otwarty plik binarny (lub krotkę z nagraniem z pamięci).
+                        language=self.language,  # Wskazujemy język nagrania.
+                        # Przekazujemy dodatkowe parametry z naszego pliku konfiguracyjnego.
+                        prompt=config.WHISPER_API_PROMPT,
+                        temperature=config.WHISPER_API_TEMPERATURE,
+                        response_format=config.WHISPER_API_RESPONSE_FORMAT
+                    )
+                # Jeśli zapytanie do API się powiodło, zwracamy otrzymany obiekt transkrypcji.
+                self.rate_limiter.on_success()
+                return transcript
+            except FileNotFoundError:
+                # Ten blok zostanie wykonany, jeśli plik pod ścieżką `audio_path` nie zostanie znaleziony.
+                print(f"    BŁĄD: Nie znaleziono pliku audio: {audio_path}")
+                # Zwracamy `None`, aby funkcja, która wywołała tę metodę, wiedziała, że operacja się nie powiodła.
+                return None
+            except Exception as e:
+                # Pozostałe błędy to m.in. problemy z połączeniem, limity zapytań (429), błędy po stronie
+                # serwera OpenAI lub nieprawidłowy klucz API. Przejściowe ponawiamy, resztę zgłaszamy.
+                delay = self._handle_api_error(e, audio_path, attempt)
+                if delay is None:
+                    return None
+                time.sleep(delay)
+        return None
+
+    async def transcribe_async(self, client, audio_path, audio_seconds=None, audio_bytes=None):
+        """
+        Asynchroniczny odpowiednik `transcribe` dla silnika asyncio.
+        Korzysta z tego samego ogranicznika zapytań i tej samej polityki ponawiania,
+        ale zamiast usypiać wątek, oddaje sterowanie pętli zdarzeń (`asyncio.sleep`).
+
+        Argumenty:
+            client (AsyncOpenAI): Asynchroniczny klient OpenAI.
+            audio_path (str): Ścieżka do pliku audio, który ma zostać przetworzony.
+            audio_seconds (float, opcjonalnie): Długość nagrania - wliczana do limitu sekund audio na minutę.
+            audio_bytes (bytes, opcjonalnie): Nagranie przekonwertowane do pamięci - plik nie jest wtedy czytany.
         """
-        try:
-            # `try...except` to mechanizm obsługi błędów. Kod w bloku `try` jest wykonywany,
-            # a jeśli wystąpi błąd określonego typu (np. `FileNotFoundError`), program nie przerywa działania,
-            # lecz wykonuje kod z odpowiedniego bloku `except`.
-
-            # Używamy konstrukcji `with open(...)`, która jest zalecanym sposobem pracy z plikami w Pythonie.
-            # 'rb' oznacza tryb odczytu binarnego (read binary), który jest konieczny dla plików multimedialnych.
-            # `as audio_file` przypisuje otwarty plik do zmiennej `audio_file`.
-            # Najważniejszą zaletą `with` jest to, że plik zostanie automatycznie i bezpiecznie zamknięty
-            # po zakończeniu bloku, nawet jeśli w środku wystąpi błąd.
-            with open(self.audio_path, "rb") as audio_file:
-                # Wywołujemy metodę `transcriptions.create` na naszym kliencie OpenAI.
-                # Jest to właściwe zapytanie do API o wykonanie transkrypcji.
-                transcript = self.client.audio.transcriptions.create(
-                    model=self.model,  # Wskazujemy, którego modelu użyć.
-                    file=audio_file,  # Przekazujemy otwarty plik binarny.
-                    language=self.language,  # Wskazujemy język nagrania.
-                    # Przekazujemy dodatkowe parametry z naszego pliku konfiguracyjnego.
+        if audio_bytes is None:
+            try:
+                # Plik (do 25 MB, być może na udziale sieciowym) czytamy w wątku pomocniczym,
+                # aby odczyt nie wstrzymywał pętli zdarzeń i pozostałych wysyłek.
+                audio_bytes = await asyncio.to_thread(_read_audio_file, audio_path)
+            except FileNotFoundError:
+                print(f"    BŁĄD: Nie znaleziono pliku audio: {audio_path}")
+                return None
+            except OSError as e:
+                print(f"    BŁĄD: Nie można odczytać pliku audio {audio_path}: {e}")
+                return None
+
+        for attempt in range(config.WHISPER_MAX_RETRIES + 1):
+            delay = self.rate_limiter.reserve(audio_seconds)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            try:
+                transcript = await client.audio.transcriptions.create(
+                    model=self.model,
+                    # Przekazujemy plik jako krotkę (nazwa, zawartość) - API rozpoznaje format po rozszerzeniu.
+                    file=(os.path.basename(audio_path), audio_bytes),
+                    language=self.language,
                     prompt=config.WHISPER_API_PROMPT,
                     temperature=config.WHISPER_API_TEMPERATURE,
                     response_format=config.WHISPER_API_RESPONSE_FORMAT
                 )
-            # Jeśli zapytanie do API się powiodło, zwracamy otrzymany obiekt transkrypcji.
-            return transcript
-        except FileNotFoundError:
-            # Ten blok zostanie wykonany, jeśli plik pod ścieżką `self.audio_path` nie zostanie znaleziony.
-            print(f"    BŁĄD: Nie znaleziono pliku audio: {self.audio_path}")
-            # Zwracamy `None`, aby funkcja, która wywołała tę metodę, wiedziała, że operacja się nie powiodła.
-            return None
-        except Exception as e:
-            # Ten blok `except` jest ogólny - "łapie" wszystkie inne, nieprzewidziane błędy.
-            # Mogą to być problemy z połączeniem internetowym, błędy po stronie serwera OpenAI,
-            # nieprawidłowy klucz API itp.
-            print(f"    BŁĄD: Wystąpił nieoczekiwany błąd podczas transkrypcji pliku {self.audio_path}: {e}")
-            # Również zwracamy `None` w przypadku błędu.
-            return None
+                self.rate_limiter.on_success()
+                return transcript
+            except Exception as e:
+                delay = self._handle_api_error(e, audio_path, attempt)
+                if delay is None:
+                    return None
+                await asyncio.sleep(delay)
+        return None
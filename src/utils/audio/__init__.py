@@ -5,6 +5,7 @@
 # bezpośrednio po zaimportowaniu modułu `audio`, np. `from src.utils.audio import encode_audio_files`.
 # To upraszcza importy w innych częściach kodu.
 
-from .audio_file_encoding import encode_audio_files
-from .duration_checker import get_file_duration
+from .audio_file_encoding import encode_audio_files, get_conversion_workers
+from .audio_chunker import chunk_long_audio_files, chunk_audio_file, split_audio_file, needs_chunking
+from .duration_checker import get_file_duration, get_file_durations, get_media_infos
 from .audio_file_list_cli import get_audio_file_list_cli
\ No newline at end of file
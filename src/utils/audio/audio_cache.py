@@ -0,0 +1,132 @@
+# Ten moduł zawiera trwały magazyn przekonwertowanych plików audio adresowany odciskiem pliku źródłowego.
+# Kluczem jest rozmiar, czas modyfikacji i skrót fragmentów pliku źródłowego połączone z dokładnymi
+# parametrami konwersji (`FFMPEG_PARAMS` i ustawienia szybkiej ścieżki). Magazyn leży poza `tmp/audio`,
+# więc reset tabeli `files` go nie czyści - ponowny import tego samego folderu w ogóle nie uruchamia FFMPEG.
+# Gdy magazyn przekroczy `AUDIO_CACHE_MAX_BYTES`, usuwane są najdawniej używane pliki (LRU).
+
+import hashlib  # Obliczanie skrótu pliku źródłowego i klucza.
+import os  # Operacje na plikach i ich metadanych.
+import shutil  # Kopiowanie plików między magazynem a folderem tymczasowym.
+import threading  # Blokada chroniąca liczniki i porządkowanie magazynu przed równoległymi konwersjami.
+from src import config  # Importujemy nasz plik konfiguracyjny.
+
+# Ile bajtów z początku i z końca pliku źródłowego wchodzi do skrótu. Czytanie całych (często
+# wielogigabajtowych) nagrań wideo trwałoby dłużej niż sama konwersja audio.
+_SAMPLE_SIZE = 1024 * 1024
+# Rozszerzenie plików w magazynie - takie samo jak plików wynikowych konwersji.
+_CACHE_EXTENSION = ".m4a"
+
+
+def _conversion_params():
+    """Zwraca tekst opisujący wszystkie ustawienia, od których zależy wynik konwersji."""
+    return "|".join([
+        config.FFMPEG_PARAMS,
+        str(config.PASSTHROUGH_ENABLED),
+        ",".join(sorted(config.PASSTHROUGH_CODECS)),
+        str(config.PASSTHROUGH_MAX_BIT_RATE)
+    ])
+
+
+def compute_source_key(source_path):
+    """
+    Zwraca klucz magazynu dla pliku źródłowego: skrót jego rozmiaru, czasu modyfikacji,
+    początkowego i końcowego fragmentu treści oraz parametrów konwersji.
+    """
+    stat = os.stat(source_path)
+    digest = hashlib.sha256()
+    digest.update(f"{stat.st_size}|{stat.st_mtime_ns}|{_conversion_params()}|".encode("utf-8"))
+    with open(source_path, "rb") as source_file:
+        digest.update(source_file.read(_SAMPLE_SIZE))
+        if stat.st_size > 2 * _SAMPLE_SIZE:
+            source_file.seek(-_SAMPLE_SIZE, os.SEEK_END)
+            digest.update(source_file.read(_SAMPLE_SIZE))
+    return digest.hexdigest()
+
+
+class ConvertedAudioCache:
+    """
+    Magazyn przekonwertowanych plików audio z licznikami trafień i chybień dla bieżącego przebiegu.
+    Metody są bezpieczne do wywoływania z wielu wątków konwersji jednocześnie.
+    """
+
+    def __init__(self, enabled=None, max_bytes=None):
+        self.enabled = config.AUDIO_CACHE_ENABLED if enabled is None else enabled
+        self.max_bytes = config.AUDIO_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def _cache_path(self, cache_key):
+        return os.path.join(config.AUDIO_CACHE_DIR, f"{cache_key}{_CACHE_EXTENSION}")
+
+    def restore(self, source_path, tmp_path):
+        """
+        Szuka przekonwertowanego pliku w magazynie i przy trafieniu kopiuje go pod `tmp_path`.
+
+        Zwraca:
+            tuple: (klucz, trafienie) - klucz jest None, jeśli magazyn jest wyłączony
+                   lub pliku źródłowego nie da się odczytać.
+        """
+        if not self.enabled:
+            return None, False
+        try:
+            cache_key = compute_source_key(source_path)
+        except OSError as e:
+            print(f"    OSTRZEŻENIE: Nie udało się obliczyć odcisku pliku {os.path.basename(source_path)}: {e}")
+            return None, False
+
+        cache_path = self._cache_path(cache_key)
+        try:
+            # Kopia zamiast dowiązania - późniejsze nadpisanie pliku tymczasowego nie uszkodzi magazynu.
+            shutil.copyfile(cache_path, tmp_path)
+            # Czas modyfikacji służy jako znacznik ostatniego użycia dla porządkowania LRU.
+            os.utime(cache_path)
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return cache_key, False
+
+        with self._lock:
+            self.hits += 1
+        return cache_key, True
+
+    def store(self, cache_key, tmp_path):
+        """Zapisuje wynik konwersji w magazynie i usuwa najdawniej używane pliki ponad limit."""
+        if not cache_key:
+            return
+        cache_path = self._cache_path(cache_key)
+        partial_path = f"{cache_path}.{threading.get_ident()}.part"
+        try:
+            os.makedirs(config.AUDIO_CACHE_DIR, exist_ok=True)
+            shutil.copyfile(tmp_path, partial_path)
+            # Zamiana jest atomowa - inny wątek nigdy nie odczyta niepełnego pliku.
+            os.replace(partial_path, cache_path)
+        except OSError as e:
+            print(f"    OSTRZEŻENIE: Nie udało się zapisać {os.path.basename(tmp_path)} w magazynie audio: {e}")
+            if os.path.exists(partial_path):
+                os.remove(partial_path)
+            return
+        self.evict()
+
+    def evict(self):
+        """Usuwa najdawniej używane pliki, dopóki magazyn nie zmieści się w `max_bytes`."""
+        with self._lock:
+            try:
+                entries = [entry for entry in os.scandir(config.AUDIO_CACHE_DIR)
+                           if entry.is_file() and entry.name.endswith(_CACHE_EXTENSION)]
+            except FileNotFoundError:
+                return
+            stats = [(entry.stat(), entry.path) for entry in entries]
+            total_bytes = sum(stat.st_size for stat, _ in stats)
+            for stat, path in sorted(stats, key=lambda item: item[0].st_mtime):
+                if total_bytes <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                    total_bytes -= stat.st_size
+                except OSError as e:
+                    print(f"    OSTRZEŻENIE: Nie udało się usunąć {os.path.basename(path)} z magazynu audio: {e}")
+
+    def summary(self):
+        """Zwraca jednowierszowe podsumowanie liczników do wyświetlenia po zakończeniu konwersji."""
+        return f"Magazyn przekonwertowanego audio: trafienia {self.hits}, chybienia {self.misses}"
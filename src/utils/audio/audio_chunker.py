@@ -0,0 +1,175 @@
+# Ten moduł odpowiada za dzielenie długich, przekonwertowanych nagrań na krótsze fragmenty.
+# Nagranie jest cięte w miejscach ciszy (wykrytych filtrem FFMPEG `silencedetect`),
+# dzięki czemu słowa nie są przecinane w połowie. Fragmenty są transkrybowane równolegle,
+# a tekst jest sklejany z powrotem w kolejności przez serwis transkrypcji.
+
+import os  # Moduł do operacji na ścieżkach plików.
+import re  # Wyrażenia regularne do odczytu wyników filtra `silencedetect`.
+import subprocess  # Uruchamianie FFMPEG.
+from src import config, database  # Importujemy własne moduły: konfigurację i operacje na bazie danych.
+from src.utils.error_handlers import with_error_handling, measure_performance  # Dekoratory
+
+# Linie wypisywane przez filtr `silencedetect`, np. "[silencedetect @ 0x...] silence_start: 12.345".
+_SILENCE_START_RE = re.compile(r"silence_start:\s*(-?[\d.]+)")
+_SILENCE_END_RE = re.compile(r"silence_end:\s*([\d.]+)")
+
+
+def detect_silences(audio_path):
+    """
+    Wykrywa fragmenty ciszy w nagraniu za pomocą filtra FFMPEG `silencedetect`.
+
+    Zwraca:
+        list: Lista krotek (początek, koniec) ciszy w sekundach. Przy błędzie zwraca pustą listę.
+    """
+    command = [
+        'ffmpeg', '-hide_banner', '-nostats',
+        '-i', audio_path,
+        '-af', f"silencedetect=noise={config.SILENCE_THRESHOLD_DB}dB:d={config.SILENCE_MIN_DURATION_SECONDS}",
+        '-f', 'null', '-'
+    ]
+    try:
+        result = subprocess.run(command, capture_output=True, text=True, check=True)
+    except Exception as e:
+        print(f"    OSTRZEŻENIE: Nie udało się wykryć ciszy w pliku {os.path.basename(audio_path)}: {e}")
+        return []
+    return _parse_silences(result.stderr)
+
+
+def _parse_silences(ffmpeg_output):
+    """Odczytuje pary (początek, koniec) ciszy z wyjścia filtra `silencedetect`."""
+    silences = []
+    silence_start = None
+    for line in ffmpeg_output.splitlines():
+        start_match = _SILENCE_START_RE.search(line)
+        if start_match:
+            silence_start = max(0.0, float(start_match.group(1)))
+            continue
+        end_match = _SILENCE_END_RE.search(line)
+        if end_match and silence_start is not None:
+            silences.append((silence_start, float(end_match.group(1))))
+            silence_start = None
+    return silences
+
+
+def plan_chunks(duration_sec, silences, max_chunk_sec=None, search_window_sec=None):
+    """
+    Wyznacza granice fragmentów. Każdy fragment jest nie dłuższy niż `max_chunk_sec`;
+    cięcie wypada w środku ostatniej ciszy w oknie `search_window_sec` przed granicą,
+    a jeśli w tym oknie nie ma ciszy - dokładnie na granicy.
+
+    Zwraca:
+        list: Lista krotek (początek, koniec) fragmentów w sekundach.
+    """
+    max_chunk_sec = max_chunk_sec or config.CHUNK_MAX_DURATION_SECONDS
+    if search_window_sec is None:
+        search_window_sec = config.CHUNK_SILENCE_SEARCH_WINDOW_SECONDS
+    # Okno nie może obejmować całego fragmentu - inaczej mogłyby powstać fragmenty zerowej długości.
+    search_window_sec = min(search_window_sec, max_chunk_sec / 2)
+    cut_points = sorted((start + end) / 2 for start, end in silences)
+
+    chunks = []
+    chunk_start = 0.0
+    while duration_sec - chunk_start > max_chunk_sec:
+        limit = chunk_start + max_chunk_sec
+        candidates = [p for p in cut_points if limit - search_window_sec <= p <= limit]
+        cut = candidates[-1] if candidates else limit
+        chunks.append((chunk_start, cut))
+        chunk_start = cut
+    chunks.append((chunk_start, duration_sec))
+    return chunks
+
+
+def _split_audio(source_path, tmp_path, boundaries):
+    """
+    Wycina fragmenty z przekonwertowanego pliku bez ponownego kodowania (`-c copy`).
+
+    Zwraca:
+        list: Lista słowników fragmentów gotowych do zapisu w bazie lub None przy błędzie.
+    """
+    os.makedirs(config.AUDIO_CHUNKS_TMP_DIR, exist_ok=True)
+    base_name, extension = os.path.splitext(os.path.basename(tmp_path))
+
+    chunks = []
+    for index, (start, end) in enumerate(boundaries):
+        chunk_path = os.path.join(config.AUDIO_CHUNKS_TMP_DIR, f"{base_name}_{index:03d}{extension}")
+        command = [
+            'ffmpeg', '-y', '-hide_banner', '-loglevel', 'error',
+            '-ss', f"{start:.3f}", '-to', f"{end:.3f}",
+            '-i', tmp_path,
+            '-c', 'copy',
+            chunk_path
+        ]
+        try:
+            subprocess.run(command, capture_output=True, text=True, check=True)
+        except subprocess.CalledProcessError as e:
+            print(f"    BŁĄD: Nie udało się wyciąć fragmentu {index} z pliku {os.path.basename(source_path)}: {e.stderr.strip()}")
+            return None
+        chunks.append({
+            'chunk_index': index,
+            'tmp_chunk_path': chunk_path,
+            'start_ms': int(start * 1000),
+            'end_ms': int(end * 1000)
+        })
+    return chunks
+
+
+def split_audio_file(source_path, tmp_path, duration_ms):
+    """
+    Dzieli jeden przekonwertowany plik na fragmenty na dysku, nie zapisując niczego w bazie danych
+    (dzięki temu funkcję można wywoływać z wątków roboczych potoku).
+
+    Zwraca:
+        list: Lista słowników fragmentów (pusta, jeśli plik nie wymagał podziału lub wystąpił błąd).
+    """
+    boundaries = plan_chunks(duration_ms / 1000, detect_silences(tmp_path))
+    if len(boundaries) < 2:
+        return []
+
+    chunks = _split_audio(source_path, tmp_path, boundaries)
+    if not chunks:
+        return []
+
+    longest = max(end - start for start, end in boundaries)
+    print(f"    ✓ {os.path.basename(source_path)}: {len(chunks)} fragmentów (najdłuższy: {longest:.0f}s)")
+    return chunks
+
+
+def chunk_audio_file(source_path, tmp_path, duration_ms):
+    """
+    Dzieli jeden przekonwertowany plik na fragmenty i zapisuje je w bazie danych.
+
+    Zwraca:
+        int: Liczba utworzonych fragmentów (0, jeśli plik nie wymagał podziału lub wystąpił błąd).
+    """
+    chunks = split_audio_file(source_path, tmp_path, duration_ms)
+    if chunks:
+        database.add_file_chunks(source_path, chunks)
+    return len(chunks)
+
+
+def needs_chunking(duration_ms):
+    """Sprawdza, czy nagranie o podanej długości powinno zostać podzielone na fragmenty."""
+    return bool(config.CHUNKING_ENABLED and duration_ms and duration_ms > config.CHUNK_MAX_DURATION_SECONDS * 1000)
+
+
+@with_error_handling("Dzielenie długich nagrań")
+@measure_performance
+def chunk_long_audio_files():
+    """
+    Dzieli wszystkie wczytane, nieprzetworzone pliki dłuższe niż `CHUNK_MAX_DURATION_SECONDS`
+    na fragmenty. Pliki podzielone wcześniej są pomijane, więc funkcję można bezpiecznie
+    wywoływać wielokrotnie (np. po wznowieniu przerwanego procesu).
+    """
+    if not config.CHUNKING_ENABLED:
+        return
+
+    files_to_chunk = database.get_files_to_chunk(config.CHUNK_MAX_DURATION_SECONDS * 1000)
+    if not files_to_chunk:
+        return
+
+    print(f"\nKrok 2a: Dzielenie {len(files_to_chunk)} długich nagrań na fragmenty w miejscach ciszy...")
+    for row in files_to_chunk:
+        if not row['tmp_file_path'] or not os.path.exists(row['tmp_file_path']):
+            print(f"    OSTRZEŻENIE: Brak przekonwertowanego pliku dla {os.path.basename(row['source_file_path'])}. Pomijanie.")
+            continue
+        chunk_audio_file(row['source_file_path'], row['tmp_file_path'], row['duration_ms'])
@@ -3,15 +3,20 @@
 # formatu (.mp3, .m4a itp.), zostaną przekonwertowane do standardowego formatu audio,
 # który jest zoptymalizowany dla API Whisper.
 
+import hashlib  # Skrót ścieżki pliku źródłowego w nazwie pliku tymczasowego.
 import os  # Moduł do interakcji z systemem operacyjnym, np. do operacji na ścieżkach plików.
+import shlex  # Dzielenie `config.FFMPEG_PARAMS` na listę argumentów (bez pośrednictwa powłoki).
 import subprocess  # Moduł pozwalający na uruchamianie zewnętrznych programów, w tym przypadku FFMPEG.
-import threading  # Dodane dla obsługi postępu w czasie rzeczywistym
-import time  # Dodane dla kontrolowania odstępów czasowych wyświetlania postępu
+import tempfile  # Plik tymczasowy na komunikaty błędów FFMPEG (stderr).
+import threading  # Blokady chroniące stan współdzielony przez wątki konwersji.
+import time  # Kontrolowanie odstępów czasowych wyświetlania postępu i zapisów do bazy.
 import concurrent.futures  # Dodane dla równoległego przetwarzania
 from concurrent.futures import ThreadPoolExecutor
 from src import config, database  # Importujemy własne moduły: konfigurację i operacje na bazie danych.
 from src.utils.error_handlers import with_error_handling, measure_performance  # Dekoratory
 from src.utils.file_type_helper import is_video_file  # Funkcja do wykrywania plików wideo
+from src.utils.audio.media_probe import analyze_media, media_info_from_row, is_passthrough_compatible  # Parametry audio i szybka ścieżka
+from src.utils.audio.audio_cache import ConvertedAudioCache  # Magazyn przekonwertowanych plików
 
 def _format_duration_ffmpeg(duration_sec):
     """
@@ -23,111 +28,302 @@ def _format_duration_ffmpeg(duration_sec):
     milliseconds = int((duration_sec % 1) * 1000)
     return f"{hours:02d}:{minutes:02d}:{seconds:02d}.{milliseconds:03d}"
 
-def _run_ffmpeg_with_progress(command, filename=None, total_duration=None):
+def _parse_progress_block(block, label=None, total_duration=None):
     """
-    Uruchamia FFmpeg z wyświetlaniem postępu w czasie rzeczywistym.
-    Zwraca True jeśli się udało, False przy błędzie.
+    Zamienia jeden blok strumienia `-progress` FFMPEG (pary klucz=wartość zakończone linią
+    `progress=continue` lub `progress=end`) na zdarzenie postępu.
+
+    Zwraca:
+        dict: Zdarzenie z kluczami 'file', 'percent', 'speed' (krotność czasu rzeczywistego),
+              'eta_seconds', 'elapsed_seconds' i 'done'. Wartości nieznane mają wartość None.
     """
+    # `out_time_ms` mimo nazwy również jest podawany w mikrosekundach.
     try:
-        # Uruchamiamy FFmpeg z przekierowaniem stdout i stderr do PIPE
-        process = subprocess.Popen(
-            command,
-            shell=True,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.STDOUT,  # Łączymy stderr z stdout aby zobaczyć postęp
-            text=True,
-            bufsize=1,  # Line buffered
-            universal_newlines=True
-        )
-
-        # Zmienna do śledzenia czy proces nadal działa
-        process_finished = [False]
-
-        def read_output():
-            """Czyta wyjście z FFmpeg w czasie rzeczywistym, wyświetlając postęp co 5 sekund."""
-            last_display_time = 0
-            display_interval = 5.0  # Wyświetlaj postęp co 5 sekund
-            try:
-                while True:
-                    # Czytaj dostępne linie bez blokowania
-                    line = process.stdout.readline()
-                    if not line:  # Brak więcej danych
-                        if process.poll() is not None:  # Proces zakończył się
-                            break
-                        time.sleep(0.1)  # Krótkie czekanie przed następną próbą
-                        continue
+        elapsed = int(block.get('out_time_us') or block.get('out_time_ms')) / 1_000_000
+    except (TypeError, ValueError):
+        elapsed = None
+    try:
+        speed = float(block.get('speed', '').rstrip('x'))
+    except ValueError:
+        speed = None
 
-                    current_time = time.time()
-                    line_str = line.strip()
-                    if line_str:  # Wyświetlaj tylko niepuste linie
-                        # Wyświetlaj tylko jeśli minęło 5 sekund od ostatniego wyświetlenia
-                        if current_time - last_display_time >= display_interval:
-                            if filename and total_duration is not None:
-                                formatted_duration = _format_duration_ffmpeg(total_duration)
-                                print(f"[{filename}] [{formatted_duration}] {line_str}")
-                            else:
-                                print(line_str)  # Wyślij do naszego redirectora terminala
-                            last_display_time = current_time
+    done = block.get('progress') == 'end'
+    percent = eta = None
+    if total_duration and elapsed is not None:
+        percent = 100.0 if done else min(100.0, elapsed / total_duration * 100)
+        if done:
+            eta = 0.0
+        elif speed:
+            eta = max(0.0, (total_duration - elapsed) / speed)
 
-            except Exception as e:
-                print(f"Błąd podczas czytania wyjścia FFmpeg: {e}")
-            finally:
-                process_finished[0] = True
+    return {
+        'file': label,
+        'percent': percent,
+        'speed': speed,
+        'eta_seconds': eta,
+        'elapsed_seconds': elapsed,
+        'done': done
+    }
 
-        # Uruchamiamy wątek do czytania wyjścia
-        output_thread = threading.Thread(target=read_output, daemon=True)
-        output_thread.start()
+def format_progress_event(event):
+    """Formatuje zdarzenie postępu do jednej linii, np. '[plik.mp3] 45.0% | 12.3x | ETA 00:00:04.100'."""
+    parts = []
+    if event['percent'] is not None:
+        parts.append(f"{event['percent']:5.1f}%")
+    elif event['elapsed_seconds'] is not None:
+        parts.append(_format_duration_ffmpeg(event['elapsed_seconds']))
+    if event['speed'] is not None:
+        parts.append(f"{event['speed']:.1f}x")
+    if event['eta_seconds'] is not None:
+        parts.append(f"ETA {_format_duration_ffmpeg(event['eta_seconds'])}")
+    return f"[{event['file']}] " + " | ".join(parts)
 
-        # Czekamy na zakończenie procesu
-        try:
-            process.wait()
-            output_thread.join(timeout=1.0)  # Daj czas wątkowi na zakończenie
-            return process.returncode == 0
-        except Exception:
-            print(f"    BŁĄD: FFmpeg napotkał błąd podczas przetwarzania")
-            process.terminate()
+def run_ffmpeg(command, label=None, total_duration=None, on_progress=None):
+    """
+    Uruchamia FFmpeg (lista argumentów, bez powłoki) i przekazuje ustrukturyzowane zdarzenia postępu.
+
+    FFmpeg wypisuje na stdout maszynowo czytelny strumień `-progress pipe:1`, który czytamy
+    blokująco w bieżącym wątku - bez dodatkowego wątku i bez aktywnego odpytywania.
+    Komunikaty diagnostyczne (stderr) trafiają do pliku tymczasowego i są wyświetlane tylko przy błędzie.
+
+    Argumenty:
+        command (list): Polecenie FFmpeg zawierające `-progress pipe:1`.
+        label (str, opcjonalnie): Nazwa pliku w zdarzeniach postępu i komunikatach.
+        total_duration (float, opcjonalnie): Długość nagrania w sekundach (do obliczenia procentu i ETA).
+        on_progress (function, opcjonalnie): Funkcja wywoływana ze zdarzeniem postępu (słownikiem).
+
+    Zwraca:
+        bool: True jeśli konwersja się powiodła, False przy błędzie.
+    """
+    try:
+        with tempfile.TemporaryFile(mode="w+", encoding="utf-8", errors="replace") as stderr_file:
+            process = subprocess.Popen(
+                command,
+                stdout=subprocess.PIPE,
+                stderr=stderr_file,
+                text=True,
+                encoding="utf-8",
+                errors="replace"
+            )
             try:
-                process.wait(timeout=5)  # Daj czas na zamknięcie
-            except subprocess.TimeoutExpired:
-                process.kill()  # Wymuś zamknięcie jeśli terminate nie działa
-            return False
+                block = {}
+                for line in process.stdout:
+                    key, separator, value = line.strip().partition("=")
+                    if not separator:
+                        continue
+                    block[key] = value
+                    # Linia `progress=...` zamyka blok - przekazujemy zdarzenie i zaczynamy nowy blok.
+                    if key == "progress":
+                        if on_progress:
+                            on_progress(_parse_progress_block(block, label, total_duration))
+                        block = {}
+                process.wait()
+            finally:
+                # Jeśli przerwano odczyt (np. wyjątkiem), nie zostawiamy działającego procesu FFmpeg.
+                if process.poll() is None:
+                    process.kill()
+                    process.wait()
+
+            if process.returncode != 0:
+                stderr_file.seek(0)
+                error_lines = stderr_file.read().strip().splitlines()[-5:]
+                print(f"    BŁĄD: FFmpeg zakończył się kodem {process.returncode} dla pliku {label}: "
+                      + " | ".join(error_lines))
+                return False
+            return True
 
     except Exception as e:
         print(f"    BŁĄD podczas uruchamiania FFmpeg: {e}")
         return False
 
-def _convert_single_file(original_path):
+class ConversionProgressReporter:
+    """
+    Odbiorca zdarzeń postępu konwersji. W terminalu wyświetla postęp każdego pliku
+    co `CONVERSION_PROGRESS_INTERVAL_SECONDS` (krótkie konwersje nie zaśmiecają wyjścia),
+    a w trybie GUI przekazuje zdarzenia do `app.on_conversion_progress` - zbiorczo,
+    jednym wywołaniem `app.after` naraz, z najnowszym zdarzeniem dla każdego pliku.
+    """
+    def __init__(self, app=None, interval=None):
+        self.app = app
+        self.interval = config.CONVERSION_PROGRESS_INTERVAL_SECONDS if interval is None else interval
+        self._last_print = {}
+        self._latest_events = {}
+        self._gui_update_pending = False
+        self._lock = threading.Lock()
+
+    def __call__(self, event):
+        """Przyjmuje zdarzenie postępu z wątku konwersji."""
+        self._print(event)
+        if self.app and hasattr(self.app, 'on_conversion_progress'):
+            self._forward_to_gui(event)
+
+    def _print(self, event):
+        now = time.monotonic()
+        with self._lock:
+            if event['done']:
+                self._last_print.pop(event['file'], None)
+                return
+            last = self._last_print.setdefault(event['file'], now)
+            if now - last < self.interval:
+                return
+            self._last_print[event['file']] = now
+        print(f"    {format_progress_event(event)}")
+
+    def _forward_to_gui(self, event):
+        with self._lock:
+            self._latest_events[event['file']] = event
+            if self._gui_update_pending:
+                return
+            self._gui_update_pending = True
+        self.app.after(0, self._flush_to_gui)
+
+    def _flush_to_gui(self):
+        """Przekazuje zebrane zdarzenia do GUI (wykonywane w głównym wątku GUI)."""
+        with self._lock:
+            events = list(self._latest_events.values())
+            self._latest_events.clear()
+            self._gui_update_pending = False
+        for event in events:
+            self.app.on_conversion_progress(event)
+
+def _codec_args(is_video, passthrough=False):
+    """Zwraca argumenty FFmpeg wybierające ścieżkę audio i sposób jej zapisu (kopia lub `FFMPEG_PARAMS`)."""
+    if passthrough:
+        # Kopiujemy tylko pierwszą ścieżkę audio (bez obrazu, napisów i danych) do kontenera .m4a.
+        return ['-map', '0:a:0', '-vn', '-c:a', 'copy']
+    # Dla plików wideo ekstrahujemy tylko audio (-vn ignoruje strumień wideo)
+    return (['-vn'] if is_video else []) + shlex.split(config.FFMPEG_PARAMS)
+
+def _build_ffmpeg_command(original_path, tmp_file_path, is_video, passthrough=False):
+    """
+    Buduje polecenie FFmpeg jako listę argumentów (bez powłoki, więc ścieżki nie wymagają cudzysłowów).
+    W trybie `passthrough` pierwsza ścieżka audio jest kopiowana bez ponownego kodowania.
+    """
+    command = ['ffmpeg', '-y', '-hide_banner', '-nostats', '-progress', 'pipe:1', '-i', original_path]
+    command.extend(_codec_args(is_video, passthrough))
+    command.append(tmp_file_path)
+    return command
+
+def _build_stream_command(original_path, is_video, passthrough=False):
+    """
+    Buduje polecenie FFmpeg zapisujące wynik na standardowe wyjście zamiast do pliku.
+    Zwykły kontener MP4 wymaga przewijania pliku po zakończeniu zapisu, więc do potoku
+    zapisujemy jego wariant fragmentowany (`frag_keyframe+empty_moov`), który API przyjmuje jako .m4a.
+    Standardowe wyjście zajmuje dźwięk, dlatego w tym trybie nie ma zdarzeń postępu.
+    """
+    command = ['ffmpeg', '-hide_banner', '-nostats', '-loglevel', 'error', '-i', original_path]
+    command.extend(_codec_args(is_video, passthrough))
+    command.extend(['-f', 'mp4', '-movflags', 'frag_keyframe+empty_moov', 'pipe:1'])
+    return command
+
+def get_tmp_file_path(original_path):
+    """
+    Zwraca ścieżkę przekonwertowanego pliku w `AUDIO_TMP_DIR` - standardową, bezpieczną nazwę z rozszerzeniem .m4a.
+    Nazwa zawiera skrót absolutnej ścieżki pliku źródłowego, dzięki czemu pliki o tej samej nazwie
+    (`folder1/a.mp3` i `folder2/a.mp3` albo `a.mp3` i `a.wav`) konwertowane równolegle nie zapisują tego samego pliku.
+    """
+    base_name = os.path.basename(original_path)
+    standardized_name, _ = os.path.splitext(base_name.lower().replace(' ', '_'))
+    path_hash = hashlib.sha1(os.path.abspath(original_path).encode("utf-8", "surrogateescape")).hexdigest()[:10]
+    return os.path.join(config.AUDIO_TMP_DIR, f"{standardized_name}_{path_hash}.m4a")
+
+def encode_to_memory(original_path, media_info=None):
+    """
+    Konwertuje plik do formatu gotowego do transkrypcji bez zapisywania czegokolwiek na dysku:
+    FFmpeg pisze do potoku, a wynik trafia do pamięci. Nagrania zgodne z profilem transkrypcji
+    są tylko przepakowywane, tak jak w `_convert_single_file`.
+
+    Argumenty:
+        original_path (str): Ścieżka do pliku źródłowego.
+        media_info (dict, opcjonalnie): Wynik `analyze_media` zapisany w bazie; jeśli go brak, plik jest analizowany.
+
+    Zwraca:
+        bytes lub None: Zawartość pliku .m4a albo None przy błędzie.
+    """
+    base_name = os.path.basename(original_path)
+    is_video = is_video_file(original_path)
+    passthrough = is_passthrough_compatible(media_info or analyze_media(original_path))
+    print(f"  Konwertowanie do pamięci: {base_name}")
+
+    for copy_stream in ([True, False] if passthrough else [False]):
+        try:
+            result = subprocess.run(_build_stream_command(original_path, is_video, copy_stream), capture_output=True)
+        except Exception as e:
+            print(f"    BŁĄD podczas uruchamiania FFmpeg: {e}")
+            return None
+        if result.returncode == 0 and result.stdout:
+            return result.stdout
+        error_lines = result.stderr.decode("utf-8", errors="replace").strip().splitlines()[-5:]
+        print(f"    BŁĄD: FFmpeg zakończył się kodem {result.returncode} dla pliku {base_name}: " + " | ".join(error_lines))
+    return None
+
+def get_stored_media_infos(file_paths):
+    """
+    Zwraca zapisane w bazie wyniki analizy plików (długość i parametry ścieżki audio) w formacie
+    `analyze_media` - jednym zapytaniem na paczkę ścieżek (`get_media_info_bulk`) zamiast jednego na plik.
+    Wywoływana przed zleceniem konwersji, aby wątki robocze nie musiały odpytywać bazy ani ponownie
+    uruchamiać `ffprobe`.
+
+    Zwraca:
+        dict: Ścieżka pliku -> słownik w formacie `analyze_media` lub None (plik jeszcze nieanalizowany).
+    """
+    return {path: media_info_from_row(row) for path, row in database.get_media_info_bulk(file_paths).items()}
+
+def _convert_single_file(original_path, media_info=None, on_progress=None, audio_cache=None):
     """
     Konwertuje pojedynczy plik i zwraca tuple (source, tmp) lub None przy błędzie.
     Funkcja przeznaczona do równoległego przetwarzania.
     Dla plików wideo ekstrahuje tylko ścieżkę audio (-vn), dla audio używa standardowych parametrów.
+    Pliki przekonwertowane wcześniej z tymi samymi parametrami są kopiowane z magazynu bez uruchamiania FFMPEG.
+
+    Argumenty:
+        original_path (str): Ścieżka do pliku źródłowego.
+        media_info (dict, opcjonalnie): Wynik `analyze_media` zapisany w bazie (długość do obliczenia procentu
+                                        i ETA, parametry audio do decyzji o szybkiej ścieżce).
+                                        Jeśli go brak, plik jest analizowany teraz.
+        on_progress (function, opcjonalnie): Odbiorca zdarzeń postępu, np. `ConversionProgressReporter`.
+        audio_cache (ConvertedAudioCache, opcjonalnie): Magazyn przekonwertowanych plików.
     """
     try:
         # Tworzymy standardową, bezpieczną nazwę pliku wyjściowego.
         base_name = os.path.basename(original_path)
-        standardized_name, _ = os.path.splitext(base_name.lower().replace(' ', '_'))
-        output_filename = f"{standardized_name}.m4a"
-        tmp_file_path = os.path.join(config.AUDIO_TMP_DIR, output_filename)
+        tmp_file_path = get_tmp_file_path(original_path)
+        output_filename = os.path.basename(tmp_file_path)
+
+        cache_key = None
+        if audio_cache:
+            cache_key, restored = audio_cache.restore(original_path, tmp_file_path)
+            if restored:
+                print(f"  Z magazynu audio (bez konwersji): {base_name} -> {output_filename}")
+                return (original_path, tmp_file_path)
 
         print(f"  Konwertowanie: {os.path.basename(original_path)} -> {os.path.basename(tmp_file_path)}")
 
-        # Sprawdzamy czy plik jest wideo
         is_video = is_video_file(original_path)
+        if media_info is None:
+            # Plik nieprzeanalizowany przy wczytywaniu metadanych (np. baza ze starszej wersji aplikacji).
+            media_info = analyze_media(original_path)
+        total_duration = media_info['duration_sec'] if media_info else None
 
-        # Budujemy komendę FFMPEG
-        if is_video:
-            # Dla plików wideo ekstrahujemy tylko audio (-vn ignoruje strumień wideo)
-            command = f'ffmpeg -y -i "{original_path}" -vn {config.FFMPEG_PARAMS} "{tmp_file_path}"'
-        else:
-            # Dla plików audio używamy standardowych parametrów
-            command = f'ffmpeg -y -i "{original_path}" {config.FFMPEG_PARAMS} "{tmp_file_path}"'
+        # Szybka ścieżka: nagrania, które już są w formacie mono AAC (np. notatki głosowe z telefonu
+        # albo wideo z taką ścieżką audio), tylko przepakowujemy - bez dekodowania i kodowania.
+        if is_passthrough_compatible(media_info):
+            command = _build_ffmpeg_command(original_path, tmp_file_path, is_video, passthrough=True)
+            if run_ffmpeg(command, label=base_name, total_duration=total_duration, on_progress=on_progress):
+                print(f"    Skopiowano ścieżkę audio bez ponownego kodowania: {base_name}")
+                if audio_cache:
+                    audio_cache.store(cache_key, tmp_file_path)
+                return (original_path, tmp_file_path)
+            print(f"    Kopiowanie ścieżki audio nie powiodło się, pełna konwersja: {base_name}")
 
+        command = _build_ffmpeg_command(original_path, tmp_file_path, is_video)
 
-        # Uruchamiamy FFmpeg z wyświetlaniem postępu w czasie rzeczywistym
-        filename = os.path.basename(original_path)
-        success = _run_ffmpeg_with_progress(command, filename)
+        # Uruchamiamy FFmpeg, przekazując postęp jako ustrukturyzowane zdarzenia.
+        success = run_ffmpeg(command, label=base_name, total_duration=total_duration, on_progress=on_progress)
 
         if success:
+            if audio_cache:
+                audio_cache.store(cache_key, tmp_file_path)
             return (original_path, tmp_file_path)
         else:
             return None
@@ -136,13 +332,54 @@ def _convert_single_file(original_path):
         print(f"    KRYTYCZNY BŁĄD podczas przetwarzania pliku {os.path.basename(original_path)}: {ex}")
         return None
 
+def get_conversion_workers(max_workers=None):
+    """
+    Zwraca liczbę równoległych konwersji FFMPEG: wartość podaną jawnie, z `config.CONVERSION_MAX_WORKERS`
+    albo - domyślnie - liczbę rdzeni procesora (`os.cpu_count()`).
+    """
+    workers = max_workers or config.CONVERSION_MAX_WORKERS or os.cpu_count() or 1
+    return max(1, workers)
+
+class _GuiRefresher:
+    """
+    Łączy wiele żądań odświeżenia GUI w jedno wywołanie `app.after`.
+    Dopóki zaplanowane odświeżenie nie zostało wykonane, kolejne żądania są pomijane,
+    więc przy setkach plików GUI nie dostaje setek kolejek zadań do wykonania.
+    """
+    def __init__(self, app):
+        self.app = app
+        self._pending = False
+        self._lock = threading.Lock()
+
+    def request(self):
+        """Planuje odświeżenie GUI, jeśli żadne nie czeka jeszcze na wykonanie."""
+        if not self.app:
+            return
+        with self._lock:
+            if self._pending:
+                return
+            self._pending = True
+        self.app.after(0, self._refresh)
+
+    def _refresh(self):
+        """Odświeża liczniki i widoki postępu (wykonywane w głównym wątku GUI)."""
+        with self._lock:
+            self._pending = False
+        self.app.panel_manager.refresh_transcription_progress_views()
+        self.app.update_all_counters()
+
 @with_error_handling("Konwersja plików audio")
 @measure_performance
-def encode_audio_files(app=None):
+def encode_audio_files(app=None, max_workers=None):
     """
-    Pobiera z bazy danych listę plików do przetworzenia, konwertuje je do formatu audio gotowego do transkrypcji
-    za pomocą zewnętrznego narzędzia FFMPEG z sekwencyjnym przetwarzaniem,
-    aktualizując GUI po każdym przetworzonym pliku.
+    Pobiera z bazy danych listę plików do przetworzenia i konwertuje je do formatu audio gotowego
+    do transkrypcji za pomocą zewnętrznego narzędzia FFMPEG. Konwersje działają równolegle w puli
+    wątków (każdy wątek uruchamia osobny proces FFMPEG), a wyniki są zapisywane w bazie danych
+    partiami, po których GUI jest odświeżane jednym zbiorczym wywołaniem.
+
+    Argumenty:
+        app (App, opcjonalnie): Referencja do aplikacji GUI, odświeżanej w trakcie konwersji.
+        max_workers (int, opcjonalnie): Liczba równoległych konwersji. Domyślnie `get_conversion_workers()`.
     """
     print("\nKrok 2: Konwertowanie plików audio do formatu gotowego do transkrypcji...")
 
@@ -155,30 +392,58 @@ def encode_audio_files(app=None):
     # Upewniamy się, że folder na przekonwertowane pliki audio istnieje.
     os.makedirs(config.AUDIO_TMP_DIR, exist_ok=True)
 
-    print(f"Rozpoczynam sekwencyjną konwersję {len(files_to_encode)} plików...")
+    workers = min(get_conversion_workers(max_workers), len(files_to_encode))
+    print(f"Rozpoczynam konwersję {len(files_to_encode)} plików (równolegle: {workers})...")
 
     successful_conversions = []
+    # Partia wyników czekająca na zapis w bazie danych.
+    pending_batch = []
+    last_flush_time = time.monotonic()
+    gui_refresher = _GuiRefresher(app)
+    progress_reporter = ConversionProgressReporter(app)
+    audio_cache = ConvertedAudioCache()
 
-    # Przetwarzaj pliki sekwencyjnie
-    for i, original_path in enumerate(files_to_encode, 1):
-        print(f"Przetwarzanie pliku {i}/{len(files_to_encode)}: {os.path.basename(original_path)}")
+    def flush_batch():
+        """Zapisuje partię wyników jednym wywołaniem `set_files_as_loaded` i odświeża GUI."""
+        nonlocal last_flush_time
+        if pending_batch:
+            source_paths, tmp_paths = zip(*pending_batch)
+            database.set_files_as_loaded(list(source_paths), list(tmp_paths))
+            pending_batch.clear()
+            gui_refresher.request()
+        last_flush_time = time.monotonic()
 
-        result = _convert_single_file(original_path)
-        if result:
-            source_path, tmp_path = result
-            successful_conversions.append(result)
+    media_infos = get_stored_media_infos(files_to_encode)
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ffmpeg") as executor:
+        futures = {
+            executor.submit(_convert_single_file, path, media_infos.get(path), progress_reporter, audio_cache): path
+            for path in files_to_encode
+        }
+        # Wyniki odbieramy w kolejności ukończenia - zapis do bazy odbywa się tylko w tym wątku.
+        for completed, future in enumerate(concurrent.futures.as_completed(futures), 1):
+            original_path = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                print(f"    KRYTYCZNY BŁĄD podczas przetwarzania pliku {os.path.basename(original_path)}: {e}")
+                result = None
 
-            # Aktualizuj bazę danych natychmiast po przetworzeniu pliku
-            database.set_files_as_loaded([source_path], [tmp_path])
-            print(f"    ✓ Przetworzono i dodano do bazy: {os.path.basename(source_path)}")
+            if result:
+                successful_conversions.append(result)
+                pending_batch.append(result)
+                print(f"    ✓ [{completed}/{len(files_to_encode)}] Przetworzono: {os.path.basename(original_path)}")
+            else:
+                print(f"    ✗ [{completed}/{len(files_to_encode)}] Nie udało się przetworzyć: {os.path.basename(original_path)}")
 
-            # Odśwież GUI jeśli mamy referencję do aplikacji
-            if app:
-                app.after(0, lambda: app.invalidate_cache())
-                app.after(0, lambda: app.panel_manager.refresh_transcription_progress_views())
-                app.after(0, lambda: app.update_all_counters())
-        else:
-            print(f"    ✗ Nie udało się przetworzyć: {os.path.basename(original_path)}")
+            if (len(pending_batch) >= config.CONVERSION_DB_BATCH_SIZE
+                    or time.monotonic() - last_flush_time >= config.CONVERSION_FLUSH_INTERVAL_SECONDS):
+                flush_batch()
+
+    # Zapisujemy ostatnią, niepełną partię.
+    flush_batch()
+
+    if audio_cache.enabled:
+        print(audio_cache.summary())
 
     if successful_conversions:
         print(f"Pomyślnie przekonwertowano i oznaczono jako załadowane: {len(successful_conversions)} plików.")
@@ -187,4 +452,4 @@ def encode_audio_files(app=None):
         failed_count = len(files_to_encode) - len(successful_conversions)
         print(f"Nie udało się przekonwertować: {failed_count} plików.")
 
-    print("Zakończono konwersję plików.")
\ No newline at end of file
+    print("Zakończono konwersję plików.")
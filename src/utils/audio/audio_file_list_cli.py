@@ -3,44 +3,80 @@
 # gdzie użytkownik podaje folder do przeszukania jako argument startowy.
 
 import os  # Moduł do interakcji z systemem operacyjnym, niezbędny do przeszukiwania folderów.
-from src import config, database  # Importujemy własne moduły: konfigurację i operacje na bazie danych.
+import time  # Pomiar czasu skanowania.
+from src import database  # Moduł do operacji na bazie danych.
+from src.utils.file_type_helper import is_supported_file  # Filtrowanie plików po rozszerzeniu.
+from src.utils.audio.scan_manifest import rescan_with_manifest  # Przyrostowy skan z manifestem.
 
-def get_audio_file_list_cli(input_directory):
+
+def scan_audio_files(input_directory):
     """
-    Rekursywnie przeszukuje podany katalog wejściowy (`input_directory`),
-    znajduje wszystkie pliki pasujące do zdefiniowanych rozszerzeń audio
-    i dodaje ich pełne, absolutne ścieżki do bazy danych.
+    Rekursywnie przeszukuje katalog za pomocą `os.scandir` i zwraca obsługiwane pliki.
+
+    `os.scandir` podaje typ wpisu razem z jego nazwą, więc - w przeciwieństwie do `os.walk`
+    z osobnym `os.stat` - każdy plik jest odpytywany na dysku najwyżej raz. Ma to duże znaczenie
+    dla udziałów sieciowych (NAS), gdzie każde zapytanie o plik to osobna wymiana z serwerem.
+    Tak jak `os.walk`, nie wchodzi do dowiązań symbolicznych do folderów i pomija foldery,
+    których nie da się odczytać.
+
+    Zwraca:
+        generator: Krotki (absolutna ścieżka, czas modyfikacji, rozmiar w bajtach).
+    """
+    pending_directories = [os.path.abspath(input_directory)]
+    while pending_directories:
+        directory = pending_directories.pop()
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            pending_directories.append(entry.path)
+                        elif entry.is_file() and is_supported_file(entry.name):
+                            # Czas modyfikacji zapisujemy w bazie - przetwarzanie metadanych sortuje po nim pliki.
+                            stat = entry.stat()
+                            yield entry.path, stat.st_mtime, stat.st_size
+                    except OSError as e:
+                        print(f"OSTRZEŻENIE: Pominięto {entry.path}: {e}")
+        except OSError as e:
+            print(f"OSTRZEŻENIE: Nie można odczytać folderu {directory}: {e}")
+
+
+def get_audio_file_list_cli(input_directory, full_rescan=False):
+    """
+    Rekursywnie przeszukuje podany katalog wejściowy (`input_directory`) i aktualizuje bazę danych.
+
+    Skan jest przyrostowy (`rescan_with_manifest`): foldery niezmienione od poprzedniego skanu są pomijane.
+    Nowe pliki są dodawane w jednej transakcji (razem z czasem modyfikacji i rozmiarem), zmienione -
+    przetwarzane od nowa (metadane, konwersja i transkrypcja), a usunięte z dysku znikają z bazy,
+    chyba że mają już transkrypcję.
+
+    Argumenty:
+        input_directory (str): Absolutna ścieżka do folderu z nagraniami.
+        full_rescan (bool): Jeśli True, sprawdza wszystkie pliki, także w folderach bez zmian.
     """
     print("Krok 1 (CLI): Wyszukiwanie plików audio i dodawanie do bazy danych...")
 
-    # Inicjalizujemy licznik znalezionych plików.
-    found_files_count = 0
-    # `os.walk(input_directory)` to potężna funkcja, która "spaceruje" po drzewie katalogów.
-    # Dla każdego folderu (włącznie z podfolderami) zwraca trzy wartości:
-    # - `root`: aktualnie przeszukiwany folder.
-    # - `_`: lista podfolderów w `root` (używamy `_`, bo nie potrzebujemy tej informacji).
-    # - `files`: lista plików w `root`.
-    for root, _, files in os.walk(input_directory):
-        # Iterujemy przez każdy plik znaleziony w danym folderze.
-        for file in files:
-            # `os.path.splitext(file)` dzieli nazwę pliku na część główną i rozszerzenie.
-            # Bierzemy drugi element (`[1]`), czyli rozszerzenie (np. ".mp3").
-            # `.lower()` zamienia je na małe litery, aby porównanie było niezależne od wielkości liter.
-            extension = os.path.splitext(file)[1].lower()
-
-            # Sprawdzamy, czy znalezione rozszerzenie znajduje się na naszej liście dozwolonych rozszerzeń w `config`.
-            # Warunek `config.ALL_SUPPORTED_EXTENSIONS is None` jest zabezpieczeniem, gdyby lista była pusta (choć w tym projekcie nie jest).
-            if config.ALL_SUPPORTED_EXTENSIONS is None or extension in config.ALL_SUPPORTED_EXTENSIONS:
-                # Jeśli plik ma pasujące rozszerzenie:
-                # 1. `os.path.join(root, file)` tworzy pełną ścieżkę do pliku.
-                # 2. `os.path.abspath` konwertuje ją na ścieżkę absolutną (np. "C:\Users\...\plik.mp3").
-                #    Jest to ważne, aby uniknąć problemów ze ścieżkami względnymi.
-                full_path = os.path.abspath(os.path.join(root, file))
-                # Dodajemy znalezioną ścieżkę do bazy danych. Funkcja `add_file` zajmie się resztą
-                # (sprawdzeniem, czy plik już istnieje, obliczeniem czasu trwania itp.).
-                database.add_file(full_path)
-                # Zwiększamy licznik znalezionych plików.
-                found_files_count += 1
+    start_time = time.perf_counter()
+    # Skan (odczyt dysku) odbywa się poza transakcją, aby nie blokować zapisów do bazy na czas przeszukiwania.
+    changes = rescan_with_manifest(input_directory, full_rescan=full_rescan)
+    # Manifest i tabela `files` są aktualizowane w jednej transakcji - przerwany zapis nie zostawi
+    # manifestu, który "pamięta" zmianę pliku, bez unieważnienia jego wyników w tabeli `files`.
+    with database.transaction():
+        database.save_scan_manifest(**changes['manifest'])
+        # Pliki z manifestu, których brakuje w tabeli `files` (np. po resecie), dodajemy tak jak nowe.
+        new_paths = {file_path for file_path, _, _ in changes['new']}
+        missing_files = [(row['path'], row['mtime_ns'] / 1e9, row['size'])
+                         for row in database.get_manifest_files_missing_from_db(input_directory)
+                         if row['path'] not in new_paths]
+        # Sortujemy ścieżki, aby kolejność dodawania (i identyfikatory w bazie) nie zależała od systemu plików.
+        added_count, known_count = database.add_files(sorted(changes['new'] + missing_files))
+        invalidated_count = database.invalidate_files(changes['modified']) if changes['modified'] else 0
+        removed_count = database.remove_deleted_files(changes['deleted']) if changes['deleted'] else 0
+    elapsed = time.perf_counter() - start_time
 
     # Po zakończeniu przeszukiwania, informujemy użytkownika o wyniku.
-    print(f"Znaleziono i dodano do bazy danych {found_files_count} plików.")
\ No newline at end of file
+    print(f"Skan zakończony w {elapsed:.2f}s (folderów sprawdzonych: {changes['scanned_directories']}, "
+          f"pominiętych bez zmian: {changes['skipped_directories']}).")
+    print(f"Pliki: nowe {added_count}, już obecne w bazie {known_count}, bez zmian {changes['unchanged']}, "
+          f"zmienione {len(changes['modified'])} (do ponownego przetworzenia: {invalidated_count}), "
+          f"usunięte z dysku {len(changes['deleted'])} (usunięte z bazy: {removed_count}).")
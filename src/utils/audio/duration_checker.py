@@ -1,16 +1,93 @@
 # Ten moduł zawiera funkcje do sprawdzania długości (czasu trwania) plików audio.
-# Wykorzystuje do tego celu zewnętrzne narzędzie `ffprobe`, które jest częścią pakietu FFMPEG.
+# Wyniki analizy (`analyze_media`) są przechowywane w bazie danych, a funkcje zbiorcze pobierają je
+# dla całej listy plików jednym zapytaniem, analizują tylko brakujące pliki i zapisują je jedną transakcją.
+
+import os  # Moduł do sprawdzania liczby rdzeni procesora.
+from concurrent.futures import ThreadPoolExecutor  # Równoległa analiza plików.
+from src import config, database  # Importujemy konfigurację i moduł do operacji na bazie danych.
+from src.utils.audio.media_probe import analyze_media, media_info_from_row, codec_for_storage  # Analiza pliku i odczyt jej wyników z bazy.
+
+
+def _analyze_files(file_paths):
+    """
+    Analizuje pliki (`analyze_media`) równolegle w ograniczonej puli wątków - każdy wątek czeka
+    na odczyt nagłówka albo na osobny proces `ffprobe`.
+
+    Zwraca:
+        list: Wyniki analizy w tej samej kolejności co `file_paths` (None przy błędzie).
+    """
+    # Analiza czyta głównie nagłówki plików, więc wątków może być więcej niż rdzeni procesora.
+    workers = config.METADATA_PROBE_MAX_WORKERS or min(32, (os.cpu_count() or 1) + 4)
+    workers = min(max(1, workers), len(file_paths))
+    if workers == 1:
+        return [analyze_media(file_path) for file_path in file_paths]
+    print(f"Analiza {len(file_paths)} plików (równolegle: {workers})...")
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ffprobe") as executor:
+        # `map` zwraca wyniki w kolejności zleceń, niezależnie od kolejności ukończenia.
+        return list(executor.map(analyze_media, file_paths))
+
+
+def _analyze_and_store(file_paths):
+    """
+    Analizuje pliki i zapisuje udane wyniki w bazie jedną transakcją.
+
+    Zwraca:
+        dict: Ścieżka pliku -> wynik `analyze_media` (pusty słownik przy błędzie analizy).
+    """
+    results = {}
+    analyzed = {}
+    for file_path, media_info in zip(file_paths, _analyze_files(file_paths)):
+        results[file_path] = media_info or {}
+        if media_info and media_info['duration_sec']:
+            # Plik bez kodeka audio zapisujemy ze znacznikiem, aby nie był analizowany przy każdym wywołaniu.
+            analyzed[file_path] = {**media_info, 'codec': codec_for_storage(media_info)}
+    database.save_media_info_bulk(analyzed)
+    return results
+
+
+def get_media_infos(file_paths):
+    """
+    Zwraca wyniki analizy dla całej listy plików: zapisane w bazie pobiera jednym zapytaniem,
+    a analizuje tylko pliki bez zapisanych parametrów audio.
+
+    Zwraca:
+        dict: Ścieżka pliku -> słownik w formacie `analyze_media` (pusty słownik przy błędzie analizy).
+    """
+    cached_rows = database.get_media_info_bulk(file_paths)
+    results = {file_path: media_info_from_row(cached_rows.get(file_path)) for file_path in file_paths}
+    missing = [file_path for file_path, media_info in results.items() if media_info is None]
+    if missing:
+        results.update(_analyze_and_store(missing))
+    return results
+
+
+def get_file_durations(file_paths):
+    """
+    Zwraca czasy trwania listy plików w sekundach (0.0 dla plików, których nie udało się przeanalizować).
+    Pliki z zapisaną długością nie są analizowane ponownie, nawet jeśli brakuje im parametrów audio.
+    """
+    cached_rows = database.get_media_info_bulk(file_paths)
+    durations = {}
+    missing = []
+    for file_path in file_paths:
+        row = cached_rows.get(file_path)
+        if row and row['duration_ms']:
+            durations[file_path] = row['duration_ms'] / 1000.0
+        else:
+            missing.append(file_path)
+
+    if missing:
+        for file_path, media_info in _analyze_and_store(missing).items():
+            durations[file_path] = media_info.get('duration_sec') or 0.0
+    return durations
 
-import os  # Moduł do interakcji z systemem operacyjnym, np. do pobierania nazwy pliku ze ścieżki.
-import subprocess  # Moduł pozwalający na uruchamianie zewnętrznych programów, w tym `ffprobe`.
-import json  # Moduł do pracy z formatem danych JSON, w którym `ffprobe` zwraca wyniki.
-from src import config, database  # Importujemy własne moduły: konfigurację i operacje na bazie danych.
 
 def get_file_duration(file_path):
     """
-    Pobiera czas trwania pliku audio za pomocą narzędzia ffprobe z cachowaniem.
+    Pobiera czas trwania pliku audio, korzystając z wyników zapisanych w bazie danych.
 
-    Najpierw sprawdza cache w bazie danych, jeśli nie ma - oblicza i zapisuje.
+    Jeśli pliku nie analizowano wcześniej, analizuje go i zapisuje w bazie zarówno długość,
+    jak i parametry ścieżki audio. Dla wielu plików należy użyć `get_file_durations`.
 
     Argumenty:
         file_path (str): Ścieżka do pliku audio, którego czas trwania ma być sprawdzony.
@@ -18,41 +95,4 @@ def get_file_duration(file_path):
     Zwraca:
         float: Czas trwania pliku w sekundach. Jeśli wystąpi błąd, zwraca 0.0.
     """
-    from src import database
-
-    # Najpierw sprawdź cache w bazie danych
-    cached_result = database.get_cached_duration(file_path)
-    if cached_result:
-        return cached_result['duration_ms'] / 1000.0
-
-    # Jeśli nie ma w cache, oblicz duration
-    duration_sec = _calculate_file_duration(file_path)
-
-    # Zapisz w cache jeśli się udało obliczyć
-    if duration_sec > 0:
-        database.cache_file_duration(file_path, duration_sec)
-
-    return duration_sec
-
-def _calculate_file_duration(file_path):
-    """
-    Oblicza czas trwania pliku audio za pomocą ffprobe (bez cachowania).
-    """
-    command = [
-        'ffprobe',
-        '-v', 'quiet',
-        '-print_format', 'json',
-        '-show_format',
-        '-show_streams',
-        file_path
-    ]
-    try:
-        result = subprocess.run(command, capture_output=True, text=True, check=True, timeout=30)
-        data = json.loads(result.stdout)
-        return float(data['format']['duration'])
-    except subprocess.TimeoutExpired:
-        print(f"TIMEOUT: Sprawdzanie długości pliku {os.path.basename(file_path)} przekroczyło limit czasu")
-        return 0.0
-    except Exception as e:
-        print(f"Błąd podczas sprawdzania czasu trwania pliku {os.path.basename(file_path)}: {e}")
-        return 0.0
+    return get_file_durations([file_path])[file_path]
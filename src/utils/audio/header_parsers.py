@@ -0,0 +1,462 @@
+# Ten moduł odczytuje długość nagrania i parametry ścieżki audio bezpośrednio z nagłówków
+# kontenerów, bez uruchamiania `ffprobe`. Obsługiwane są: WAV (RIFF), MP3 (nagłówki Xing/Info,
+# VBRI albo szacowanie dla stałego bitrate), MP4/M4A/MOV (atom `moov`: `mvhd`, `mdhd`, `stsd`, `stsz`)
+# oraz ASF (WMA/WMV: obiekty File Properties i Stream Properties).
+# Parsery czytają tylko pierwsze kilobajty pliku (lub sam atom `moov`), więc działają w ułamku
+# milisekundy - start osobnego procesu `ffprobe` trwa dziesiątki milisekund, a w Windows jeszcze dłużej.
+# Gdy format jest nieznany albo nagłówek uszkodzony lub niekompletny, parser zwraca None,
+# a `analyze_media` uruchamia wtedy `ffprobe`.
+
+import os  # Rozmiar pliku i rozszerzenie.
+import struct  # Odczyt pól binarnych nagłówków.
+import uuid  # Identyfikatory obiektów ASF (GUID).
+
+# Ile bajtów początku pliku czytamy na potrzeby nagłówków WAV, MP3 i ASF.
+_HEAD_SIZE = 64 * 1024
+# Górna granica rozmiaru atomu `moov`, który wczytujemy do pamięci (uszkodzone rozmiary nie mogą zająć całej pamięci).
+_MAX_MOOV_SIZE = 64 * 1024 * 1024
+
+
+def parse_media_header(file_path):
+    """
+    Odczytuje długość i parametry pierwszej ścieżki audio z nagłówka pliku.
+
+    Zwraca:
+        dict lub None: Słownik w formacie `analyze_media` ('duration_sec', 'codec', 'channels',
+                       'sample_rate', 'bit_rate') albo None, jeśli formatu nie rozpoznano
+                       lub nagłówek jest uszkodzony.
+    """
+    try:
+        with open(file_path, "rb") as media_file:
+            head = media_file.read(_HEAD_SIZE)
+            file_size = os.fstat(media_file.fileno()).st_size
+            if head[:4] == b'RIFF' and head[8:12] == b'WAVE':
+                return _parse_wav(head, file_size)
+            if head[:16] == _ASF_HEADER_GUID:
+                return _parse_asf(head)
+            if head[4:8] in _MP4_TOP_LEVEL_BOXES:
+                return _parse_mp4(media_file, file_size)
+            if head[:3] == b'ID3' or os.path.splitext(file_path)[1].lower() == '.mp3':
+                return _parse_mp3(media_file, head, file_size)
+    except (OSError, struct.error, ValueError, IndexError, ZeroDivisionError):
+        return None
+    return None
+
+
+def _media_info(duration_sec, codec, channels, sample_rate, bit_rate):
+    """Buduje wynik w formacie `analyze_media`; niepełne lub nierealne wyniki odrzuca (None)."""
+    if not duration_sec or duration_sec <= 0 or not codec or not channels or not sample_rate:
+        return None
+    return {
+        'duration_sec': duration_sec,
+        'codec': codec,
+        'channels': channels,
+        'sample_rate': sample_rate,
+        'bit_rate': int(bit_rate) if bit_rate else None
+    }
+
+
+# --- WAV (RIFF) ---
+
+# Kodeki PCM w formacie ffprobe: (kod formatu, bity na próbkę) -> nazwa.
+_WAV_CODECS = {
+    (1, 8): 'pcm_u8', (1, 16): 'pcm_s16le', (1, 24): 'pcm_s24le', (1, 32): 'pcm_s32le',
+    (3, 32): 'pcm_f32le', (3, 64): 'pcm_f64le', (6, 8): 'pcm_alaw', (7, 8): 'pcm_mulaw'
+}
+_WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+
+def _parse_wav(head, file_size):
+    """Odczytuje chunk `fmt ` i rozmiar chunka `data` z pliku WAV."""
+    offset = 12
+    fmt = None
+    while offset + 8 <= len(head):
+        chunk_id, chunk_size = struct.unpack_from('<4sI', head, offset)
+        body = offset + 8
+        if chunk_id == b'fmt ':
+            audio_format, channels, sample_rate, byte_rate, _, bits = struct.unpack_from('<HHIIHH', head, body)
+            if audio_format == _WAVE_FORMAT_EXTENSIBLE and chunk_size >= 40:
+                # Właściwy kod formatu to pierwsze dwa bajty identyfikatora podformatu.
+                audio_format = struct.unpack_from('<H', head, body + 24)[0]
+            fmt = (audio_format, channels, sample_rate, byte_rate, bits)
+        elif chunk_id == b'data':
+            if fmt is None:
+                return None
+            audio_format, channels, sample_rate, byte_rate, bits = fmt
+            # Nagrania zapisywane strumieniowo mogą mieć w nagłówku rozmiar 0 lub 0xFFFFFFFF.
+            data_size = min(chunk_size, file_size - body) if chunk_size else file_size - body
+            return _media_info(data_size / byte_rate, _WAV_CODECS.get((audio_format, bits)),
+                               channels, sample_rate, byte_rate * 8)
+        # Chunki mają parzystą długość - nieparzyste są dopełniane jednym bajtem.
+        offset = body + chunk_size + (chunk_size & 1)
+    return None
+
+
+# --- MP3 (MPEG audio) ---
+
+# Bitrate w kb/s: (wersja MPEG-1?, warstwa) -> tabela indeksów.
+_MP3_BITRATES = {
+    (True, 1): [0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448],
+    (True, 2): [0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384],
+    (True, 3): [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    (False, 1): [0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256],
+    (False, 2): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+    (False, 3): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+}
+# Częstotliwości próbkowania: bity wersji -> tabela indeksów (0b01 to wartość zarezerwowana).
+_MP3_SAMPLE_RATES = {0b11: [44100, 48000, 32000], 0b10: [22050, 24000, 16000], 0b00: [11025, 12000, 8000]}
+_MP3_CODECS = {1: 'mp1', 2: 'mp2', 3: 'mp3'}
+
+
+def _parse_mp3_frame_header(data, offset):
+    """
+    Dekoduje 4-bajtowy nagłówek ramki MPEG audio.
+
+    Zwraca:
+        dict lub None: Parametry ramki (w tym jej długość w bajtach) albo None, jeśli to nie jest nagłówek ramki.
+    """
+    if offset + 4 > len(data):
+        return None
+    header = struct.unpack_from('>I', data, offset)[0]
+    if header >> 21 != 0x7FF:
+        return None
+    version_bits = (header >> 19) & 0b11
+    layer = 4 - ((header >> 17) & 0b11)
+    bitrate_index = (header >> 12) & 0b1111
+    sample_rate_index = (header >> 10) & 0b11
+    if version_bits == 0b01 or layer == 4 or bitrate_index in (0, 15) or sample_rate_index == 3:
+        return None
+
+    mpeg1 = version_bits == 0b11
+    bitrate = _MP3_BITRATES[(mpeg1, layer)][bitrate_index] * 1000
+    sample_rate = _MP3_SAMPLE_RATES[version_bits][sample_rate_index]
+    padding = (header >> 9) & 1
+    if layer == 1:
+        samples_per_frame = 384
+        frame_length = (12 * bitrate // sample_rate + padding) * 4
+    else:
+        samples_per_frame = 1152 if mpeg1 or layer == 2 else 576
+        frame_length = samples_per_frame // 8 * bitrate // sample_rate + padding
+    return {
+        'mpeg1': mpeg1,
+        'layer': layer,
+        'bitrate': bitrate,
+        'sample_rate': sample_rate,
+        'channels': 1 if (header >> 6) & 0b11 == 0b11 else 2,
+        'samples_per_frame': samples_per_frame,
+        'frame_length': frame_length
+    }
+
+
+def _parse_mp3(media_file, head, file_size):
+    """
+    Wyznacza długość MP3: z licznika ramek w nagłówku Xing/Info lub VBRI (pliki VBR),
+    a dla plików bez takiego nagłówka - z rozmiaru danych i bitrate pierwszej ramki (CBR).
+    """
+    # `data` to fragment pliku zaczynający się od bajtu `base`.
+    data, base = head, 0
+    if head[:3] == b'ID3':
+        # Rozmiar znacznika ID3v2 jest zapisany w 4 bajtach po 7 bitów (syncsafe).
+        tag_size = 0
+        for byte in head[6:10]:
+            tag_size = (tag_size << 7) | (byte & 0x7F)
+        base = 10 + tag_size + (10 if head[5] & 0x10 else 0)
+        # Duże znaczniki (np. z okładką albumu) nie mieszczą się w początku pliku - czytamy dane za nimi.
+        media_file.seek(base)
+        data = media_file.read(_HEAD_SIZE)
+
+    # Szukamy pierwszej ramki, po której zaczyna się kolejna - pojedyncze dopasowanie bywa przypadkowe.
+    frame = None
+    offset = data.find(b'\xff')
+    while 0 <= offset < len(data) - 4:
+        candidate = _parse_mp3_frame_header(data, offset)
+        if candidate and _parse_mp3_frame_header(data, offset + candidate['frame_length']):
+            frame, frame_offset = candidate, offset
+            break
+        offset = data.find(b'\xff', offset + 1)
+    if frame is None:
+        return None
+    frame_start = base + frame_offset
+
+    audio_end = file_size
+    media_file.seek(max(0, file_size - 128))
+    if media_file.read(3) == b'TAG':
+        audio_end -= 128  # Znacznik ID3v1 na końcu pliku.
+
+    frames, audio_bytes = _read_vbr_header(data, frame_offset, frame)
+    if frames:
+        duration_sec = frames * frame['samples_per_frame'] / frame['sample_rate']
+        bit_rate = (audio_bytes or audio_end - frame_start) * 8 / duration_sec
+    else:
+        duration_sec = (audio_end - frame_start) * 8 / frame['bitrate']
+        bit_rate = frame['bitrate']
+    return _media_info(duration_sec, _MP3_CODECS[frame['layer']], frame['channels'], frame['sample_rate'], bit_rate)
+
+
+def _read_vbr_header(data, frame_start, frame):
+    """
+    Odczytuje licznik ramek i bajtów z nagłówka Xing/Info albo VBRI w pierwszej ramce.
+
+    Zwraca:
+        tuple: (liczba ramek, liczba bajtów) - wartości nieobecne w nagłówku to None.
+    """
+    # Nagłówek Xing leży za informacjami pobocznymi (side info), których długość zależy od wersji i kanałów.
+    if frame['mpeg1']:
+        side_info = 17 if frame['channels'] == 1 else 32
+    else:
+        side_info = 9 if frame['channels'] == 1 else 17
+    xing = frame_start + 4 + side_info
+    if data[xing:xing + 4] in (b'Xing', b'Info'):
+        flags = struct.unpack_from('>I', data, xing + 4)[0]
+        position = xing + 8
+        frames = audio_bytes = None
+        if flags & 0x1:
+            frames = struct.unpack_from('>I', data, position)[0]
+            position += 4
+        if flags & 0x2:
+            audio_bytes = struct.unpack_from('>I', data, position)[0]
+        return frames, audio_bytes
+
+    # Nagłówek VBRI (koder Fraunhofer) zawsze leży 32 bajty za nagłówkiem ramki.
+    vbri = frame_start + 4 + 32
+    if data[vbri:vbri + 4] == b'VBRI':
+        audio_bytes, frames = struct.unpack_from('>II', data, vbri + 10)
+        return frames, audio_bytes
+    return None, None
+
+
+# --- MP4 / M4A / MOV (ISO BMFF, QuickTime) ---
+
+_MP4_TOP_LEVEL_BOXES = {b'ftyp', b'moov', b'mdat', b'free', b'skip', b'wide', b'pnot'}
+# Typy wpisów `stsd` ścieżek dźwiękowych -> nazwa kodeka w ffprobe (mp4a jest rozstrzygany przez `esds`).
+_MP4_SAMPLE_ENTRY_CODECS = {b'alac': 'alac', b'ac-3': 'ac3', b'ec-3': 'eac3', b'Opus': 'opus', b'fLaC': 'flac'}
+# Identyfikatory typu obiektu (object type indication) z deskryptora `esds` -> nazwa kodeka.
+_MP4_OBJECT_TYPES = {0x40: 'aac', 0x66: 'aac', 0x67: 'aac', 0x68: 'aac', 0x69: 'mp3', 0x6B: 'mp3'}
+# Częstotliwości próbkowania AAC według indeksu z AudioSpecificConfig.
+_AAC_SAMPLE_RATES = [96000, 88200, 64000, 48000, 44100, 32000, 24000, 22050, 16000, 12000, 11025, 8000, 7350]
+
+
+def _iter_boxes(data, start=0, end=None):
+    """Zwraca kolejne atomy (typ, początek treści, koniec) w podanym fragmencie danych."""
+    end = len(data) if end is None else end
+    offset = start
+    while offset + 8 <= end:
+        size, box_type = struct.unpack_from('>I4s', data, offset)
+        header = 8
+        if size == 1:
+            size = struct.unpack_from('>Q', data, offset + 8)[0]
+            header = 16
+        elif size == 0:
+            size = end - offset
+        if size < header or offset + size > end:
+            return
+        yield box_type, offset + header, offset + size
+        offset += size
+
+
+def _find_box(data, path, start=0, end=None):
+    """Zwraca (początek treści, koniec) atomu wskazanego ścieżką, np. [b'mdia', b'mdhd'], lub None."""
+    for box_type, body, box_end in _iter_boxes(data, start, end):
+        if box_type == path[0]:
+            return (body, box_end) if len(path) == 1 else _find_box(data, path[1:], body, box_end)
+    return None
+
+
+def _read_moov(media_file, file_size):
+    """Odszukuje wśród atomów najwyższego poziomu atom `moov` (również na końcu pliku) i wczytuje jego treść."""
+    offset = 0
+    while offset + 8 <= file_size:
+        media_file.seek(offset)
+        size, box_type = struct.unpack('>I4s', media_file.read(8))
+        header = 8
+        if size == 1:
+            size = struct.unpack('>Q', media_file.read(8))[0]
+            header = 16
+        elif size == 0:
+            size = file_size - offset
+        if size < header:
+            return None
+        if box_type == b'moov':
+            if size > _MAX_MOOV_SIZE:
+                return None
+            moov = media_file.read(size - header)
+            return moov if len(moov) == size - header else None
+        offset += size
+    return None
+
+
+def _read_full_box_times(data, body):
+    """Odczytuje (skala czasu, długość) z atomu `mvhd` lub `mdhd` w wersji 0 albo 1."""
+    if data[body] == 1:
+        return struct.unpack_from('>IQ', data, body + 20)
+    return struct.unpack_from('>II', data, body + 12)
+
+
+def _read_descriptor(data, offset):
+    """Odczytuje znacznik i długość deskryptora MPEG-4 (długość zapisana w 1-4 bajtach po 7 bitów)."""
+    tag = data[offset]
+    length = 0
+    offset += 1
+    for _ in range(4):
+        byte = data[offset]
+        offset += 1
+        length = (length << 7) | (byte & 0x7F)
+        if not byte & 0x80:
+            break
+    return tag, offset, length
+
+
+def _parse_esds(data, body):
+    """
+    Odczytuje z atomu `esds` typ obiektu, średni bitrate oraz - dla AAC - liczbę kanałów
+    i częstotliwość próbkowania z AudioSpecificConfig.
+
+    Zwraca:
+        tuple: (kodek, średni bitrate, kanały, częstotliwość) - nieznane wartości to None.
+    """
+    tag, offset, _ = _read_descriptor(data, body + 4)
+    if tag != 0x03:
+        return None, None, None, None
+    flags = data[offset + 2]
+    offset += 3
+    if flags & 0x80:
+        offset += 2  # streamDependenceFlag
+    if flags & 0x40:
+        offset += 1 + data[offset]  # URL_Flag
+    if flags & 0x20:
+        offset += 2  # OCRstreamFlag
+    tag, offset, _ = _read_descriptor(data, offset)
+    if tag != 0x04:
+        return None, None, None, None
+    object_type = data[offset]
+    avg_bitrate = struct.unpack_from('>I', data, offset + 9)[0]
+    codec = _MP4_OBJECT_TYPES.get(object_type)
+
+    channels = sample_rate = None
+    tag, config_offset, config_length = _read_descriptor(data, offset + 13)
+    if codec == 'aac' and tag == 0x05 and config_length >= 2:
+        bits = int.from_bytes(data[config_offset:config_offset + min(config_length, 8)], 'big')
+        total_bits = min(config_length, 8) * 8
+        position = 5
+        if bits >> (total_bits - 5) == 31:
+            position += 6  # Rozszerzony typ obiektu audio.
+        frequency_index = (bits >> (total_bits - position - 4)) & 0xF
+        position += 4
+        if frequency_index == 15:
+            sample_rate = (bits >> (total_bits - position - 24)) & 0xFFFFFF
+            position += 24
+        elif frequency_index < len(_AAC_SAMPLE_RATES):
+            sample_rate = _AAC_SAMPLE_RATES[frequency_index]
+        channels = ((bits >> (total_bits - position - 4)) & 0xF) or None
+    return codec, avg_bitrate or None, channels, sample_rate
+
+
+def _sample_bytes(data, stbl):
+    """Zwraca łączny rozmiar próbek ścieżki z atomu `stsz` (do wyliczenia średniego bitrate) lub None."""
+    stsz = _find_box(data, [b'stsz'], *stbl)
+    if not stsz:
+        return None
+    sample_size, sample_count = struct.unpack_from('>II', data, stsz[0] + 4)
+    if sample_size:
+        return sample_size * sample_count
+    table_start = stsz[0] + 12
+    if table_start + 4 * sample_count > stsz[1]:
+        return None
+    return sum(struct.unpack_from(f'>{sample_count}I', data, table_start))
+
+
+def _parse_mp4(media_file, file_size):
+    """Odczytuje długość z `mvhd` i parametry pierwszej ścieżki dźwiękowej (`soun`) z atomu `moov`."""
+    moov = _read_moov(media_file, file_size)
+    if not moov:
+        return None
+    mvhd = _find_box(moov, [b'mvhd'])
+    if not mvhd:
+        return None
+    timescale, duration = _read_full_box_times(moov, mvhd[0])
+    if not timescale:
+        return None
+    duration_sec = duration / timescale
+
+    for box_type, body, box_end in _iter_boxes(moov):
+        if box_type != b'trak':
+            continue
+        hdlr = _find_box(moov, [b'mdia', b'hdlr'], body, box_end)
+        if not hdlr or moov[hdlr[0] + 8:hdlr[0] + 12] != b'soun':
+            continue
+        mdhd = _find_box(moov, [b'mdia', b'mdhd'], body, box_end)
+        stbl = _find_box(moov, [b'mdia', b'minf', b'stbl'], body, box_end)
+        stsd = stbl and _find_box(moov, [b'stsd'], *stbl)
+        if not mdhd or not stsd:
+            return None
+
+        # Pierwszy wpis `stsd` to opis próbek dźwięku (AudioSampleEntry).
+        entry = stsd[0] + 8
+        entry_size, entry_type = struct.unpack_from('>I4s', moov, entry)
+        sound_version, channels, _, _, _, sample_rate = struct.unpack_from('>H6xHHHHI', moov, entry + 16)
+        if sound_version not in (0, 1):
+            return None
+        sample_rate >>= 16  # Częstotliwość zapisana jako liczba stałoprzecinkowa 16.16.
+        children_start = entry + 36 + (16 if sound_version == 1 else 0)
+
+        codec = _MP4_SAMPLE_ENTRY_CODECS.get(entry_type)
+        avg_bitrate = None
+        if entry_type == b'mp4a':
+            esds = _find_box(moov, [b'esds'], children_start, entry + entry_size)
+            if not esds:
+                return None
+            codec, avg_bitrate, config_channels, config_rate = _parse_esds(moov, esds[0])
+            channels = config_channels or channels
+            sample_rate = config_rate or sample_rate
+
+        # Średni bitrate liczymy z rozmiarów próbek i długości ścieżki, tak jak ffprobe.
+        track_timescale, track_duration = _read_full_box_times(moov, mdhd[0])
+        total_bytes = _sample_bytes(moov, stbl)
+        if total_bytes and track_timescale and track_duration:
+            bit_rate = total_bytes * 8 * track_timescale / track_duration
+        else:
+            bit_rate = avg_bitrate
+        return _media_info(duration_sec, codec, channels, sample_rate, bit_rate)
+    return None
+
+
+# --- ASF (WMA / WMV) ---
+
+def _guid(text):
+    """Zamienia tekstowy GUID na 16 bajtów w kolejności zapisu ASF (pierwsze trzy pola little-endian)."""
+    return uuid.UUID(text).bytes_le
+
+_ASF_HEADER_GUID = _guid('75B22630-668E-11CF-A6D9-00AA0062CE6C')
+_ASF_FILE_PROPERTIES_GUID = _guid('8CABDCA1-A947-11CF-8EE4-00C00C205365')
+_ASF_STREAM_PROPERTIES_GUID = _guid('B7DC0791-A9B7-11CF-8EE6-00C00C205365')
+_ASF_AUDIO_MEDIA_GUID = _guid('F8699E40-5B4D-11CF-A8FD-00805F5C442B')
+# Kody formatu WAVEFORMATEX -> nazwa kodeka w ffprobe.
+_ASF_CODECS = {0x0160: 'wmav1', 0x0161: 'wmav2', 0x0162: 'wmapro', 0x0163: 'wmalossless', 0x000A: 'wmavoice', 0x0055: 'mp3'}
+
+
+def _parse_asf(head):
+    """Odczytuje długość z obiektu File Properties i parametry audio z pierwszego obiektu Stream Properties."""
+    object_count = struct.unpack_from('<I', head, 24)[0]
+    offset = 30
+    duration_sec = None
+    audio = None
+    for _ in range(object_count):
+        if offset + 24 > len(head):
+            break
+        object_guid = head[offset:offset + 16]
+        object_size = struct.unpack_from('<Q', head, offset + 16)[0]
+        body = offset + 24
+        if object_guid == _ASF_FILE_PROPERTIES_GUID:
+            # Długość odtwarzania w jednostkach 100 ns zawiera wstępne buforowanie (preroll, w ms).
+            play_duration, _, preroll = struct.unpack_from('<QQQ', head, body + 40)
+            duration_sec = play_duration / 10_000_000 - preroll / 1000
+        elif object_guid == _ASF_STREAM_PROPERTIES_GUID and audio is None:
+            if head[body:body + 16] == _ASF_AUDIO_MEDIA_GUID:
+                format_tag, channels, sample_rate, byte_rate = struct.unpack_from('<HHII', head, body + 54)
+                audio = (_ASF_CODECS.get(format_tag), channels, sample_rate, byte_rate * 8)
+        if object_size < 24:
+            return None
+        offset += object_size
+    if audio is None:
+        return None
+    return _media_info(duration_sec, *audio)
@@ -0,0 +1,123 @@
+# Ten moduł analizuje pliki multimedialne: odczytuje długość nagrania oraz parametry pierwszej
+# ścieżki audio (kodek, liczba kanałów, częstotliwość próbkowania, bitrate). Najpierw próbuje
+# odczytać je wprost z nagłówka kontenera (`header_parsers`), a `ffprobe` uruchamia tylko dla
+# formatów nieobsługiwanych przez parsery oraz plików z uszkodzonym nagłówkiem.
+# Wyniki są zapisywane w bazie danych podczas przetwarzania metadanych i wykorzystywane ponownie
+# przy tworzeniu tagów, sprawdzaniu długich plików i decyzji, czy plik spełnia już profil
+# transkrypcji i wystarczy go przepakować (stream copy) zamiast dekodować i kodować od nowa.
+
+import json  # `ffprobe` zwraca wyniki w formacie JSON.
+import os  # Moduł do pobierania nazwy pliku ze ścieżki.
+import subprocess  # Uruchamianie `ffprobe`.
+from src import config  # Importujemy nasz plik konfiguracyjny.
+from src.utils.audio.header_parsers import parse_media_header  # Odczyt nagłówków bez `ffprobe`.
+
+# Wartość kolumny `audio_codec` pliku przeanalizowanego, w którym nie znaleziono kodeka audio
+# (np. wideo bez ścieżki dźwiękowej). NULL oznacza plik, którego jeszcze nie analizowano.
+NO_AUDIO_CODEC = ""
+
+
+def analyze_media(file_path):
+    """
+    Odczytuje długość pliku i parametry jego pierwszej ścieżki audio - z nagłówka kontenera,
+    a jeśli to się nie uda, jednym wywołaniem `ffprobe` (`probe_with_ffprobe`).
+
+    Zwraca:
+        dict lub None: Słownik z kluczami 'duration_sec', 'codec', 'channels', 'sample_rate', 'bit_rate'
+                       (nieznane wartości mają wartość None, plik bez ścieżki audio ma same None poza długością)
+                       albo None, jeśli `ffprobe` zakończył się błędem.
+    """
+    if config.MEDIA_HEADER_PARSING_ENABLED:
+        media_info = parse_media_header(file_path)
+        if media_info:
+            return media_info
+    return probe_with_ffprobe(file_path)
+
+
+def probe_with_ffprobe(file_path):
+    """Odczytuje długość pliku i parametry jego pierwszej ścieżki audio jednym wywołaniem `ffprobe`."""
+    command = [
+        'ffprobe',
+        '-v', 'quiet',
+        '-print_format', 'json',
+        '-select_streams', 'a:0',
+        '-show_entries', 'format=duration:stream=codec_name,channels,sample_rate,bit_rate',
+        file_path
+    ]
+    try:
+        result = subprocess.run(command, capture_output=True, text=True, check=True, timeout=30)
+        data = json.loads(result.stdout)
+    except subprocess.TimeoutExpired:
+        print(f"TIMEOUT: Analiza pliku {os.path.basename(file_path)} przekroczyła limit czasu")
+        return None
+    except Exception as e:
+        print(f"Błąd podczas analizy pliku {os.path.basename(file_path)}: {e}")
+        return None
+
+    stream = (data.get('streams') or [{}])[0]
+    return {
+        'duration_sec': _to_float(data.get('format', {}).get('duration')),
+        'codec': stream.get('codec_name'),
+        'channels': _to_int(stream.get('channels')),
+        'sample_rate': _to_int(stream.get('sample_rate')),
+        'bit_rate': _to_int(stream.get('bit_rate'))
+    }
+
+
+def media_info_from_row(row):
+    """
+    Zamienia wiersz bazy danych (z `get_media_info`) na słownik w formacie `analyze_media`.
+    Zwraca None, jeśli plik nie był jeszcze analizowany (np. baza sprzed dodania kolumn audio).
+    """
+    if not row or row['audio_codec'] is None:
+        return None
+    return {
+        'duration_sec': row['duration_ms'] / 1000 if row['duration_ms'] else None,
+        'codec': row['audio_codec'] or None,
+        'channels': row['audio_channels'],
+        'sample_rate': row['audio_sample_rate'],
+        'bit_rate': row['audio_bit_rate']
+    }
+
+
+def codec_for_storage(media_info):
+    """
+    Zwraca wartość kolumny `audio_codec` dla wyniku `analyze_media`: `NO_AUDIO_CODEC`, jeśli analiza się
+    udała, ale nie znalazła kodeka, dzięki czemu taki plik nie jest analizowany ponownie przy każdym odczycie.
+    Dla nieudanej analizy zwraca None - plik zostanie przeanalizowany ponownie.
+    """
+    if not media_info or not media_info.get('duration_sec'):
+        return None
+    return media_info.get('codec') or NO_AUDIO_CODEC
+
+
+def _to_int(value):
+    """Zamienia wartość z `ffprobe` (często tekst, czasem 'N/A') na liczbę całkowitą lub None."""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _to_float(value):
+    """Zamienia wartość z `ffprobe` na liczbę zmiennoprzecinkową lub None."""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def is_passthrough_compatible(media_info):
+    """
+    Sprawdza, czy ścieżka audio spełnia już profil transkrypcji i może zostać skopiowana
+    bez ponownego kodowania (`-c:a copy`): obsługiwany kodek, mono i bitrate w limicie.
+    """
+    if not config.PASSTHROUGH_ENABLED or not media_info:
+        return False
+    if media_info['codec'] not in config.PASSTHROUGH_CODECS:
+        return False
+    if media_info['channels'] != 1:
+        return False
+    # Nieznany bitrate odrzucamy - nie chcemy ryzykować przekroczenia limitu rozmiaru pliku w API.
+    bit_rate = media_info['bit_rate']
+    return bool(bit_rate and bit_rate <= config.PASSTHROUGH_MAX_BIT_RATE)
@@ -0,0 +1,126 @@
+# Ten moduł zawiera przyrostowy skaner folderów wejściowych oparty na manifeście zapisanym w bazie danych.
+# Manifest przechowuje czas modyfikacji każdego folderu oraz (rozmiar, czas modyfikacji, i-węzeł)
+# każdego pliku z poprzedniego skanu. Czas modyfikacji folderu zmienia się, gdy w folderze pojawi się,
+# zniknie albo zmieni nazwę jakikolwiek wpis - folder z niezmienionym czasem nie jest więc ponownie
+# listowany, a jego pliki nie są odpytywane. Sprawdzamy tylko jego podfoldery (jedno `os.stat` na folder).
+# Zmiana treści pliku "w miejscu" (bez tworzenia nowego pliku) nie zmienia czasu folderu - takie zmiany
+# wykrywa pełny skan (`full_rescan=True`, flaga CLI `--full-rescan`).
+
+import os  # Operacje na plikach i folderach.
+import time  # Wykrywanie folderów zmienionych tuż przed skanem.
+from src import database  # Moduł do operacji na bazie danych.
+from src.utils.file_type_helper import is_supported_file  # Filtrowanie plików po rozszerzeniu.
+
+# Folderu zmodyfikowanego w ciągu ostatnich sekund nie uznajemy za "niezmieniony" przy następnym skanie:
+# plik dodany w tej samej chwili co skan (lub w obrębie dokładności zegara systemu plików, np. 2 s na FAT)
+# mógłby nie zmienić już zapisanego czasu modyfikacji folderu.
+_RECENT_CHANGE_NS = 2_000_000_000
+
+
+def _file_entry(path, directory, stat):
+    """Zwraca wiersz manifestu pliku: (ścieżka, folder, rozmiar, czas modyfikacji w ns, i-węzeł)."""
+    return path, directory, stat.st_size, stat.st_mtime_ns, stat.st_ino
+
+
+def rescan_with_manifest(root_path, full_rescan=False):
+    """
+    Skanuje folder, porównując go z manifestem z poprzedniego skanu, i zwraca nowy manifest do zapisania.
+    Funkcja niczego nie zapisuje - wywołujący zapisuje manifest (`database.save_scan_manifest`)
+    w jednej krótkiej transakcji razem ze zmianami w tabeli `files`, dopiero po zakończeniu skanu.
+
+    Argumenty:
+        root_path (str): Absolutna ścieżka do skanowanego folderu.
+        full_rescan (bool): Jeśli True, listuje wszystkie foldery i sprawdza wszystkie pliki,
+                            niezależnie od czasów modyfikacji folderów.
+
+    Zwraca:
+        dict: Klucze 'new' i 'modified' (krotki (ścieżka, czas modyfikacji, rozmiar) w formacie
+              `database.add_files`), 'deleted' (ścieżki), 'unchanged' (liczba plików)
+              'skipped_directories' i 'scanned_directories' (liczby folderów) oraz 'manifest'
+              (argumenty nazwane dla `database.save_scan_manifest`).
+    """
+    directory_rows, file_rows = database.get_scan_manifest(root_path)
+    known_directories = {row['path']: row['mtime_ns'] for row in directory_rows}
+    child_directories = {}
+    for row in directory_rows:
+        child_directories.setdefault(row['parent_path'], []).append(row['path'])
+    known_files = {}
+    for row in file_rows:
+        known_files.setdefault(row['directory_path'], {})[row['path']] = row
+
+    result = {'new': [], 'modified': [], 'deleted': [], 'unchanged': 0, 'skipped_directories': 0, 'scanned_directories': 0}
+    visited_directories = {}
+    changed_files = []
+    recent_limit = time.time_ns() - _RECENT_CHANGE_NS
+
+    def carry_over(directory, parent):
+        """Przepisuje folder z manifestu bez zmian (np. gdy chwilowo nie da się go odczytać)."""
+        visited_directories[directory] = (parent, known_directories.get(directory, 0))
+        result['unchanged'] += len(known_files.get(directory, {}))
+        for child in child_directories.get(directory, []):
+            carry_over(child, directory)
+
+    pending_directories = [(root_path, None)]
+    while pending_directories:
+        directory, parent = pending_directories.pop()
+        try:
+            mtime_ns = os.stat(directory).st_mtime_ns
+        except FileNotFoundError:
+            continue
+        except OSError as e:
+            print(f"OSTRZEŻENIE: Nie można odczytać folderu {directory}: {e}")
+            carry_over(directory, parent)
+            continue
+
+        # Świeżo zmieniony folder zapisujemy z czasem 0, aby następny skan na pewno go wylistował.
+        visited_directories[directory] = (parent, mtime_ns if mtime_ns < recent_limit else 0)
+        previous_files = known_files.get(directory, {})
+        if not full_rescan and known_directories.get(directory) == mtime_ns:
+            result['skipped_directories'] += 1
+            result['unchanged'] += len(previous_files)
+            pending_directories.extend((child, directory) for child in child_directories.get(directory, []))
+            continue
+
+        result['scanned_directories'] += 1
+        present_files = set()
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            pending_directories.append((entry.path, directory))
+                            continue
+                        if not entry.is_file() or not is_supported_file(entry.name):
+                            continue
+                        stat = entry.stat()
+                    except OSError as e:
+                        print(f"OSTRZEŻENIE: Pominięto {entry.path}: {e}")
+                        continue
+
+                    present_files.add(entry.path)
+                    previous = previous_files.get(entry.path)
+                    signature = (stat.st_size, stat.st_mtime_ns, stat.st_ino)
+                    if previous and (previous['size'], previous['mtime_ns'], previous['inode']) == signature:
+                        result['unchanged'] += 1
+                        continue
+                    result['modified' if previous else 'new'].append((entry.path, stat.st_mtime, stat.st_size))
+                    changed_files.append(_file_entry(entry.path, directory, stat))
+        except OSError as e:
+            print(f"OSTRZEŻENIE: Nie można odczytać folderu {directory}: {e}")
+            carry_over(directory, parent)
+            continue
+
+        result['deleted'].extend(path for path in previous_files if path not in present_files)
+
+    # Foldery z manifestu, do których skan nie dotarł, zniknęły razem ze wszystkimi swoimi plikami.
+    deleted_directories = [path for path in known_directories if path not in visited_directories]
+    for directory in deleted_directories:
+        result['deleted'].extend(known_files.get(directory, {}))
+
+    result['manifest'] = {
+        'directories': [(path, parent, mtime_ns) for path, (parent, mtime_ns) in visited_directories.items()],
+        'files': changed_files,
+        'deleted_directories': deleted_directories,
+        'deleted_files': result['deleted']
+    }
+    return result
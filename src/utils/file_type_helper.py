@@ -46,3 +46,17 @@ def is_video_file(file_path):
         bool: True jeśli plik to wideo, False w przeciwnym razie
     """
     return get_file_type(file_path) == 'video'
+
+def is_supported_file(file_path):
+    """
+    Sprawdza, czy plik ma jedno z obsługiwanych rozszerzeń (wielkość liter nie ma znaczenia).
+
+    Argumenty:
+        file_path (str): Ścieżka lub nazwa pliku
+
+    Zwraca:
+        bool: True jeśli plik może zostać przetworzony, False w przeciwnym razie
+    """
+    # Warunek `config.ALL_SUPPORTED_EXTENSIONS is None` jest zabezpieczeniem, gdyby lista była pusta (choć w tym projekcie nie jest).
+    extension = os.path.splitext(file_path)[1].lower()
+    return config.ALL_SUPPORTED_EXTENSIONS is None or extension in config.ALL_SUPPORTED_EXTENSIONS
@@ -0,0 +1,250 @@
+# Ten moduł zawiera klasę `FolderWatcher`, która obserwuje folder wejściowy i zgłasza nowe pliki
+# audio i wideo, gdy tylko zostaną w całości zapisane. Na Linuksie korzysta z powiadomień jądra
+# (inotify, przez `ctypes` - bez dodatkowych bibliotek), a na innych systemach i udziałach
+# sieciowych - z okresowego skanowania folderu. Wykorzystuje go tryb CLI `--watch`.
+
+import ctypes  # Wywołania funkcji inotify z biblioteki standardowej C.
+import ctypes.util  # Wyszukiwanie biblioteki C w systemie.
+import errno  # Kody błędów zwracanych przez inotify.
+import os  # Operacje na plikach i folderach.
+import select  # Oczekiwanie na zdarzenia inotify z limitem czasu.
+import struct  # Dekodowanie zdarzeń inotify.
+import sys  # Sprawdzanie systemu operacyjnego.
+import time  # Odliczanie czasu stabilizacji plików.
+from src import config  # Importujemy nasz plik konfiguracyjny.
+from src.utils.audio.audio_file_list_cli import scan_audio_files  # Skanowanie folderu.
+from src.utils.file_type_helper import is_supported_file  # Filtrowanie plików po rozszerzeniu.
+
+# Stałe z <sys/inotify.h>.
+_IN_MODIFY = 0x00000002
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_Q_OVERFLOW = 0x00004000
+_IN_ISDIR = 0x40000000
+_WATCH_MASK = _IN_MODIFY | _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_CREATE
+# Nagłówek zdarzenia: wd, mask, cookie, len - po nim `len` bajtów nazwy pliku.
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+class _InotifyBackend:
+    """Źródło zdarzeń oparte na inotify: obserwuje folder i wszystkie jego podfoldery."""
+
+    name = "inotify"
+
+    def __init__(self, directory):
+        libc_name = ctypes.util.find_library("c")
+        if not sys.platform.startswith("linux") or not libc_name:
+            raise OSError("inotify jest dostępne tylko na Linuksie")
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        self._libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 nie powiodło się")
+        self._directories = {}
+        try:
+            # Pliki znalezione podczas zakładania obserwacji - istniały przed startem.
+            self.initial_files = self._watch_tree(directory)
+        except OSError:
+            self.close()
+            raise
+
+    def _watch_tree(self, directory):
+        """Dodaje obserwację folderu i jego podfolderów. Zwraca pliki obsługiwane znalezione po drodze."""
+        found = []
+        pending_directories = [directory]
+        while pending_directories:
+            path = pending_directories.pop()
+            wd = self._libc.inotify_add_watch(self._fd, os.fsencode(path), _WATCH_MASK)
+            if wd < 0:
+                error = ctypes.get_errno()
+                # ENOSPC oznacza wyczerpanie limitu `fs.inotify.max_user_watches` - wtedy przechodzimy na skanowanie.
+                if error == errno.ENOSPC or path == directory:
+                    raise OSError(error, f"Nie można obserwować folderu {path}: {os.strerror(error)}")
+                continue
+            self._directories[wd] = path
+            try:
+                with os.scandir(path) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            pending_directories.append(entry.path)
+                        elif entry.is_file() and is_supported_file(entry.name):
+                            found.append(entry.path)
+            except OSError:
+                continue
+        return found
+
+    def read_changes(self, timeout):
+        """
+        Czeka do `timeout` sekund na zdarzenia i zwraca ścieżki plików, które się pojawiły lub zmieniły.
+        Zwraca None, jeśli kolejka zdarzeń jądra się przepełniła i trzeba przeskanować cały folder.
+        """
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return []
+        try:
+            buffer = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+
+        changed = []
+        offset = 0
+        while offset < len(buffer):
+            wd, mask, _, name_length = _EVENT_HEADER.unpack_from(buffer, offset)
+            offset += _EVENT_HEADER.size
+            name = os.fsdecode(buffer[offset:offset + name_length].rstrip(b"\0"))
+            offset += name_length
+            if mask & _IN_Q_OVERFLOW:
+                return None
+            directory = self._directories.get(wd)
+            if directory is None or not name:
+                continue
+            path = os.path.join(directory, name)
+            if mask & _IN_ISDIR:
+                # Nowy podfolder (także przeniesiony razem z zawartością) - obserwujemy go i zgłaszamy jego pliki.
+                if mask & (_IN_CREATE | _IN_MOVED_TO):
+                    try:
+                        changed.extend(self._watch_tree(path))
+                    except OSError as e:
+                        print(f"OSTRZEŻENIE: {e} - nowe pliki w tym folderze nie zostaną wykryte.")
+            elif is_supported_file(name):
+                changed.append(path)
+        return changed
+
+    def close(self):
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+class _PollingBackend:
+    """Źródło zdarzeń oparte na okresowym skanowaniu folderu (`scan_audio_files`)."""
+
+    name = "polling"
+
+    def __init__(self, directory, poll_interval):
+        self._directory = directory
+        self._poll_interval = poll_interval
+        self._next_scan = time.monotonic() + poll_interval
+        self._snapshot = {path: (mtime, size) for path, mtime, size in scan_audio_files(directory)}
+        self.initial_files = list(self._snapshot)
+
+    def read_changes(self, timeout):
+        """Skanuje folder, gdy minie `poll_interval`, i zwraca pliki nowe lub zmienione od poprzedniego skanu."""
+        delay = self._next_scan - time.monotonic()
+        if delay > 0:
+            time.sleep(min(delay, timeout) if timeout is not None else delay)
+            if time.monotonic() < self._next_scan:
+                return []
+        self._next_scan = time.monotonic() + self._poll_interval
+
+        snapshot = {path: (mtime, size) for path, mtime, size in scan_audio_files(self._directory)}
+        changed = [path for path, signature in snapshot.items() if self._snapshot.get(path) != signature]
+        self._snapshot = snapshot
+        return changed
+
+    def close(self):
+        pass
+
+
+class FolderWatcher:
+    """
+    Obserwuje folder i zwraca nowe pliki dopiero po ich "ustabilizowaniu się": plik jest gotowy,
+    gdy jego rozmiar i czas modyfikacji nie zmieniły się przez `settle_seconds`, a w tym czasie
+    nie przyszło dla niego żadne zdarzenie zapisu. Pliki istniejące w chwili startu są zgłaszane
+    tak samo jak nowe, więc przerwane wcześniej kopiowanie nie trafi do transkrypcji w połowie.
+    """
+
+    def __init__(self, directory, backend=None, settle_seconds=None, poll_interval=None):
+        """
+        Argumenty:
+            directory (str): Obserwowany folder (razem z podfolderami).
+            backend (str, opcjonalnie): "auto", "inotify" lub "polling". Domyślnie `config.WATCH_BACKEND`.
+            settle_seconds (float, opcjonalnie): Czas stabilizacji pliku. Domyślnie `config.WATCH_SETTLE_SECONDS`.
+            poll_interval (float, opcjonalnie): Odstęp skanowania w trybie "polling".
+                                                Domyślnie `config.WATCH_POLL_INTERVAL_SECONDS`.
+        """
+        self.directory = os.path.abspath(directory)
+        self.settle_seconds = config.WATCH_SETTLE_SECONDS if settle_seconds is None else settle_seconds
+        backend = backend or config.WATCH_BACKEND
+        poll_interval = config.WATCH_POLL_INTERVAL_SECONDS if poll_interval is None else poll_interval
+        # Oczekujące pliki: ścieżka -> ((czas modyfikacji, rozmiar), chwila ostatniej zmiany).
+        self._pending = {}
+
+        self._backend = None
+        if backend in ("auto", "inotify"):
+            try:
+                # Obserwacja startuje przed pierwszym skanem, więc plik dodany w międzyczasie nie zginie.
+                self._backend = _InotifyBackend(self.directory)
+            except OSError as e:
+                if backend == "inotify":
+                    raise
+                print(f"OSTRZEŻENIE: inotify niedostępne ({e}) - przechodzę na okresowe skanowanie folderu.")
+        if self._backend is None:
+            self._backend = _PollingBackend(self.directory, poll_interval)
+        self._mark_changed(self._backend.initial_files)
+
+    @property
+    def backend_name(self):
+        return self._backend.name
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """Zwalnia zasoby mechanizmu obserwacji."""
+        self._backend.close()
+
+    def _mark_changed(self, paths):
+        """Zapisuje (albo przesuwa) początek okresu stabilizacji dla zmienionych plików."""
+        now = time.monotonic()
+        for path in paths:
+            self._pending[path] = (None, now)
+
+    def _collect_settled(self):
+        """Zwraca pliki, które nie zmieniły się przez `settle_seconds`, i usuwa je z listy oczekujących."""
+        now = time.monotonic()
+        settled = []
+        for path, (signature, changed_at) in list(self._pending.items()):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                # Plik zniknął (np. tymczasowa nazwa przy kopiowaniu) - przestajemy na niego czekać.
+                del self._pending[path]
+                continue
+            current = (stat.st_mtime, stat.st_size)
+            if current != signature:
+                self._pending[path] = (current, now)
+            elif now - changed_at >= self.settle_seconds:
+                del self._pending[path]
+                settled.append((path, stat.st_mtime, stat.st_size))
+        return sorted(settled)
+
+    def wait_for_new_files(self, timeout=None):
+        """
+        Blokuje do czasu, aż przynajmniej jeden plik się ustabilizuje (albo minie `timeout` sekund).
+
+        Zwraca:
+            list: Krotki (ścieżka, czas modyfikacji, rozmiar) - w formacie `database.add_files`.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            settled = self._collect_settled()
+            if settled:
+                return settled
+            # Przy oczekujących plikach budzimy się co pół okresu stabilizacji, aby je ponownie sprawdzić.
+            wait = self.settle_seconds / 2 if self._pending else None
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return []
+                wait = remaining if wait is None else min(wait, remaining)
+
+            changed = self._backend.read_changes(wait)
+            if changed is None:
+                print("OSTRZEŻENIE: Przepełniona kolejka zdarzeń - skanuję cały folder.")
+                changed = [path for path, _, _ in scan_audio_files(self.directory)]
+            self._mark_changed(changed)